@@ -0,0 +1,367 @@
+# In: benchmarks/run_benchmarks.py
+
+"""
+Offline benchmark suite for the engine, the strategy interpreter and the data pipeline.
+
+Everything runs on synthetic data (see synthetic_data.py) in a scratch directory, so
+no Fyers access or real market data is needed. Results are written as JSON; pass
+--compare with an earlier results file to see the change per metric.
+
+    python -m benchmarks.run_benchmarks --symbols 20 --years 5
+    python -m benchmarks.run_benchmarks --compare benchmarks/results/bench-<earlier>.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import duckdb
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from benchmarks.synthetic_data import MARKET_DATA_DDL, generate_market_data, synthetic_symbols, write_market_data
+
+# Presets of increasing rule complexity, in the format the Strategy Builder saves
+BENCHMARK_PRESETS = {
+    "Bench_SMA_Cross": {
+        "entry": [{"type": "group", "logical_op": "AND", "conditions": [
+            {"type": "condition", "left": "SMA(20)", "operator": "Crosses Above", "right": "SMA(50)"}]}],
+        "exit": [{"type": "group", "logical_op": "AND", "conditions": [
+            {"type": "condition", "left": "SMA(20)", "operator": "Is Less Than", "right": "SMA(50)"}]}],
+    },
+    "Bench_RSI_Rebound": {
+        "entry": [{"type": "group", "logical_op": "AND", "conditions": [
+            {"type": "condition", "left": "RSI(14)", "operator": "Is Less Than", "right": "value:30"}]}],
+        "exit": [{"type": "group", "logical_op": "AND", "conditions": [
+            {"type": "condition", "left": "RSI(14)", "operator": "Is Greater Than", "right": "value:60"}]}],
+    },
+    "Bench_Trend_RSI": {
+        "entry": [{"type": "group", "logical_op": "AND", "conditions": [
+            {"type": "condition", "left": "SMA(50)", "operator": "Is Greater Than", "right": "SMA(200)"},
+            {"type": "group", "logical_op": "OR", "conditions": [
+                {"type": "condition", "left": "RSI(14)", "operator": "Is Less Than", "right": "value:40"},
+                {"type": "condition", "left": "RSI(7)", "operator": "Is Less Than", "right": "value:25"}]}]}],
+        "exit": [{"type": "group", "logical_op": "AND", "conditions": [
+            {"type": "condition", "left": "RSI(14)", "operator": "Is Greater Than", "right": "value:65"}]}],
+    },
+}
+
+
+def _best_of(func, repeat):
+    """Runs `func` `repeat` times and returns the fastest wall time in seconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def _result(benchmark, metric, value, unit, higher_is_better, **params):
+    return {"benchmark": benchmark, "metric": metric, "value": value, "unit": unit,
+            "higher_is_better": higher_is_better, "params": params}
+
+
+def _write_presets(presets_dir):
+    presets_dir.mkdir(parents=True, exist_ok=True)
+    for name, rules in BENCHMARK_PRESETS.items():
+        preset = {"strategy_name": name, "strategy_file": "configurable_strategy",
+                  "strategy_class": "ConfigurableStrategy", "parameters": {"rules": rules}}
+        with open(presets_dir / f"{name}.json", 'w') as f:
+            json.dump(preset, f, indent=4)
+
+
+def _symbol_frame(market_data_df, symbol):
+    data = market_data_df[market_data_df['Ticker'] == symbol].drop(columns='Ticker')
+    data = data.set_index(data['Date'].astype('datetime64[ns]').rename('Date')).drop(columns='Date')
+    return data.astype(float)
+
+
+# --- Benchmarks ---
+
+def bench_duckdb_ingest(workspace, market_data_df, repeat):
+    """Inserting the whole synthetic universe into a fresh market_data table, as the pipeline saves it."""
+    def ingest():
+        db_path = workspace / f"ingest-{time.perf_counter_ns()}.duckdb"
+        with duckdb.connect(database=str(db_path), read_only=False) as conn:
+            conn.execute(MARKET_DATA_DDL)
+            conn.register("market_data_df", market_data_df)
+            conn.execute("INSERT OR IGNORE INTO market_data BY NAME SELECT * FROM market_data_df;")
+        db_path.unlink()
+
+    seconds = _best_of(ingest, repeat)
+    results = [_result("duckdb_ingest", "rows_per_sec", len(market_data_df) / seconds, "rows/s", True, rows=len(market_data_df))]
+
+    # The pipeline's streaming path: one Arrow table per symbol, written in batches by MarketDataWriter
+    import pyarrow as pa
+    from foundry_reflex.utils.market_data_ingest import MarketDataWriter
+
+    tables = [pa.Table.from_pandas(group, preserve_index=False) for _, group in market_data_df.groupby("Ticker", sort=False)]
+
+    def stream_ingest():
+        db_path = workspace / f"stream-{time.perf_counter_ns()}.duckdb"
+        with duckdb.connect(database=str(db_path), read_only=False) as conn:
+            conn.execute(MARKET_DATA_DDL)
+            with MarketDataWriter(conn) as writer:
+                for table in tables:
+                    writer.write(table)
+        db_path.unlink()
+
+    seconds = _best_of(stream_ingest, repeat)
+    results.append(_result("duckdb_stream_ingest", "rows_per_sec", len(market_data_df) / seconds, "rows/s", True,
+                           rows=len(market_data_df), symbols=len(tables)))
+    return results
+
+
+def bench_rs_ranking(market_data_df, repeat):
+    from foundry_reflex.utils.rs_ranking import calculate_rs_ranking
+
+    symbols = market_data_df['Ticker'].nunique()
+    frame = market_data_df.assign(Date=market_data_df['Date'].astype('datetime64[ns]'))
+    seconds = _best_of(lambda: calculate_rs_ranking(frame.copy()), repeat)
+    return [_result("rs_ranking", "seconds", seconds, "s", False, symbols=symbols)]
+
+
+# Rule indicators timed per bar, and the pandas-ta calls (as regime_filter.py uses them) they are compared with
+BENCHMARK_INDICATORS = ["SMA(50)", "SMA(200)", "RSI(14)", "EMA(50)", "WRSI(14)", "ATR(14)", "MACD(12,26,9)",
+                        "BB_UPPER(20,2.0)", "ADX(14)", "DC_UPPER(20)", "VWAP(20)"]
+PANDAS_TA_EQUIVALENTS = {
+    "SMA(50)": lambda ta, d: ta.sma(d['Close'], length=50),
+    "EMA(50)": lambda ta, d: ta.ema(d['Close'], length=50),
+    "WRSI(14)": lambda ta, d: ta.rsi(d['Close'], length=14),
+    "ATR(14)": lambda ta, d: ta.atr(d['High'], d['Low'], d['Close'], length=14),
+    "MACD(12,26,9)": lambda ta, d: ta.macd(d['Close'], fast=12, slow=26, signal=9),
+    "BB_UPPER(20,2.0)": lambda ta, d: ta.bbands(d['Close'], length=20, std=2.0),
+    "ADX(14)": lambda ta, d: ta.adx(d['High'], d['Low'], d['Close'], length=14),
+    "DC_UPPER(20)": lambda ta, d: ta.donchian(d['High'], d['Low'], lower_length=20, upper_length=20),
+}
+
+
+def bench_indicators(data, repeat):
+    """Per-bar cost of the rule indicators, next to pandas-ta's when it is installed."""
+    from strategies.configurable_strategy import compute_indicator
+
+    try:
+        import pandas_ta as ta
+    except ImportError:
+        ta = None
+        logging.warning("pandas-ta is not installed; skipping the pandas-ta comparison.")
+
+    results = []
+    for indicator_str in BENCHMARK_INDICATORS:
+        compute_indicator(indicator_str, data) # Warm-up: numba compiles on first call
+        seconds = _best_of(lambda: compute_indicator(indicator_str, data), repeat)
+        results.append(_result("indicators", f"{indicator_str}_ns_per_bar", seconds / len(data) * 1e9, "ns/bar", False,
+                               bars=len(data)))
+        if ta is not None and indicator_str in PANDAS_TA_EQUIVALENTS:
+            reference = PANDAS_TA_EQUIVALENTS[indicator_str]
+            seconds = _best_of(lambda: reference(ta, data), repeat)
+            results.append(_result("indicators", f"pandas_ta_{indicator_str}_ns_per_bar", seconds / len(data) * 1e9,
+                                   "ns/bar", False, bars=len(data)))
+    return results
+
+
+def bench_interpreter(data, repeat):
+    """Per-bar cost of ConfigurableStrategy on the bar-by-bar engine and on the vectorized path."""
+    from backtesting import Backtest
+    from strategies.configurable_strategy import ConfigurableStrategy, compute_indicator, extract_indicator_strings
+    from strategies.vectorized_backtest import run_vectorized_backtest
+
+    results = []
+    for name, rules in BENCHMARK_PRESETS.items():
+        def event():
+            bt = Backtest(data, ConfigurableStrategy, cash=100_000, commission=.002, finalize_trades=True)
+            bt.run(rules=rules)
+
+        def vectorized():
+            indicators = {s: compute_indicator(s, data) for s in extract_indicator_strings(rules)}
+            run_vectorized_backtest(data, rules, indicators)
+
+        for path, func in [("event", event), ("vectorized", vectorized)]:
+            seconds = _best_of(func, repeat)
+            results.append(_result("interpreter", f"{name}_{path}_us_per_bar", seconds / len(data) * 1e6, "us/bar", False,
+                                   bars=len(data)))
+    return results
+
+
+def bench_engine(workspace, db_path, symbols, repeat):
+    """End-to-end PerformanceEngine full runs (store build, pool, backtests, library writes)."""
+    from foundry_reflex.utils import performance_library_engine as engine
+    from foundry_reflex.utils.indicator_cache import IndicatorCache
+
+    presets_dir = workspace / "strategies"
+    _write_presets(presets_dir)
+    # Point the engine at the scratch workspace instead of the project's data/
+    engine.PATHS.update({
+        "market_data_db": str(db_path),
+        "strategy_presets": str(presets_dir),
+        "performance_library": str(workspace / "performance_library.parquet"),
+        "engine_ledger": str(workspace / "engine_ledger.duckdb"),
+        "engine_metrics": str(workspace / "engine_metrics.parquet"),
+        "indicator_cache": str(workspace / "indicator_cache"),
+    })
+    logging.getLogger("engine").setLevel(logging.WARNING)
+
+    results = []
+    n_jobs = len(symbols) * len(BENCHMARK_PRESETS)
+    indicator_cache = IndicatorCache(engine.PATHS["indicator_cache"])
+    for execution in ["vectorized", "event"]:
+        perf_engine = engine.PerformanceEngine(symbols, list(BENCHMARK_PRESETS))
+
+        def cold_run():
+            indicator_cache.clear()
+            perf_engine.run(mode='full', execution=execution)
+
+        # Cold: every indicator computed; warm: every indicator read back from the on-disk cache
+        seconds = _best_of(cold_run, repeat)
+        results.append(_result("engine", f"{execution}_jobs_per_sec", n_jobs / seconds, "jobs/s", True,
+                               jobs=n_jobs, symbols=len(symbols)))
+        seconds = _best_of(lambda: perf_engine.run(mode='full', execution=execution), repeat)
+        results.append(_result("engine", f"{execution}_warm_cache_jobs_per_sec", n_jobs / seconds, "jobs/s", True,
+                               jobs=n_jobs, symbols=len(symbols)))
+    return results
+
+
+def bench_bar_aggregator(workspace, symbols, repeat, n_ticks=200_000, seed=42):
+    """Replayed ticks aggregated into 1m/5m/15m bars, with completed bars flushed to DuckDB."""
+    import numpy as np
+    import pandas as pd
+    from foundry_reflex.utils.bar_aggregator import ReplayFeed, TickBarAggregator
+
+    # One session (09:15-15:30 IST) of random-walk ticks spread over the symbols
+    rng = np.random.default_rng(seed)
+    session_open = pd.Timestamp("2025-01-06 03:45").value
+    ticks = pd.DataFrame({
+        'Ticker': rng.choice(symbols, n_ticks),
+        'Timestamp': np.sort(rng.integers(session_open, session_open + int(6.25 * 3600e9), n_ticks)).astype('datetime64[ns]'),
+        'Price': 100 * np.exp(rng.normal(0, 1e-4, n_ticks).cumsum()),
+        'Volume': rng.integers(1, 500, n_ticks).astype(float),
+    })
+    feed = ReplayFeed(ticks)
+    db_path = workspace / "intraday.duckdb"
+
+    def replay():
+        db_path.unlink(missing_ok=True)
+        TickBarAggregator(['1m', '5m', '15m'], db_path=db_path).consume(feed)
+
+    seconds = _best_of(replay, repeat)
+    return [_result("bar_aggregator", "ticks_per_sec", n_ticks / seconds, "ticks/s", True,
+                    ticks=n_ticks, symbols=len(symbols))]
+
+
+def bench_scanner(db_path, symbols, repeat):
+    """Live signal scan of every symbol against every benchmark preset on the latest bar."""
+    from foundry_reflex.utils.signal_scanner import scan_signals
+
+    presets = [{"strategy_name": name, "strategy_file": "configurable_strategy",
+                "strategy_class": "ConfigurableStrategy", "parameters": {"rules": rules}}
+               for name, rules in BENCHMARK_PRESETS.items()]
+    logging.getLogger("scanner").setLevel(logging.WARNING)
+
+    n_pairs = len(symbols) * len(presets)
+    seconds = _best_of(lambda: scan_signals(db_path, symbols, presets), repeat)
+    return [_result("scanner", "pairs_per_sec", n_pairs / seconds, "pairs/s", True,
+                    pairs=n_pairs, symbols=len(symbols))]
+
+
+# --- Runner ---
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(n_symbols, years, seed, repeat, selected):
+    market_data_df = generate_market_data(n_symbols, years, seed)
+    symbols = synthetic_symbols(n_symbols)
+    data = _symbol_frame(market_data_df, symbols[0])
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="foundry_bench_") as workspace:
+        workspace = Path(workspace)
+        db_path = workspace / "market_data.duckdb"
+        write_market_data(db_path, market_data_df)
+
+        if "ingest" in selected:
+            results += bench_duckdb_ingest(workspace, market_data_df, repeat)
+        if "rs" in selected:
+            results += bench_rs_ranking(market_data_df, repeat)
+        if "indicators" in selected:
+            results += bench_indicators(data, repeat)
+        if "interpreter" in selected:
+            results += bench_interpreter(data, repeat)
+        if "aggregator" in selected:
+            results += bench_bar_aggregator(workspace, symbols, repeat)
+        if "scanner" in selected:
+            results += bench_scanner(db_path, symbols, repeat)
+        if "engine" in selected:
+            results += bench_engine(workspace, db_path, symbols, repeat)
+
+    meta = {
+        "timestamp": time.strftime('%Y-%m-%dT%H:%M:%S'),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "symbols": n_symbols,
+        "years": years,
+        "seed": seed,
+        "repeat": repeat,
+    }
+    return {"meta": meta, "results": results}
+
+
+def compare(current, baseline):
+    """Prints the change of every metric present in both result files."""
+    previous = {(r["benchmark"], r["metric"]): r for r in baseline["results"]}
+    print(f"\nCompared with {baseline['meta'].get('git_commit')} ({baseline['meta'].get('timestamp')}):")
+    for r in current["results"]:
+        old = previous.get((r["benchmark"], r["metric"]))
+        if old is None or not old["value"]:
+            continue
+        change = (r["value"] - old["value"]) / old["value"]
+        better = change > 0 if r["higher_is_better"] else change < 0
+        flag = "faster" if better else "SLOWER"
+        print(f"  {r['benchmark']:<14} {r['metric']:<40} {old['value']:>12.3f} -> {r['value']:>12.3f} {r['unit']:<7} "
+              f"({change:+.1%}, {flag})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Foundry offline benchmark suite")
+    parser.add_argument("--symbols", type=int, default=20, help="Synthetic symbols (default: 20).")
+    parser.add_argument("--years", type=float, default=5, help="Years of daily bars per symbol (default: 5).")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per benchmark; the fastest is kept (default: 3).")
+    parser.add_argument("--only", nargs="+", choices=["ingest", "rs", "indicators", "interpreter", "aggregator", "scanner", "engine"],
+                        default=["ingest", "rs", "indicators", "interpreter", "aggregator", "scanner", "engine"])
+    parser.add_argument("--output", default=None, help="Results file (default: benchmarks/results/bench-<timestamp>.json).")
+    parser.add_argument("--compare", default=None, help="An earlier results file to compare against.")
+    args = parser.parse_args()
+
+    # The engine reads config.yaml and writes its logs relative to the project root
+    os.chdir(PROJECT_ROOT)
+    report = run_benchmarks(args.symbols, args.years, args.seed, args.repeat, set(args.only))
+
+    output = Path(args.output or PROJECT_ROOT / "benchmarks" / "results" / f"bench-{time.strftime('%Y%m%dT%H%M%S')}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2, default=str)
+
+    for r in report["results"]:
+        print(f"{r['benchmark']:<14} {r['metric']:<40} {r['value']:>14.3f} {r['unit']}")
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            compare(report, json.load(f))
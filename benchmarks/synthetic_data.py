@@ -0,0 +1,88 @@
+# In: benchmarks/synthetic_data.py
+
+"""
+Deterministic synthetic daily OHLCV, written straight into a market_data DuckDB file.
+
+The same (symbols, years, seed) always produces the same bars, so benchmark runs
+on different versions of the code see identical input.
+
+    python -m benchmarks.synthetic_data --symbols 50 --years 10 --output data/synthetic.duckdb
+"""
+
+import argparse
+from pathlib import Path
+
+import duckdb
+import numpy as np
+import pandas as pd
+
+TRADING_DAYS_PER_YEAR = 252
+END_DATE = "2025-01-01"
+
+# Same table as data_pipeline_orchestrator.setup_database() creates
+MARKET_DATA_DDL = (
+    "CREATE TABLE IF NOT EXISTS market_data (Date DATE, Ticker VARCHAR, Open DOUBLE, High DOUBLE, "
+    "Low DOUBLE, Close DOUBLE, Volume BIGINT, PRIMARY KEY (Date, Ticker));"
+)
+
+
+def synthetic_symbols(n_symbols):
+    return [f"NSE:SYN{i:04d}-EQ" for i in range(n_symbols)]
+
+
+def generate_symbol_bars(symbol, symbol_index, n_bars, seed=42):
+    """
+    One symbol's bars as a random walk with its own drift and volatility, plus a slow
+    cycle so that trend and mean-reversion rules both find trades.
+    """
+    rng = np.random.default_rng([seed, symbol_index])
+    drift = rng.normal(0.0003, 0.0004)
+    volatility = rng.uniform(0.01, 0.03)
+    cycle = 0.002 * np.sin(np.arange(n_bars) * 2 * np.pi / rng.uniform(80, 300))
+
+    log_returns = rng.normal(drift, volatility, n_bars) + cycle
+    close = rng.uniform(50, 2000) * np.exp(np.cumsum(log_returns))
+    previous_close = np.r_[close[0], close[:-1]]
+    open_ = previous_close * np.exp(rng.normal(0, volatility / 3, n_bars))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, volatility / 2, n_bars)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, volatility / 2, n_bars)))
+    volume = rng.lognormal(13, 0.5, n_bars).astype(np.int64)
+
+    return pd.DataFrame({
+        'Date': pd.bdate_range(end=END_DATE, periods=n_bars).date,
+        'Ticker': symbol,
+        'Open': open_,
+        'High': high,
+        'Low': low,
+        'Close': close,
+        'Volume': volume,
+    })
+
+
+def generate_market_data(n_symbols, years, seed=42):
+    """Returns N symbols x M years of daily bars in the market_data column layout."""
+    n_bars = int(years * TRADING_DAYS_PER_YEAR)
+    frames = [generate_symbol_bars(symbol, i, n_bars, seed) for i, symbol in enumerate(synthetic_symbols(n_symbols))]
+    return pd.concat(frames, ignore_index=True)
+
+
+def write_market_data(db_path, market_data_df):
+    """Creates (or extends) a market_data table at `db_path` and inserts the bars. Returns the row count."""
+    db_path = Path(db_path)
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    with duckdb.connect(database=str(db_path), read_only=False) as conn:
+        conn.execute(MARKET_DATA_DDL)
+        conn.execute("INSERT OR IGNORE INTO market_data BY NAME SELECT * FROM market_data_df;")
+    return len(market_data_df)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic market_data DuckDB file.")
+    parser.add_argument("--symbols", type=int, default=50, help="Number of symbols (default: 50).")
+    parser.add_argument("--years", type=float, default=10, help="Years of daily bars per symbol (default: 10).")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed (default: 42).")
+    parser.add_argument("--output", default="data/synthetic_market_data.duckdb", help="DuckDB file to write.")
+    args = parser.parse_args()
+
+    rows = write_market_data(args.output, generate_market_data(args.symbols, args.years, args.seed))
+    print(f"Wrote {rows} bars for {args.symbols} symbols to {args.output}")
@@ -0,0 +1,94 @@
+import reflex as rx
+from foundry_reflex.state.scanner_state import ScannerState
+from .shared.metric_card import metric_card
+
+def scanner_page() -> rx.Component:
+    """The live signal scanner: which strategies fire on which stocks on the latest bar."""
+    return rx.box(
+        rx.vstack(
+            # --- HEADER ---
+            rx.vstack(
+                rx.heading("Signal Scanner", size="8", weight="bold", color_scheme="gray"),
+                rx.text(
+                    "Check every strategy's entry and exit rules against a universe's latest bars.",
+                    size="4",
+                    color_scheme="gray",
+                ),
+                spacing="1",
+                align_items="start",
+                width="100%",
+            ),
+
+            # --- CONTROL PANEL ---
+            rx.card(
+                rx.vstack(
+                    rx.grid(
+                        rx.select(
+                            ScannerState.stock_universe_names,
+                            placeholder="Select a Universe...",
+                            on_change=ScannerState.set_scan_universe,
+                            size="3",
+                        ),
+                        rx.select(
+                            ScannerState.scan_strategy_options,
+                            value=ScannerState.scan_strategy,
+                            on_change=ScannerState.set_scan_strategy,
+                            size="3",
+                        ),
+                        columns="2",
+                        spacing="4",
+                        width="100%",
+                    ),
+                    rx.button(
+                        rx.icon(tag="radar", margin_right="0.5em"),
+                        "Scan for Signals",
+                        on_click=ScannerState.start_scan,
+                        is_loading=ScannerState.is_scanning,
+                        loading_text="Scanning...",
+                        width="100%",
+                        size="3",
+                        margin_top="1em",
+                        color_scheme="teal",
+                    ),
+                    rx.text(ScannerState.scan_status, size="2", color_scheme="gray"),
+                    spacing="4",
+                ),
+                box_shadow="var(--shadow-4)",
+                border="1px solid var(--gray-3)",
+            ),
+
+            # --- SIGNAL SUMMARY ---
+            rx.grid(
+                metric_card("Entry Signals", ScannerState.entry_count_str),
+                metric_card("Exit Signals", ScannerState.exit_count_str),
+                columns="2",
+                spacing="4",
+                width="100%",
+            ),
+
+            # --- SIGNALS TABLE ---
+            rx.card(
+                rx.vstack(
+                    rx.heading("Signals on the Latest Bar", size="5", weight="medium", color_scheme="gray"),
+                    rx.data_table(
+                        data=ScannerState.signal_rows,
+                        columns=["Symbol", "Strategy", "Bar Date", "Close", "Signal"],
+                        pagination=True,
+                        search=True,
+                        sort=True,
+                    ),
+                    align_items="flex-start",
+                    width="100%",
+                    spacing="4",
+                ),
+                box_shadow="var(--shadow-4)",
+                border="1px solid var(--gray-3)",
+            ),
+            spacing="6",
+            width="100%"
+        ),
+        on_mount=ScannerState.load_project_data,
+        padding="2em",
+        max_width="1200px",
+        margin="0 auto",
+    )
@@ -1,6 +1,7 @@
 import reflex as rx
 from foundry_reflex.components.home_ui import home_dashboard
 from foundry_reflex.components.research_hub_ui import research_hub_page
+from foundry_reflex.components.scanner_ui import scanner_page
 
 # --- A simple navbar component for navigation (Theme Switcher REMOVED) ---
 def navbar() -> rx.Component:
@@ -17,6 +18,7 @@ def navbar() -> rx.Component:
             rx.hstack(
                 rx.link("Dashboard", href="/", color_scheme="gray", high_contrast=True),
                 rx.link("Research Hub", href="/research-hub", color_scheme="gray", high_contrast=True),
+                rx.link("Signal Scanner", href="/scanner", color_scheme="gray", high_contrast=True),
                 # The rx.select for the theme switcher has been completely removed.
                 spacing="5",
                 align_items="center",
@@ -47,6 +49,11 @@ def research_hub() -> rx.Component:
     """The Research Hub page for running backtests."""
     return rx.vstack(navbar(), research_hub_page(), spacing="0", background_color="#F8F9FA")
 
+@rx.page(route="/scanner")
+def scanner() -> rx.Component:
+    """The Signal Scanner page for today's entry and exit signals."""
+    return rx.vstack(navbar(), scanner_page(), spacing="0", background_color="#F8F9FA")
+
 # --- Create and configure the app (Theme is now hard-coded) ---
 app = rx.App(
     theme=rx.theme(
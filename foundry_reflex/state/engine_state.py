@@ -4,6 +4,7 @@ import sys
 import asyncio
 from pathlib import Path
 from .data_management_state import DataManagementState
+from ..utils import engine_service
 
 class EngineState(DataManagementState):
     """Manages the state and execution of the performance engine."""
@@ -66,42 +67,26 @@ class EngineState(DataManagementState):
 
     @rx.background
     async def run_engine_background(self):
-        """Runs the performance library engine in a subprocess without blocking the UI."""
+        """
+        Runs the performance library engine without blocking the UI: on the warm engine
+        service if one is running, otherwise in a new subprocess.
+        """
         try:
             stocks_to_run = self.stock_universes.get(self.selected_universe, [])
-            project_root = Path(__file__).resolve().parent.parent.parent
-            
-            command = [
-                sys.executable, "-m", "foundry_reflex.utils.performance_library_engine",
-                "--stocks", *stocks_to_run,
-                "--strategies", self.selected_strategy,
-                "--mode", self.selected_mode,
-            ]
-
-            process = await asyncio.create_subprocess_exec(
-                *command, 
-                stdout=asyncio.subprocess.PIPE, 
-                stderr=asyncio.subprocess.STDOUT,
-                cwd=str(project_root)
-            )
 
-            while True:
-                line_bytes = await process.stdout.readline()
-                if not line_bytes:
-                    break
-                async with self:
-                    self.engine_log += line_bytes.decode('utf-8', errors='ignore')
+            conn = await asyncio.to_thread(engine_service.connect)
+            if conn is not None:
+                succeeded = await self._run_on_service(conn)
+            else:
+                succeeded = await self._run_in_subprocess()
 
-            await process.wait()
-            
             async with self:
                 self.last_run_summary = {
-                    "status": "✅ Success" if process.returncode == 0 else "❌ Failed",
+                    "status": "✅ Success" if succeeded else "❌ Failed",
                     "stocks": len(stocks_to_run),
                     "strategies": 1,
-                    "return_code": process.returncode
                 }
-                if process.returncode == 0:
+                if succeeded:
                     # Reload data to update the main dashboard's summary
                     self.load_project_data()
 
@@ -114,3 +99,50 @@ class EngineState(DataManagementState):
                 self.engine_log += "\n--- Engine run complete. ---"
                 self.is_engine_running = False
 
+    async def _run_on_service(self, conn):
+        """Submits the run to the engine service and streams its log. Returns True on success."""
+        with conn:
+            engine_service.submit(conn, {
+                "action": "run",
+                "universe": self.selected_universe,
+                "strategies": [self.selected_strategy],
+                "mode": self.selected_mode,
+            })
+            while True:
+                message = await asyncio.to_thread(conn.recv)
+                async with self:
+                    if message.get("type") == "log":
+                        self.engine_log += message["message"] + "\n"
+                    elif message.get("error"):
+                        self.engine_log += f"ERROR: {message['error']}\n"
+                if message.get("type") == "done":
+                    return message.get("status") == "ok"
+
+    async def _run_in_subprocess(self):
+        """Runs the engine as a one-off subprocess and streams its output. Returns True on success."""
+        project_root = Path(__file__).resolve().parent.parent.parent
+
+        # The universe is passed by name; its symbol list can be too long for argv
+        command = [
+            sys.executable, "-m", "foundry_reflex.utils.performance_library_engine",
+            "--universe", self.selected_universe,
+            "--strategies", self.selected_strategy,
+            "--mode", self.selected_mode,
+        ]
+
+        process = await asyncio.create_subprocess_exec(
+            *command, 
+            stdout=asyncio.subprocess.PIPE, 
+            stderr=asyncio.subprocess.STDOUT,
+            cwd=str(project_root)
+        )
+
+        while True:
+            line_bytes = await process.stdout.readline()
+            if not line_bytes:
+                break
+            async with self:
+                self.engine_log += line_bytes.decode('utf-8', errors='ignore')
+
+        await process.wait()
+        return process.returncode == 0
@@ -0,0 +1,93 @@
+import reflex as rx
+import asyncio
+from pathlib import Path
+from .data_management_state import DataManagementState
+
+ALL_STRATEGIES = "All Strategies"
+
+class ScannerState(DataManagementState):
+    """Runs the live signal scanner over a universe and holds its latest results."""
+
+    # UI selections
+    scan_universe: str = ""
+    scan_strategy: str = ALL_STRATEGIES
+
+    # Scan status and results (only the pairs with a signal on the latest bar)
+    is_scanning: bool = False
+    scan_status: str = "Select a universe and run a scan."
+    signal_rows: list[list[str]] = []
+    entry_count: int = 0
+    exit_count: int = 0
+
+    @rx.var
+    def scan_strategy_options(self) -> list[str]:
+        """The strategy presets for the UI, with an option to scan all of them."""
+        return [ALL_STRATEGIES] + (self.strategy_presets if self.strategy_presets else [])
+
+    @rx.var
+    def entry_count_str(self) -> str:
+        """Safely gets the entry signal count as a string for display."""
+        return str(self.entry_count)
+
+    @rx.var
+    def exit_count_str(self) -> str:
+        """Safely gets the exit signal count as a string for display."""
+        return str(self.exit_count)
+
+    def start_scan(self):
+        """Event handler to validate the selections and launch the scan in the background."""
+        if self.is_scanning:
+            return
+        if not self.scan_universe:
+            self.scan_status = "ERROR: Please select a universe before scanning."
+            return
+
+        self.is_scanning = True
+        self.scan_status = f"Scanning universe '{self.scan_universe}'..."
+        return ScannerState.run_scan_background
+
+    @rx.background
+    async def run_scan_background(self):
+        """Runs the scan in a worker thread, so the UI stays responsive."""
+        try:
+            async with self:
+                symbols = self.stock_universes.get(self.scan_universe, []) or []
+                paths = self.config.get("paths", {})
+                strategies = None if self.scan_strategy == ALL_STRATEGIES else [self.scan_strategy]
+
+            results = await asyncio.to_thread(self._scan, symbols, paths, strategies)
+            fired = results[results['entry'] | results['exit']]
+
+            async with self:
+                self.signal_rows = [
+                    [
+                        row.symbol,
+                        row.strategy_name,
+                        row.date.strftime('%Y-%m-%d'),
+                        f"{row.close:,.2f}",
+                        " + ".join(label for label, hit in [("ENTRY", row.entry), ("EXIT", row.exit)] if hit),
+                    ]
+                    for row in fired.itertuples()
+                ]
+                self.entry_count = int(results['entry'].sum())
+                self.exit_count = int(results['exit'].sum())
+                self.scan_status = (
+                    f"Scanned {results['symbol'].nunique()} symbols x {results['strategy_name'].nunique()} "
+                    f"strategies: {len(fired)} pairs with a signal on the latest bar."
+                )
+
+        except Exception as e:
+            async with self:
+                self.scan_status = f"ERROR: {e}"
+        finally:
+            async with self:
+                self.is_scanning = False
+
+    @staticmethod
+    def _scan(symbols, paths, strategies):
+        # Imported here: the scanner pulls in the strategy interpreter and backtesting.py
+        from ..utils import signal_scanner
+
+        project_root = Path(__file__).resolve().parent.parent.parent
+        presets = signal_scanner.load_scan_presets(project_root / paths.get("strategy_presets", ""), strategies)
+        return signal_scanner.scan_signals(project_root / paths.get("market_data_db", ""), symbols, presets)
@@ -0,0 +1,136 @@
+# In: foundry_reflex/utils/async_dataprovider.py
+
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+import aiohttp
+import pandas as pd
+
+from .fyers_dataprovider import (
+    FYERS_HISTORY_URL, FYERS_RATE_LIMITER, RETRY_POLICY, RetryableFetchError,
+    candles_to_frame, candles_to_table, date_chunks, history_params, parse_history_response, retry_delay
+)
+from .logger_setup import get_logger
+
+logger = get_logger("async_dataprovider", "logs/pipeline.log")
+
+# Open connections to the history endpoint. The rate limiter, not this, sets the
+# request rate; it only has to cover the requests in flight at that rate.
+MAX_CONNECTIONS = 20
+REQUEST_TIMEOUT_SECONDS = 30
+KEEPALIVE_SECONDS = 60
+
+
+async def _request_chunk_async(session, symbol, date_from, date_to):
+    await FYERS_RATE_LIMITER.acquire()
+    try:
+        async with session.get(FYERS_HISTORY_URL, params=history_params(symbol, date_from, date_to)) as response:
+            try:
+                data = await response.json(content_type=None)
+            except ValueError:
+                data = None
+            status = response.status
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        raise RetryableFetchError(str(e) or type(e).__name__) from e
+    candles = parse_history_response(status, data)
+    if candles is None:
+        message = data.get('message', 'N/A') if isinstance(data, dict) else 'N/A'
+        logger.warning(f"API non-ok for {symbol} chunk (HTTP {status}). Msg: {message}")
+    return candles
+
+
+async def fetch_data_chunk_async(session, symbol, date_from, date_to):
+    """
+    One chunk of daily candles on the shared session. Returns the candles (possibly
+    none), or None if the chunk could not be fetched.
+
+    A failed attempt sleeps its jittered backoff without holding a connection or a
+    token, then takes a new place at the back of the rate limiter's queue, so the other
+    symbols keep their turns while this one backs off.
+    """
+    for attempt in range(RETRY_POLICY["max_retries"] + 1):
+        try:
+            return await _request_chunk_async(session, symbol, date_from, date_to)
+        except RetryableFetchError as e:
+            if attempt == RETRY_POLICY["max_retries"]:
+                logger.error(f"Chunk request for {symbol} failed after {attempt + 1} attempts: {e}")
+                return None
+            delay = retry_delay(attempt)
+            logger.info(f"Retrying {symbol} chunk in {delay:.1f}s ({e}).")
+            await asyncio.sleep(delay)
+
+
+async def get_historical_data_range_async(session, symbol, date_from, date_to, chunk_size_days=360, as_arrow=False):
+    """
+    Daily bars from `date_from` to `date_to` (inclusive); the symbol's chunks are requested
+    concurrently. Returns None if any chunk failed, like get_historical_data_range.
+    """
+    chunks = date_chunks(date_from, date_to, chunk_size_days)
+    results = await asyncio.gather(*(
+        fetch_data_chunk_async(session, symbol, range_from, range_to) for range_from, range_to in chunks
+    ))
+    for (range_from, range_to), candles in zip(chunks, results):
+        if candles is None:
+            logger.error(f"Dropping {symbol}: chunk {range_from:%Y-%m-%d}..{range_to:%Y-%m-%d} could not be fetched.")
+            return None
+    all_candles = [candle for candles in results for candle in candles]
+    return candles_to_table(symbol, all_candles) if as_arrow else candles_to_frame(symbol, all_candles)
+
+
+async def fetch_all_data_async(client_id, access_token, symbols, days=1095, start_dates=None, max_connections=MAX_CONNECTIONS, sink=None):
+    """
+    Fetches daily bars for many symbols over one keep-alive connection pool.
+
+    Every chunk of every symbol is scheduled up front; FYERS_RATE_LIMITER releases
+    them at exactly its rate, so the per-second budget stays fully used with no
+    polling and no idle worker threads, however many symbols there are.
+
+    Args:
+        symbols (list): Fyers symbols, e.g. ['NSE:RELIANCE-EQ'].
+        days (int): History for symbols without a start date.
+        start_dates (dict): {symbol: datetime} to start from instead, e.g. the last stored date.
+        max_connections (int): Size of the connection pool.
+        sink (callable): Called with each symbol's bars as a pyarrow.Table as soon as they
+            arrive (e.g. MarketDataWriter.write), so they are not held until the end.
+
+    Returns:
+        pd.DataFrame: market_data rows (Date, Ticker, OHLCV) for every symbol with data;
+            with a sink, the number of symbols delivered to it instead.
+    """
+    start_dates = start_dates or {}
+    end_date = datetime.now(); default_start = end_date - timedelta(days=days)
+    logger.info(f"Fetching data for {len(symbols)} symbols ({len(symbols) - len(start_dates)} full {days}-day backfills) over {max_connections} connections...")
+
+    start_time = time.time()
+    headers = {'Authorization': f'{client_id}:{access_token}'}
+    connector = aiohttp.TCPConnector(limit=max_connections, keepalive_timeout=KEEPALIVE_SECONDS)
+    timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT_SECONDS)
+    async with aiohttp.ClientSession(headers=headers, connector=connector, timeout=timeout) as session:
+        tasks = [
+            asyncio.create_task(get_historical_data_range_async(
+                session, s, start_dates.get(s, default_start), end_date, as_arrow=sink is not None
+            ))
+            for s in symbols
+        ]
+        all_data = []; delivered = 0
+        for i, task in enumerate(asyncio.as_completed(tasks)):
+            result = await task
+            if result is not None:
+                if sink is not None:
+                    sink(result)
+                else:
+                    all_data.append(result)
+                delivered += 1
+            print(f"  -> Progress: {(i + 1) / len(symbols):.0%}", end='\r')
+
+    logger.info(f"Async data fetch complete: {delivered}/{len(symbols)} symbols in {time.time() - start_time:.1f}s "
+                f"(final rate {FYERS_RATE_LIMITER.rate:.2f}/s).")
+    if sink is not None:
+        return delivered
+    return pd.concat(all_data, ignore_index=True) if all_data else pd.DataFrame()
+
+
+def fetch_all_data(client_id, access_token, symbols, days=1095, start_dates=None, max_connections=MAX_CONNECTIONS, sink=None):
+    """Synchronous entry point for fetch_all_data_async (runs its own event loop; the sink is called on this thread)."""
+    return asyncio.run(fetch_all_data_async(client_id, access_token, symbols, days, start_dates, max_connections, sink))
@@ -0,0 +1,367 @@
+# In: foundry_reflex/utils/bar_aggregator.py
+
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parent.parent.parent))
+
+import re
+import time
+
+import duckdb
+import numpy as np
+import pandas as pd
+import yaml
+
+from .logger_setup import get_logger
+from .market_data_store import OHLCV_COLUMNS
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+
+logger = get_logger("bar_aggregator", str(PROJECT_ROOT / "logs/pipeline.log"))
+
+TIMEZONE = "Asia/Kolkata"
+
+# Bars are aligned to the NSE session open (09:15 IST = 03:45 UTC), so hourly bars
+# run 09:15-10:15, ... Minute bars of any length that divides 15 align with the clock too.
+SESSION_ORIGIN = pd.Timedelta(hours=3, minutes=45)
+
+# Completed bars are stored in their own DuckDB file, so the live writer never holds a
+# lock on market_data while the engine or the scanner read it.
+INTRADAY_BARS_DDL = (
+    "CREATE TABLE IF NOT EXISTS intraday_bars (Ticker VARCHAR, Timeframe VARCHAR, Timestamp TIMESTAMP, "
+    "Open DOUBLE, High DOUBLE, Low DOUBLE, Close DOUBLE, Volume DOUBLE, PRIMARY KEY (Ticker, Timeframe, Timestamp));"
+)
+
+_TIMEFRAME = re.compile(r'^(\d+)([smhd])$')
+_UNIT_SECONDS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def timeframe_ns(timeframe):
+    """Length of a timeframe like '1m', '5m', '1h' or '30s', in nanoseconds."""
+    match = _TIMEFRAME.match(str(timeframe).strip().lower())
+    if not match or int(match.group(1)) <= 0:
+        raise ValueError(f"Invalid timeframe '{timeframe}' (expected e.g. '1m', '5m', '1h')")
+    return int(match.group(1)) * _UNIT_SECONDS[match.group(2)] * 1_000_000_000
+
+
+def _to_ns(timestamp):
+    """Epoch nanoseconds (UTC) from an int, a datetime64 or a (tz-aware or UTC) timestamp."""
+    if isinstance(timestamp, (int, np.integer)):
+        return int(timestamp)
+    timestamp = pd.Timestamp(timestamp)
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.tz_convert('UTC').tz_localize(None)
+    return int(timestamp.value)
+
+
+class BarRing:
+    """
+    A fixed-capacity ring of completed OHLCV bars for one symbol and timeframe, in
+    preallocated NumPy arrays, plus the bar still forming. Once the ring is full each
+    completed bar overwrites the oldest one, so nothing is allocated per tick; the
+    forming bar is plain Python floats, which are cheaper to update than array cells.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = int(capacity)
+        self.starts = np.zeros(self.capacity, dtype=np.int64)                 # bar open time, epoch ns (UTC)
+        self.values = np.full((self.capacity, len(OHLCV_COLUMNS)), np.nan)  # OHLCV_COLUMNS order
+        self.count = 0              # bars ever completed
+        self.current_start = None   # open time of the newest bar, forming or not
+        self.forming = None         # [open, high, low, close, volume] of the forming bar
+
+    def open_bar(self, start, price, volume):
+        self.current_start = start
+        self.forming = [price, price, price, price, volume]
+
+    def update(self, price, volume):
+        bar = self.forming
+        if price > bar[1]:
+            bar[1] = price
+        if price < bar[2]:
+            bar[2] = price
+        bar[3] = price
+        bar[4] += volume
+
+    def close_bar(self):
+        """Moves the forming bar into the ring and returns it as (start, [o, h, l, c, v])."""
+        row = self.count % self.capacity
+        self.starts[row] = self.current_start
+        self.values[row] = self.forming
+        self.count += 1
+        bar, self.forming = self.forming, None
+        return self.current_start, bar
+
+    def latest(self, n=None, include_forming=True):
+        """The newest `n` bars (default: all held) as (starts, values) copies, oldest first."""
+        forming = include_forming and self.forming is not None
+        held = min(self.count, self.capacity)
+        n = held + forming if n is None else max(0, min(int(n), held + forming))
+        completed = n - forming
+        rows = np.arange(self.count - completed, self.count) % self.capacity
+        starts, values = self.starts[rows], self.values[rows]
+        if forming and n:
+            starts = np.append(starts, self.current_start)
+            values = np.vstack([values, self.forming])
+        return starts, values
+
+
+class TickBarAggregator:
+    """
+    Aggregates a tick stream into OHLCV bars on several timeframes at once.
+
+    Each (symbol, timeframe) keeps its recent bars in a BarRing. A bar completes when
+    the first tick of a later bar arrives (or in complete_elapsed(), when its interval
+    has passed); completed bars are queued and written to DuckDB in batches of
+    `flush_bars`, or at least every `flush_seconds`. Ticks older than the newest bar of
+    a timeframe are counted in `late_ticks` and otherwise ignored.
+
+    Args:
+        timeframes (list): e.g. ['1m', '5m', '15m'].
+        capacity (int): Bars held in memory per symbol and timeframe.
+        db_path: DuckDB file for completed bars (the `intraday_bars` table); None keeps them in memory only.
+        flush_bars (int): Queued completed bars that trigger a write.
+        flush_seconds (float): Longest time a completed bar waits in the queue.
+    """
+
+    def __init__(self, timeframes=('1m', '5m', '15m'), capacity=1000, db_path=None, flush_bars=500,
+                 flush_seconds=5.0, origin=SESSION_ORIGIN):
+        self.timeframes = [(str(tf), timeframe_ns(tf)) for tf in timeframes]
+        self.capacity = capacity
+        self.db_path = Path(db_path) if db_path is not None else None
+        self.flush_bars = flush_bars
+        self.flush_seconds = flush_seconds
+        self.origin_ns = int(pd.Timedelta(origin).value)
+
+        self._rings = {}        # {symbol: [(timeframe, timeframe_ns, BarRing), ...]}
+        self._pending = []      # completed bars not yet written: (symbol, timeframe, start_ns, o, h, l, c, v)
+        self._last_flush = time.monotonic()
+        self.ticks = 0
+        self.late_ticks = 0
+        self.bars_written = 0
+
+    def _symbol_rings(self, symbol):
+        rings = self._rings.get(symbol)
+        if rings is None:
+            rings = [(tf, tf_ns, BarRing(self.capacity)) for tf, tf_ns in self.timeframes]
+            self._rings[symbol] = rings
+        return rings
+
+    def _complete(self, symbol, timeframe, ring):
+        start, bar = ring.close_bar()
+        self._pending.append((symbol, timeframe, start, *bar))
+
+    def on_tick(self, symbol, timestamp, price, volume=0.0):
+        """
+        Adds one trade to every timeframe of the symbol.
+
+        Args:
+            timestamp: Epoch nanoseconds (UTC), or anything pd.Timestamp accepts.
+            price (float): Traded price.
+            volume (float): Quantity traded in this tick (not the day's cumulative volume).
+        """
+        ts = _to_ns(timestamp)
+        price = float(price)
+        volume = float(volume)
+        self.ticks += 1
+        for timeframe, tf_ns, ring in self._symbol_rings(symbol):
+            start = ts - (ts - self.origin_ns) % tf_ns
+            current = ring.current_start
+            if current is not None and (start < current or (start == current and ring.forming is None)):
+                self.late_ticks += 1
+            elif start == current:
+                ring.update(price, volume)
+            else:
+                if ring.forming is not None:
+                    self._complete(symbol, timeframe, ring)
+                ring.open_bar(start, price, volume)
+
+        if len(self._pending) >= self.flush_bars or (
+                self._pending and time.monotonic() - self._last_flush >= self.flush_seconds):
+            self.flush()
+
+    def complete_elapsed(self, now=None):
+        """
+        Completes forming bars whose interval is over by `now` (default: the wall clock),
+        for symbols that stopped ticking. Returns the number of bars completed.
+        """
+        now_ns = _to_ns(pd.Timestamp.now(tz='UTC') if now is None else now)
+        completed = 0
+        for symbol, rings in self._rings.items():
+            for timeframe, tf_ns, ring in rings:
+                if ring.forming is not None and ring.current_start + tf_ns <= now_ns:
+                    self._complete(symbol, timeframe, ring)
+                    completed += 1
+        return completed
+
+    def consume(self, ticks, finalize=True):
+        """
+        Feeds an iterable of (symbol, timestamp, price, volume) ticks, e.g. a ReplayFeed.
+        With `finalize`, the still-forming bars are completed at the end, and everything is flushed.
+        """
+        for symbol, timestamp, price, volume in ticks:
+            self.on_tick(symbol, timestamp, price, volume)
+        if finalize:
+            self.complete_elapsed(now=np.iinfo(np.int64).max)
+        self.flush()
+
+    def flush(self):
+        """Writes the queued completed bars in one batch. Returns the number written."""
+        self._last_flush = time.monotonic()
+        if not self._pending or self.db_path is None:
+            self._pending.clear()
+            return 0
+
+        batch = pd.DataFrame(self._pending, columns=['Ticker', 'Timeframe', 'Timestamp', *OHLCV_COLUMNS])
+        batch['Timestamp'] = pd.to_datetime(batch['Timestamp'], unit='ns')
+        try:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            with duckdb.connect(database=str(self.db_path), read_only=False) as conn:
+                conn.execute(INTRADAY_BARS_DDL)
+                conn.execute("INSERT OR REPLACE INTO intraday_bars BY NAME SELECT * FROM batch;")
+        except duckdb.Error as e:
+            # The bars stay queued and are retried with the next flush
+            logger.error(f"Failed to write {len(batch)} intraday bars to {self.db_path}: {e}")
+            return 0
+
+        self._pending.clear()
+        self.bars_written += len(batch)
+        return len(batch)
+
+    def bars(self, symbol, timeframe, n=None, include_forming=True):
+        """The symbol's newest `n` bars on a timeframe as an OHLCV DataFrame indexed by local (IST) time."""
+        ring = next((r for tf, _, r in self._rings.get(symbol, []) if tf == timeframe), None)
+        if ring is None:
+            return pd.DataFrame(columns=OHLCV_COLUMNS)
+        starts, values = ring.latest(n, include_forming)
+        index = pd.DatetimeIndex(starts.astype('datetime64[ns]'), name='Timestamp').tz_localize('UTC').tz_convert(TIMEZONE)
+        return pd.DataFrame(values, index=index, columns=OHLCV_COLUMNS)
+
+
+class FyersTickAdapter:
+    """
+    Turns Fyers data-socket symbol updates into aggregator ticks. The socket reports
+    the day's cumulative volume, so each tick's volume is the change since the last update.
+    """
+
+    def __init__(self, aggregator):
+        self.aggregator = aggregator
+        self._day_volume = {}
+
+    def on_message(self, message):
+        symbol, price = message.get('symbol'), message.get('ltp')
+        if symbol is None or price is None:
+            return # Not a symbol update (e.g. a connection or subscription message)
+        day_volume = float(message.get('vol_traded_today') or 0.0)
+        previous = self._day_volume.get(symbol)
+        self._day_volume[symbol] = day_volume
+        # First update of the session, or a volume reset: no volume to attribute yet
+        volume = day_volume - previous if previous is not None and day_volume >= previous else 0.0
+        timestamp = message.get('last_traded_time') or message.get('exch_feed_time') or time.time()
+        self.aggregator.on_tick(symbol, int(timestamp) * 1_000_000_000, price, volume)
+
+
+class ReplayFeed:
+    """
+    An offline stand-in for the live tick stream: yields (symbol, epoch ns, price, volume)
+    ticks from recorded data in timestamp order, optionally paced in (scaled) real time.
+
+    Args:
+        ticks (pd.DataFrame): Columns Ticker, Timestamp, Price, Volume.
+        speed (float): None replays as fast as possible; 1.0 in real time, 60.0 a minute per second.
+    """
+
+    def __init__(self, ticks, speed=None):
+        timestamps = pd.to_datetime(ticks['Timestamp'])
+        if timestamps.dt.tz is not None:
+            timestamps = timestamps.dt.tz_convert('UTC').dt.tz_localize(None)
+        order = np.argsort(timestamps.to_numpy(dtype='datetime64[ns]'), kind='stable')
+        self.symbols = ticks['Ticker'].to_numpy(dtype=object)[order]
+        self.timestamps = timestamps.to_numpy(dtype='datetime64[ns]').astype(np.int64)[order]
+        self.prices = ticks['Price'].to_numpy(dtype=np.float64)[order]
+        self.volumes = ticks['Volume'].to_numpy(dtype=np.float64)[order]
+        self.speed = speed
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def __iter__(self):
+        started = time.monotonic()
+        first = self.timestamps[0] if len(self.timestamps) else 0
+        for symbol, ts, price, volume in zip(self.symbols, self.timestamps.tolist(), self.prices.tolist(), self.volumes.tolist()):
+            if self.speed:
+                delay = (ts - first) / 1e9 / self.speed - (time.monotonic() - started)
+                if delay > 0:
+                    time.sleep(delay)
+            yield symbol, ts, price, volume
+
+    @classmethod
+    def from_file(cls, path, speed=None):
+        """Replays a recorded tick file (.parquet or .csv)."""
+        path = Path(path)
+        ticks = pd.read_parquet(path) if path.suffix == '.parquet' else pd.read_csv(path)
+        return cls(ticks, speed)
+
+    @classmethod
+    def from_bars(cls, bars, speed=None):
+        """
+        Replays recorded bars (columns Ticker, Timestamp and OHLCV) as four ticks each:
+        open, then low and high (high first on a down bar), then close, spread evenly over
+        the bar and sharing its volume. Useful to drive the aggregator from intraday history.
+        """
+        bars = bars.sort_values(['Timestamp', 'Ticker'], kind='stable')
+        starts = pd.to_datetime(bars['Timestamp'])
+        if starts.dt.tz is not None:
+            starts = starts.dt.tz_convert('UTC').dt.tz_localize(None)
+        starts = starts.to_numpy(dtype='datetime64[ns]').astype(np.int64)
+        # Bar length per ticker, from the spacing of its bars (one minute if it has a single bar)
+        spacing = pd.Series(starts).groupby(bars['Ticker'].to_numpy()).transform(lambda s: s.diff().min())
+        spacing = spacing.fillna(60e9).to_numpy(dtype=np.float64)
+
+        o, h, l, c = (bars[col].to_numpy(dtype=np.float64) for col in ['Open', 'High', 'Low', 'Close'])
+        down = c < o
+        path = np.stack([o, np.where(down, h, l), np.where(down, l, h), c], axis=1)
+        offsets = (np.arange(4) / 4.0)[None, :] * spacing[:, None]
+        ticks = pd.DataFrame({
+            'Ticker': np.repeat(bars['Ticker'].to_numpy(dtype=object), 4),
+            'Timestamp': (starts[:, None] + offsets.astype(np.int64)).ravel().astype('datetime64[ns]'),
+            'Price': path.ravel(),
+            'Volume': np.repeat(bars['Volume'].to_numpy(dtype=np.float64) / 4.0, 4),
+        })
+        return cls(ticks, speed)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Replay recorded ticks (or bars) through the tick-to-bar aggregator.")
+    parser.add_argument('replay', help="A .parquet or .csv file of ticks (Ticker, Timestamp, Price, Volume) or bars (with --bars).")
+    parser.add_argument('--bars', action='store_true', help="The file holds OHLCV bars; replay each as four ticks.")
+    parser.add_argument('--speed', type=float, default=None, help="Replay speed (1.0 = real time; default: as fast as possible).")
+    parser.add_argument('--db', default=None, help="DuckDB file for completed bars (default: paths.intraday_db in config.yaml).")
+    args = parser.parse_args()
+
+    with open(PROJECT_ROOT / "config.yaml", "r") as f:
+        config = yaml.safe_load(f) or {}
+    settings = config.get("live_bars", {})
+
+    if args.bars:
+        source = pd.read_parquet(args.replay) if args.replay.endswith('.parquet') else pd.read_csv(args.replay)
+        feed = ReplayFeed.from_bars(source, speed=args.speed)
+    else:
+        feed = ReplayFeed.from_file(args.replay, speed=args.speed)
+
+    aggregator = TickBarAggregator(
+        timeframes=settings.get("timeframes", ['1m', '5m', '15m']),
+        capacity=settings.get("capacity", 1000),
+        db_path=args.db or PROJECT_ROOT / config.get("paths", {}).get("intraday_db", "data/intraday.duckdb"),
+        flush_bars=settings.get("flush_bars", 500),
+        flush_seconds=settings.get("flush_seconds", 5.0),
+    )
+    start_time = time.time()
+    aggregator.consume(feed)
+    elapsed = time.time() - start_time
+    logger.info(
+        f"Replayed {aggregator.ticks} ticks in {elapsed:.2f}s ({aggregator.ticks / max(elapsed, 1e-9):,.0f} ticks/s): "
+        f"{aggregator.bars_written} bars written, {aggregator.late_ticks} late ticks ignored."
+    )
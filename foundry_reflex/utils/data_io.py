@@ -7,6 +7,7 @@ import glob
 import duckdb
 import json
 import os
+from .performance_library_store import PerformanceLibraryStore
 
 def load_glossary(path=Path("glossary.yaml")):
     if path.exists():
@@ -28,7 +29,8 @@ def save_universes(path, universes):
 def load_performance_library(path):
     if not path.exists():
         return pd.DataFrame()
-    return pd.read_parquet(path)
+    # The library is an append-only dataset; read() keeps the latest row per job
+    return PerformanceLibraryStore(path).read()
 
 def get_all_known_tickers(db_path):
     if not Path(db_path).exists():
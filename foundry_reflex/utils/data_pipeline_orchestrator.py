@@ -6,9 +6,13 @@ import duckdb
 import yaml
 import tomllib
 import pandas as pd
+from datetime import datetime, timedelta
 from utils.logger_setup import get_logger
 from utils.symbol_resolver import get_symbol_master, resolve_symbols
-from utils.fyers_dataprovider import fetch_all_data_concurrently
+from utils.async_dataprovider import fetch_all_data
+from utils.fyers_dataprovider import configure_fyers_api
+from utils.market_data_ingest import MarketDataWriter
+from utils.pipeline_stages import Stage, StageArtifacts, run_stages
 from utils.regime_filter import calculate_market_regime
 from utils.rs_ranking import calculate_rs_ranking
 
@@ -37,9 +41,24 @@ def setup_database(conn):
     conn.execute("CREATE TABLE IF NOT EXISTS market_regimes (Date DATE PRIMARY KEY, Ticker VARCHAR, Close DOUBLE, SMA DOUBLE, ADX DOUBLE, Regime VARCHAR);")
     conn.execute("CREATE TABLE IF NOT EXISTS rs_rankings (Ticker VARCHAR PRIMARY KEY, Last_Date DATE, Last_Close DOUBLE, RS_Score DOUBLE, RS_Rank DOUBLE);")
     logger.info("Database setup complete.")
-def save_data_to_db(conn, all_market_data_df, regime_df, rankings_df):
-    conn.execute("INSERT OR IGNORE INTO market_data BY NAME SELECT * FROM all_market_data_df;")
-    logger.info(f"Saved {len(all_market_data_df)} raw price records.")
+def get_last_dates(conn, tickers):
+    """Returns {ticker: last stored Date} for the tickers that already have bars."""
+    rows = conn.execute("SELECT Ticker, max(Date) FROM market_data WHERE list_contains(?, Ticker) GROUP BY Ticker;", [list(tickers)]).fetchall()
+    return {ticker: last_date for ticker, last_date in rows}
+def plan_fetch_start_dates(last_dates):
+    """
+    Each stored ticker is fetched from its last stored date: that bar is fetched again
+    (it may have been stored mid-session), and everything after it is new. Tickers
+    without bars aren't in the plan and get the full backfill.
+    """
+    return {ticker: datetime.combine(last_date, datetime.min.time()) for ticker, last_date in last_dates.items()}
+def load_stored_history(conn, tickers, since=None):
+    """Stored bars of the tickers (optionally from a date on), for the intelligence layers."""
+    query = "SELECT Date, Ticker, Open, High, Low, Close, Volume FROM market_data WHERE list_contains(?, Ticker)"
+    params = [list(tickers)]
+    if since is not None: query += " AND Date >= ?"; params.append(since)
+    return conn.execute(query + " ORDER BY Ticker, Date;", params).fetchdf()
+def save_intelligence(conn, regime_df, rankings_df):
     regime_cols = ['Date', 'Ticker', 'Close', 'SMA', f'ADX_14', 'Regime']
     regime_to_save = regime_df.dropna(subset=regime_cols)[regime_cols].rename(columns={f'ADX_14': 'ADX'})
     conn.execute("INSERT OR IGNORE INTO market_regimes BY NAME SELECT * FROM regime_to_save;")
@@ -47,52 +66,102 @@ def save_data_to_db(conn, all_market_data_df, regime_df, rankings_df):
     conn.execute("INSERT INTO rs_rankings BY NAME SELECT * FROM rankings_df ON CONFLICT(Ticker) DO UPDATE SET Last_Date = excluded.Last_Date, Last_Close = excluded.Last_Close, RS_Score = excluded.RS_Score, RS_Rank = excluded.RS_Rank;")
     logger.info(f"Saved/Updated {len(rankings_df)} RS ranking records.")
 
-def run_pipeline():
-    logger.info("--- Starting Foundry Data Pipeline ---")
-    try:
-        config, credentials = load_config(), load_credentials()
-        logger.info("Downloading Fyers symbol master..."); symbol_master_df = get_symbol_master()
+def history_stats(conn, tickers, since=None):
+    """A cheap summary of stored bars (count, last date, close sum) that changes whenever they do."""
+    query = "SELECT count(*), max(Date), sum(Close) FROM market_data WHERE list_contains(?, Ticker)"
+    params = [list(tickers)]
+    if since is not None: query += " AND Date >= ?"; params.append(since)
+    count, last_date, close_sum = conn.execute(query + ";", params).fetchone()
+    return [count, str(last_date), round(close_sum or 0.0, 6)]
+
+# --- Pipeline stages ---
+# resolve -> fetch -> (regime, rs) -> save. regime and rs only read the stored bars, so they run concurrently.
+STAGE_NAMES = ("resolve", "fetch", "regime", "rs", "save")
+RS_HISTORY_DAYS = 400
+def build_stages(config, conn):
+    """Declares the pipeline's stages over one market_data connection (each stage works on its own cursor)."""
+    root = Path(__file__).parent.parent.parent
+    def resolve(_):
+        logger.info("Loading Fyers symbol master...")
+        symbol_master_df = get_symbol_master(root / config['paths'].get('symbol_master', 'data/symbol_master.parquet'), config.get('symbol_master', {}).get('ttl_hours', 24))
         tickers_to_resolve = config['tickers'] + [config['market_index']]
-        
         logger.info(f"Resolving {len(tickers_to_resolve)} configured tickers...");
         # WHAT: The function now returns a dictionary (map).
         # WHY:  This gives us a reliable way to look up tickers.
         resolved_map = resolve_symbols(tickers_to_resolve, symbol_master_df)
-        
         if not resolved_map: raise RuntimeError("Symbol resolution failed.")
-        
-        # WHAT: We get the list of tickers to fetch from the dictionary's values.
-        # WHY:  This is the correct way to use our new map.
-        tickers_to_fetch = list(resolved_map.values())
-        all_market_data_df = fetch_all_data_concurrently(client_id=credentials['client_id'], access_token=credentials['access_token'], symbols=tickers_to_fetch, days=1095)
-        
-        if all_market_data_df.empty: raise RuntimeError("Data fetch returned no data.")
-        
-        logger.info("Calculating Intelligence Layers...");
-        
         # WHAT: We look up the index ticker directly from our map using the original config key.
         # WHY:  This is the definitive fix for the crash. It's 100% reliable.
         resolved_index_name = resolved_map.get(config['market_index'])
-        
         if not resolved_index_name: raise RuntimeError("Could not find the resolved Nifty 50 index ticker in the map.")
-        
-        index_df = all_market_data_df[all_market_data_df['Ticker'] == resolved_index_name].copy()
-        regime_df = calculate_market_regime(index_df)
-        
-        stock_df = all_market_data_df[all_market_data_df['Ticker'] != resolved_index_name].copy()
-        rankings_df = calculate_rs_ranking(stock_df)
-        
-        logger.info("Intelligence calculated.")
-        logger.info("Connecting to database and saving all data...")
-        db_path = Path(config['database']['market_data_path'])
+        return {"resolved_map": resolved_map, "index_ticker": resolved_index_name}
+    def tickers(inputs): return list(inputs["resolve"]["resolved_map"].values())
+    def stock_tickers(inputs): return [t for t in tickers(inputs) if t != inputs["resolve"]["index_ticker"]]
+    def rs_since(): return (datetime.now() - timedelta(days=RS_HISTORY_DAYS)).date()
+    def fetch(inputs):
+        credentials = load_credentials(); configure_fyers_api(config.get('fyers_api'))
+        tickers_to_fetch = tickers(inputs)
+        with conn.cursor() as cur:
+            # WHAT: Only the bars missing from market_data are requested.
+            # WHY:  A daily refresh then needs about one API call per ticker instead of a 1095-day re-download.
+            start_dates = plan_fetch_start_dates(get_last_dates(cur, tickers_to_fetch))
+            logger.info(f"{len(start_dates)} tickers already stored (incremental fetch), {len(tickers_to_fetch) - len(start_dates)} new (full backfill).")
+            # WHAT: Each ticker's bars are written in batches as they arrive, not collected and saved at the end.
+            # WHY:  Memory stays flat with the universe's size, and a later failure keeps what was already fetched.
+            with MarketDataWriter(cur) as writer:
+                fetched = fetch_all_data(client_id=credentials['client_id'], access_token=credentials['access_token'], symbols=tickers_to_fetch, days=1095, start_dates=start_dates, sink=writer.write)
+            if writer.rows_written == 0 and not start_dates: raise RuntimeError("Data fetch returned no data.")
+            logger.info(f"Fetched {writer.rows_written} bars of {fetched}/{len(tickers_to_fetch)} tickers.")
+            # The stored state, not the run's counts: an unchanged refresh leaves the later stages' inputs unchanged
+            return {ticker: str(last_date) for ticker, last_date in sorted(get_last_dates(cur, tickers_to_fetch).items())}
+    # WHAT: The intelligence layers are computed from the stored history, not the fetch.
+    # WHY:  An incremental fetch only holds the newest bars; the indicators need the full lookback.
+    def regime(inputs):
+        with conn.cursor() as cur: index_df = load_stored_history(cur, [inputs["resolve"]["index_ticker"]])
+        return calculate_market_regime(index_df)
+    def regime_fingerprint(inputs):
+        with conn.cursor() as cur: return history_stats(cur, [inputs["resolve"]["index_ticker"]])
+    def rs(inputs):
+        with conn.cursor() as cur: stock_df = load_stored_history(cur, stock_tickers(inputs), since=rs_since())
+        return calculate_rs_ranking(stock_df)
+    def rs_fingerprint(inputs):
+        with conn.cursor() as cur: return [str(rs_since()), history_stats(cur, stock_tickers(inputs), since=rs_since())]
+    def save(inputs):
+        with conn.cursor() as cur: save_intelligence(cur, inputs["regime"], inputs["rs"])
+        return {"regime_rows": len(inputs["regime"]), "rankings": len(inputs["rs"])}
+    return [
+        Stage("resolve", resolve),
+        # Always runs: it is incremental (about one request per ticker), re-fetches the possibly mid-session
+        # last bar and retries tickers a failed run dropped. The stages after it see what changed through history_stats.
+        Stage("fetch", fetch, deps=("resolve",)),
+        Stage("regime", regime, deps=("resolve", "fetch"), fingerprint=regime_fingerprint),
+        Stage("rs", rs, deps=("resolve", "fetch"), fingerprint=rs_fingerprint),
+        Stage("save", save, deps=("regime", "rs"), fingerprint=lambda inputs: None),
+    ]
+
+def run_pipeline(from_stage=None):
+    """
+    Runs the pipeline stages. Each stage's output is kept in paths.pipeline_artifacts and
+    reused while its inputs are unchanged; `from_stage` re-runs that stage and those after it.
+    """
+    logger.info(f"--- Starting Foundry Data Pipeline{f' from stage {from_stage!r}' if from_stage else ''} ---")
+    try:
+        config = load_config()
+        root = Path(__file__).parent.parent.parent
+        # WHAT: One connection for the whole run; the fetch stage is its only writer to market_data.
+        db_path = root / config['paths']['market_data_db']
         db_path.parent.mkdir(parents=True, exist_ok=True)
+        artifacts = StageArtifacts(root / config['paths'].get('pipeline_artifacts', 'data/pipeline_artifacts'))
         with duckdb.connect(database=str(db_path), read_only=False) as conn:
             setup_database(conn)
-            save_data_to_db(conn, all_market_data_df, regime_df, rankings_df)
-            
+            run_stages(build_stages(config, conn), artifacts, from_stage=from_stage)
         logger.info("--- Foundry Data Pipeline Finished Successfully ---")
     except Exception as e:
         logger.critical("--- PIPELINE FAILED ---", exc_info=True)
 
 if __name__ == "__main__":
-    run_pipeline()
\ No newline at end of file
+    import argparse
+    parser = argparse.ArgumentParser(description="Foundry data pipeline: resolve -> fetch -> regime + RS ranking -> save.")
+    parser.add_argument('--from-stage', choices=STAGE_NAMES, help="Re-run this stage and every stage after it, reusing the stored outputs of those before it (e.g. 'regime' to redo the analysis without refetching).")
+    args = parser.parse_args()
+    run_pipeline(from_stage=args.from_stage)
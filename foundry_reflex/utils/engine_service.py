@@ -0,0 +1,208 @@
+# In: foundry_reflex/utils/engine_service.py
+
+import logging
+import multiprocessing
+import os
+import threading
+from multiprocessing.connection import Client, Listener
+from pathlib import Path
+
+import yaml
+
+from .logger_setup import get_logger
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 6010
+AUTHKEY_ENV = "FOUNDRY_ENGINE_AUTHKEY"
+# The service's key when AUTHKEY_ENV is unset: random, created on first start with mode 0600
+AUTHKEY_FILE = PROJECT_ROOT / "data/engine_service.key"
+
+logger = get_logger("engine_service", str(PROJECT_ROOT / "logs/engine_service.log"))
+
+
+def service_address():
+    """The service's (host, port), from the optional `engine_service` section of config.yaml."""
+    try:
+        with open(PROJECT_ROOT / "config.yaml", "r") as f:
+            section = (yaml.safe_load(f) or {}).get("engine_service") or {}
+    except FileNotFoundError:
+        section = {}
+    return section.get("host", DEFAULT_HOST), int(section.get("port", DEFAULT_PORT))
+
+
+def _authkey(create=False):
+    """
+    The key clients and the service authenticate with: FOUNDRY_ENGINE_AUTHKEY if set,
+    otherwise the random key in AUTHKEY_FILE. With `create` (the service), the file is
+    generated on first start, readable by the current user only. Returns None if there
+    is no key yet (no service has ever started).
+    """
+    if os.environ.get(AUTHKEY_ENV):
+        return os.environ[AUTHKEY_ENV].encode("utf-8")
+    try:
+        return AUTHKEY_FILE.read_bytes()
+    except FileNotFoundError:
+        if not create:
+            return None
+    AUTHKEY_FILE.parent.mkdir(parents=True, exist_ok=True)
+    key = os.urandom(32)
+    try:
+        fd = os.open(AUTHKEY_FILE, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError: # Another service created it first
+        return AUTHKEY_FILE.read_bytes()
+    with os.fdopen(fd, "wb") as f:
+        f.write(key)
+    logger.info(f"Generated a new engine service key in {AUTHKEY_FILE}")
+    return key
+
+
+# --- Client API (cheap to import: no pandas/backtesting/duckdb) ---
+
+def connect(address=None):
+    """Opens a connection to a running engine service. Returns None if no service is listening."""
+    authkey = _authkey()
+    if authkey is None:
+        return None
+    try:
+        return Client(address or service_address(), authkey=authkey)
+    except (OSError, multiprocessing.AuthenticationError):
+        return None
+
+
+def submit(conn, request):
+    """
+    Sends one request to the service. The service then streams back
+    {'type': 'log', 'message': str} messages and a final
+    {'type': 'done', 'status': 'ok' | 'error', 'error': str}.
+
+    Requests:
+        {'action': 'ping'}
+        {'action': 'run', 'stocks': [...] or 'universe': name, 'strategies': [...],
+         'mode': 'update', 'job_mode': 'symbol', 'execution': 'vectorized',
+         'walk_forward': {'train_bars': .., 'test_bars': .., 'step_bars': ..} (optional)}
+        {'action': 'resume', 'run_id': None, 'retry_failed': False}
+    """
+    conn.send(request)
+
+
+# --- Service ---
+
+class _ConnectionLogHandler(logging.Handler):
+    """Forwards the engine's log records to the client that submitted the run."""
+
+    def __init__(self, conn):
+        super().__init__(level=logging.INFO)
+        self.conn = conn
+        self.setFormatter(logging.Formatter("[%(levelname)s] [%(name)s] %(message)s"))
+
+    def emit(self, record):
+        try:
+            self.conn.send({"type": "log", "message": self.format(record)})
+        except Exception:
+            pass # The client went away; the run itself carries on
+
+
+class EngineService:
+    """
+    A long-lived engine process with a warm worker pool.
+
+    The engine's imports are paid once at start-up and the pool is reused by every
+    run, so a small ad-hoc run only costs its own work. Requests arrive over a local
+    authenticated socket; runs are executed one at a time, in arrival order.
+    """
+
+    def __init__(self, address=None, processes=None):
+        # Imported here so clients of this module don't pay for the engine's dependencies
+        from . import performance_library_engine
+        self.engine = performance_library_engine
+        self.address = address or service_address()
+        # Use slightly less than all cores to keep system responsive
+        self.pool = multiprocessing.Pool(processes or max(1, multiprocessing.cpu_count() - 1))
+        self._run_lock = threading.Lock()
+
+    def serve_forever(self):
+        with Listener(self.address, authkey=_authkey(create=True)) as listener:
+            logger.info(f"Engine service listening on {self.address[0]}:{self.address[1]}")
+            while True:
+                try:
+                    conn = listener.accept()
+                except (OSError, multiprocessing.AuthenticationError) as e:
+                    logger.warning(f"Rejected engine service connection: {e}")
+                    continue
+                threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def close(self):
+        self.pool.terminate()
+        self.pool.join()
+
+    def _handle(self, conn):
+        with conn:
+            try:
+                request = conn.recv()
+            except EOFError:
+                return
+
+            if request.get("action") == "ping":
+                conn.send({"type": "done", "status": "ok"})
+                return
+
+            if not self._run_lock.acquire(blocking=False):
+                conn.send({"type": "log", "message": "Another engine run is in progress; queued behind it."})
+                self._run_lock.acquire()
+
+            handler = _ConnectionLogHandler(conn)
+            root = logging.getLogger()
+            root.addHandler(handler)
+            try:
+                self._run_request(request)
+                reply = {"type": "done", "status": "ok"}
+            except Exception as e:
+                logger.error(f"Engine service request failed: {e}", exc_info=True)
+                reply = {"type": "done", "status": "error", "error": str(e)}
+            finally:
+                root.removeHandler(handler)
+                self._run_lock.release()
+
+            try:
+                conn.send(reply)
+            except OSError:
+                pass
+
+    def _run_request(self, request):
+        action = request.get("action")
+        PerformanceEngine = self.engine.PerformanceEngine
+
+        if action == "resume":
+            PerformanceEngine.resume(run_id=request.get("run_id"), retry_failed=request.get("retry_failed", False), pool=self.pool)
+        elif action == "run":
+            stocks = request.get("stocks") or self.engine.load_universe_symbols(request["universe"])
+            engine = PerformanceEngine(stocks, request["strategies"], pool=self.pool)
+            execution = request.get("execution", "vectorized")
+            if request.get("walk_forward"):
+                engine.run_walk_forward(execution=execution, **request["walk_forward"])
+            else:
+                engine.run(mode=request.get("mode", "update"), job_mode=request.get("job_mode", "symbol"), execution=execution)
+        else:
+            raise ValueError(f"Unknown engine service action: '{action}'")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Foundry Engine Service (warm worker pool)")
+    parser.add_argument("--processes", type=int, default=None, help="Worker processes (default: CPU count - 1).")
+    args = parser.parse_args()
+
+    # The engine resolves config.yaml and its data paths relative to the project root
+    os.chdir(PROJECT_ROOT)
+    # The engine logs progress through the root logger; let INFO through to the client handler
+    logging.getLogger().setLevel(logging.INFO)
+
+    service = EngineService(processes=args.processes)
+    try:
+        service.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Engine service stopped.")
+    finally:
+        service.close()
@@ -1,20 +1,49 @@
+import numpy as np
 import pandas as pd
+import pyarrow as pa
 import requests
 from datetime import datetime, timedelta
 import time
 import threading
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import asyncio
+import heapq
+import random
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from .logger_setup import get_logger
 
 logger = get_logger("fyers_dataprovider", "logs/pipeline.log")
 
 class FyersRateLimiter:
-    def __init__(self, sec_rate=9.0, sec_cap=10.0):
+    """
+    A token bucket shared by every Fyers request in the process, from threads
+    (wait_for_token) and from asyncio tasks (acquire) alike. Callers queue in FIFO
+    order; only the one at the head sleeps, for exactly as long as its token takes to
+    refill at the current rate, then hands the head to the next. Nobody polls, and a
+    rate change applies from the next token on.
+
+    The rate adapts: a throttling response (throttled) halves it, down to `min_rate`,
+    and each success (succeeded) wins back a little of it, up to the configured rate.
+    """
+    THROTTLE_FACTOR = 0.5          # Rate multiplier on a throttling response
+    THROTTLE_HOLDOFF_SECONDS = 1.0 # Throttles this close together are one event (requests in flight all fail together)
+    RECOVERY_FRACTION = 0.02       # Share of the configured rate regained per success
+    def __init__(self, sec_rate=9.0, sec_cap=10.0, min_rate=1.0):
         self.bucket = {
-            "rate": sec_rate, "capacity": sec_cap, "tokens": sec_cap,
+            "rate": sec_rate, "max_rate": sec_rate, "min_rate": min_rate, "capacity": sec_cap, "tokens": sec_cap,
             "lock": threading.Lock(), # The lock is the key to thread safety
-            "last_refill": time.monotonic()
+            "last_refill": time.monotonic(), "last_throttle": float("-inf")
         }
+        self.waiters = deque() # Tickets of queued callers: threading.Event or asyncio.Future; the head may take tokens
+    def configure(self, sec_rate=None, sec_cap=None, min_rate=None):
+        """Sets the budget, e.g. from the `fyers_api` section of config.yaml; the adapted rate restarts at the new maximum."""
+        with self.bucket["lock"]:
+            self._refill()
+            if sec_rate is not None: self.bucket["rate"] = self.bucket["max_rate"] = float(sec_rate)
+            if sec_cap is not None: self.bucket["capacity"] = float(sec_cap); self.bucket["tokens"] = min(self.bucket["tokens"], self.bucket["capacity"])
+            if min_rate is not None: self.bucket["min_rate"] = float(min_rate)
+    @property
+    def rate(self): return self.bucket["rate"]
     def _refill(self):
         now = time.monotonic()
         elapsed = now - self.bucket["last_refill"]
@@ -22,52 +51,211 @@ class FyersRateLimiter:
             new_tokens = elapsed * self.bucket["rate"]
             self.bucket["tokens"] = min(self.bucket["capacity"], self.bucket["tokens"] + new_tokens)
             self.bucket["last_refill"] = now
+    # WHAT: The lock guards the bucket and the queue. Only one caller can be inside these blocks at a time.
+    # WHY:  This makes check-and-take and queue hand-offs atomic; it is held for microseconds, never while waiting.
+    def _join(self, ticket):
+        """Queues a caller. Returns True if it must wait for its ticket, False if it is already the head."""
+        with self.bucket["lock"]:
+            self.waiters.append(ticket)
+            return len(self.waiters) > 1
+    def _take(self):
+        """The head takes a token. Returns 0, or the seconds until one has refilled at the current rate."""
+        with self.bucket["lock"]:
+            self._refill()
+            if self.bucket["tokens"] >= 1: self.bucket["tokens"] -= 1; return 0.0
+            return (1 - self.bucket["tokens"]) / self.bucket["rate"]
+    def _leave(self, ticket):
+        """Removes a caller from the queue; if it was the head, wakes the next one."""
+        with self.bucket["lock"]:
+            if not self.waiters or self.waiters[0] is not ticket:
+                if ticket in self.waiters: self.waiters.remove(ticket) # Cancelled while queued
+                return
+            self.waiters.popleft()
+            if not self.waiters: return
+            head = self.waiters[0]
+        if isinstance(head, threading.Event): head.set()
+        else: head.get_loop().call_soon_threadsafe(lambda: head.done() or head.set_result(None))
     def wait_for_token(self):
-        while True:
-            # WHAT: The lock is acquired here. Only one thread can be inside this block at a time.
-            # WHY: This makes the check-and-take operation atomic and solves the race condition.
-            with self.bucket["lock"]:
-                self._refill()
-                if self.bucket["tokens"] >= 1:
-                    self.bucket["tokens"] -= 1
-                    return # A token was successfully consumed
-            # If no token was available, the thread waits outside the lock
-            time.sleep(0.05) 
+        ticket = threading.Event()
+        if self._join(ticket): ticket.wait()
+        try:
+            while (delay := self._take()) > 0: time.sleep(delay)
+        finally: self._leave(ticket)
+    async def acquire(self):
+        ticket = asyncio.get_running_loop().create_future()
+        if self._join(ticket):
+            try: await ticket
+            except asyncio.CancelledError: self._leave(ticket); raise
+        try:
+            while (delay := self._take()) > 0: await asyncio.sleep(delay)
+        finally: self._leave(ticket)
+    def throttled(self):
+        """Backs off after a throttling (HTTP 429) response: the rate is cut and the burst dropped."""
+        with self.bucket["lock"]:
+            now = time.monotonic()
+            if now - self.bucket["last_throttle"] < self.THROTTLE_HOLDOFF_SECONDS: return
+            self._refill()
+            self.bucket["last_throttle"] = now
+            self.bucket["rate"] = max(self.bucket["min_rate"], self.bucket["rate"] * self.THROTTLE_FACTOR)
+            self.bucket["tokens"] = min(self.bucket["tokens"], 0.0)
+            logger.warning(f"Fyers API throttling; request rate lowered to {self.bucket['rate']:.2f}/s.")
+    def succeeded(self):
+        """Recovers the rate after a throttle, a little per successful request."""
+        if self.bucket["rate"] >= self.bucket["max_rate"]: return # Unlocked fast path: nothing to recover
+        with self.bucket["lock"]:
+            self._refill()
+            self.bucket["rate"] = min(self.bucket["max_rate"], self.bucket["rate"] + self.bucket["max_rate"] * self.RECOVERY_FRACTION)
 
 FYERS_RATE_LIMITER = FyersRateLimiter()
 
-def fetch_data_chunk(symbol, access_token, client_id, date_from, date_to):
-    FYERS_RATE_LIMITER.wait_for_token()
-    api_url = "https://api-t1.fyers.in/data/history"
-    headers = {'Authorization': f'{client_id}:{access_token}'}
-    params = {"symbol": symbol, "resolution": "D", "date_format": "1", "range_from": date_from.strftime('%Y-%m-%d'), "range_to": date_to.strftime('%Y-%m-%d'), "cont_flag": "1"}
-    try:
-        response = requests.get(url=api_url, headers=headers, params=params)
-        response.raise_for_status()
-        data = response.json()
-        if data.get("s") == "ok" and data.get('candles'): return data['candles']
-        logger.warning(f"API non-ok for {symbol} chunk. Msg: {data.get('message', 'N/A')}")
-        return []
-    except requests.exceptions.RequestException as e:
-        logger.error(f"HTTP chunk request failed for {symbol}: {e}"); return []
-def get_historical_data_stitched(symbol, access_token, client_id, total_days=1095):
-    all_candles = []; end_date = datetime.now(); chunk_size_days = 360
-    for days_ago in range(0, total_days, chunk_size_days):
-        range_to = end_date - timedelta(days=days_ago); range_from = range_to - timedelta(days=chunk_size_days)
-        candles = fetch_data_chunk(symbol, access_token, client_id, range_from, range_to)
-        if candles: all_candles.extend(candles)
+# --- Retries ---
+# A failed chunk is retried up to max_retries times, each after a random ("full jitter")
+# delay of up to base_seconds * 2**attempt, capped at max_seconds.
+RETRY_POLICY = {"max_retries": 4, "base_seconds": 1.0, "max_seconds": 30.0}
+class RetryableFetchError(Exception):
+    """A history request failed in a way worth retrying (throttling, server error, network error)."""
+def configure_fyers_api(settings):
+    """Applies the `fyers_api` section of config.yaml to the shared rate limiter and retry policy."""
+    settings = settings or {}
+    FYERS_RATE_LIMITER.configure(settings.get("requests_per_second"), settings.get("burst"), settings.get("min_requests_per_second"))
+    for key, config_key in (("max_retries", "max_retries"), ("base_seconds", "retry_base_seconds"), ("max_seconds", "retry_max_seconds")):
+        if settings.get(config_key) is not None: RETRY_POLICY[key] = settings[config_key]
+def retry_delay(attempt):
+    return random.uniform(0, min(RETRY_POLICY["max_seconds"], RETRY_POLICY["base_seconds"] * 2 ** attempt))
+def retry_queue(tasks, max_workers=5, transient=(RetryableFetchError,), describe=str):
+    """
+    Runs {key: callable} on a thread pool, yielding (key, result) as each one finishes; result is
+    None for a task that still failed after RETRY_POLICY's retries. A task raising one of
+    `transient` is not slept on in its worker: it goes back on the queue with a not-before time
+    (its jittered backoff), like the async fetcher does, so the pool keeps serving other requests
+    meanwhile. Any other exception propagates.
+    """
+    ready = deque((key, 0) for key in tasks); backing_off = []; running = {}; seq = 0 # seq breaks not-before ties without comparing keys
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while ready or backing_off or running:
+            while backing_off and backing_off[0][0] <= time.monotonic():
+                _, _, key, attempt = heapq.heappop(backing_off); ready.append((key, attempt))
+            while ready and len(running) < max_workers:
+                key, attempt = ready.popleft(); running[executor.submit(tasks[key])] = (key, attempt)
+            timeout = max(0.0, backing_off[0][0] - time.monotonic()) if backing_off else None
+            if not running: time.sleep(timeout); continue # Everything left is backing off
+            done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                key, attempt = running.pop(future)
+                try: result = future.result()
+                except transient as e:
+                    if attempt == RETRY_POLICY["max_retries"]: logger.error(f"Request for {describe(key)} failed after {attempt + 1} attempts: {e}"); yield key, None; continue
+                    delay = retry_delay(attempt); logger.info(f"Retrying {describe(key)} in {delay:.1f}s ({e}).")
+                    heapq.heappush(backing_off, (time.monotonic() + delay, seq, key, attempt + 1)); seq += 1; continue
+                yield key, result
+def parse_history_response(status, data):
+    """
+    Candles from a history response: a list (empty if the range has no data), or None
+    for a permanent failure. Throttling, server errors and rate-limit codes raise
+    RetryableFetchError after telling the rate limiter.
+    """
+    code = data.get("code") if isinstance(data, dict) else None
+    if status == 429 or code == 429:
+        FYERS_RATE_LIMITER.throttled(); raise RetryableFetchError(f"throttled (HTTP {status})")
+    if status >= 500: raise RetryableFetchError(f"server error HTTP {status}")
+    if status >= 400 or not isinstance(data, dict): return None
+    FYERS_RATE_LIMITER.succeeded()
+    if data.get("s") == "ok": return data.get('candles') or []
+    if data.get("s") == "no_data": return []
+    return None
+
+FYERS_HISTORY_URL = "https://api-t1.fyers.in/data/history"
+def history_params(symbol, date_from, date_to):
+    return {"symbol": symbol, "resolution": "D", "date_format": "1", "range_from": date_from.strftime('%Y-%m-%d'), "range_to": date_to.strftime('%Y-%m-%d'), "cont_flag": "1"}
+def date_chunks(date_from, date_to, chunk_size_days=360):
+    """(range_from, range_to) pairs covering `date_from`..`date_to` (inclusive), newest first."""
+    chunks = []; range_to = date_to
+    while range_to.date() >= date_from.date():
+        range_from = max(date_from, range_to - timedelta(days=chunk_size_days - 1))
+        chunks.append((range_from, range_to)); range_to = range_from - timedelta(days=1)
+    return chunks
+def candles_to_frame(symbol, all_candles):
+    """Daily candles ([epoch, o, h, l, c, v] lists) as market_data rows, or None if there are none."""
     if not all_candles: return None
     df = pd.DataFrame(all_candles, columns=['Timestamp', 'Open', 'High', 'Low', 'Close', 'Volume'])
     df.drop_duplicates(subset='Timestamp', inplace=True); df['Date'] = pd.to_datetime(df['Timestamp'], unit='s').dt.date
     df['Ticker'] = symbol; df.sort_values(by='Date', inplace=True)
     return df[['Date', 'Ticker', 'Open', 'High', 'Low', 'Close', 'Volume']]
-def fetch_all_data_concurrently(client_id, access_token, symbols, days=1095, max_workers=5):
-    all_data = []; logger.info(f"Fetching {days} days of data for {len(symbols)} symbols...")
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        futures = {executor.submit(get_historical_data_stitched, s, access_token, client_id, days): s for s in symbols}
-        for i, future in enumerate(as_completed(futures)):
-            result_df = future.result()
-            if result_df is not None: all_data.append(result_df)
-            print(f"  -> Progress: {(i + 1) / len(symbols):.0%}", end='\r')
+MARKET_DATA_SCHEMA = pa.schema([('Date', pa.date32()), ('Ticker', pa.string()), ('Open', pa.float64()), ('High', pa.float64()), ('Low', pa.float64()), ('Close', pa.float64()), ('Volume', pa.int64())])
+def candles_to_table(symbol, all_candles):
+    """candles_to_frame as a pyarrow.Table in MARKET_DATA_SCHEMA, built from one candle array with no DataFrame."""
+    if not all_candles: return None
+    candles = np.asarray(all_candles, dtype=np.float64)
+    timestamps, first = np.unique(candles[:, 0].astype(np.int64), return_index=True) # Deduplicated and in date order
+    candles = candles[first]
+    return pa.Table.from_arrays([
+        pa.array(timestamps // 86400, pa.int32()).cast(pa.date32()), pa.repeat(pa.scalar(symbol, pa.string()), len(candles)),
+        pa.array(candles[:, 1]), pa.array(candles[:, 2]), pa.array(candles[:, 3]), pa.array(candles[:, 4]), pa.array(candles[:, 5].astype(np.int64))
+    ], schema=MARKET_DATA_SCHEMA)
+def _request_chunk(symbol, access_token, client_id, date_from, date_to):
+    FYERS_RATE_LIMITER.wait_for_token()
+    headers = {'Authorization': f'{client_id}:{access_token}'}
+    try:
+        response = requests.get(url=FYERS_HISTORY_URL, headers=headers, params=history_params(symbol, date_from, date_to), timeout=30)
+    except requests.exceptions.RequestException as e: raise RetryableFetchError(str(e)) from e
+    try: data = response.json()
+    except ValueError: data = None
+    candles = parse_history_response(response.status_code, data)
+    if candles is None: logger.warning(f"API non-ok for {symbol} chunk (HTTP {response.status_code}). Msg: {data.get('message', 'N/A') if isinstance(data, dict) else 'N/A'}")
+    return candles
+def _describe_chunk(chunk):
+    symbol, range_from, range_to = chunk
+    return f"{symbol} chunk {range_from:%Y-%m-%d}..{range_to:%Y-%m-%d}"
+def _chunk_tasks(chunks, access_token, client_id):
+    return {chunk: (lambda chunk=chunk: _request_chunk(chunk[0], access_token, client_id, chunk[1], chunk[2])) for chunk in chunks}
+def fetch_data_chunk(symbol, access_token, client_id, date_from, date_to):
+    """
+    One chunk of daily candles, retried with jittered backoff on throttling and transient
+    errors. Returns the candles (possibly none), or None if the chunk could not be fetched.
+    Blocks the calling thread during backoffs; many chunks go through retry_queue instead.
+    """
+    chunk = (symbol, date_from, date_to)
+    return next(retry_queue(_chunk_tasks([chunk], access_token, client_id), max_workers=1, describe=_describe_chunk))[1]
+def _assemble(symbol, chunks, results, as_arrow):
+    """A symbol's bars from its chunks' candles, or None (after logging why) if any chunk failed."""
+    for chunk in chunks:
+        if results[chunk] is None: logger.error(f"Dropping {symbol}: {_describe_chunk(chunk)} could not be fetched."); return None
+    all_candles = [candle for chunk in chunks for candle in results[chunk]]
+    return candles_to_table(symbol, all_candles) if as_arrow else candles_to_frame(symbol, all_candles)
+def get_historical_data_range(symbol, access_token, client_id, date_from, date_to, chunk_size_days=360, as_arrow=False, max_workers=1):
+    """
+    Daily bars from `date_from` to `date_to` (inclusive), in as few chunked requests as the range needs,
+    as a DataFrame or (`as_arrow`) a pyarrow.Table. Returns None if any chunk failed: a partial range
+    would leave a gap behind the stored last date.
+    """
+    chunks = [(symbol, range_from, range_to) for range_from, range_to in date_chunks(date_from, date_to, chunk_size_days)]
+    results = dict(retry_queue(_chunk_tasks(chunks, access_token, client_id), max_workers, describe=_describe_chunk))
+    return _assemble(symbol, chunks, results, as_arrow)
+def get_historical_data_stitched(symbol, access_token, client_id, total_days=1095):
+    end_date = datetime.now()
+    return get_historical_data_range(symbol, access_token, client_id, end_date - timedelta(days=total_days), end_date)
+def fetch_all_data_concurrently(client_id, access_token, symbols, days=1095, max_workers=5, start_dates=None, sink=None):
+    """
+    Fetches daily bars for many symbols. Each symbol's range starts at its entry in
+    `start_dates` ({symbol: datetime}, e.g. its last stored date) or, without one, `days` ago.
+    Every chunk of every symbol is one job on the retry queue, so a chunk backing off never
+    holds a worker. With a `sink`, each symbol's bars are passed to it as a pyarrow.Table as soon as they
+    arrive and the number of symbols delivered is returned, instead of one combined DataFrame.
+    """
+    all_data = []; delivered = 0; start_dates = start_dates or {}; end_date = datetime.now(); default_start = end_date - timedelta(days=days)
+    logger.info(f"Fetching data for {len(symbols)} symbols ({len(symbols) - len(start_dates)} full {days}-day backfills)...")
+    symbol_chunks = {s: [(s, range_from, range_to) for range_from, range_to in date_chunks(start_dates.get(s, default_start), end_date)] for s in symbols}
+    tasks = _chunk_tasks([chunk for chunks in symbol_chunks.values() for chunk in chunks], access_token, client_id)
+    results = {}; remaining = {s: len(chunks) for s, chunks in symbol_chunks.items()}; finished = sum(1 for chunks in symbol_chunks.values() if not chunks)
+    for chunk, candles in retry_queue(tasks, max_workers, describe=_describe_chunk):
+        symbol = chunk[0]; results[chunk] = candles; remaining[symbol] -= 1
+        if remaining[symbol]: continue
+        result = _assemble(symbol, symbol_chunks[symbol], results, as_arrow=sink is not None)
+        for c in symbol_chunks[symbol]: del results[c] # Only symbols still in flight are held
+        if result is not None:
+            if sink is not None: sink(result); delivered += 1
+            else: all_data.append(result)
+        finished += 1; print(f"  -> Progress: {finished / len(symbols):.0%}", end='\r')
     logger.info("Concurrent data fetch complete.")
-    return pd.concat(all_data, ignore_index=True) if all_data else pd.DataFrame()
\ No newline at end of file
+    if sink is not None: return delivered
+    return pd.concat(all_data, ignore_index=True) if all_data else pd.DataFrame()
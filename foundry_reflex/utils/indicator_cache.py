@@ -0,0 +1,103 @@
+# In: foundry_reflex/utils/indicator_cache.py
+
+import hashlib
+import os
+import re
+import uuid
+from pathlib import Path
+
+import numpy as np
+
+# Part of every key: bump it when an indicator's implementation changes, so old values are never served.
+CACHE_VERSION = 1
+
+
+class IndicatorCache:
+    """
+    A persistent, size-bounded cache of computed indicator arrays, shared by every
+    engine run and every pool worker.
+
+    Each entry is one `.npy` file keyed by (ticker, data fingerprint, indicator), so
+    a value is reused until the ticker's bars change. Entries are written under a
+    temporary name and renamed, so concurrent readers never see a partial file, and
+    are read back as read-only memory maps. A hit refreshes the file's mtime; evict()
+    removes the least recently used files once the cache grows past `max_bytes`.
+    """
+    SUFFIX = ".npy"
+
+    def __init__(self, cache_dir, max_bytes=1024 * 1024 * 1024):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def key(ticker, fingerprint, indicator_str):
+        """The entry name for an indicator; 'sma( 50)' and 'SMA(50)' share one entry."""
+        indicator = re.sub(r'\s+', '', indicator_str).upper()
+        raw = f"{CACHE_VERSION}|{ticker}|{fingerprint}|{indicator}"
+        return hashlib.blake2b(raw.encode('utf-8'), digest_size=16).hexdigest()
+
+    def _path(self, ticker, fingerprint, indicator_str):
+        key = self.key(ticker, fingerprint, indicator_str)
+        # Two-character fan-out keeps directories small on big universes
+        return self.cache_dir / key[:2] / f"{key}{self.SUFFIX}"
+
+    def get(self, ticker, fingerprint, indicator_str):
+        """Returns the cached array as a read-only memory map, or None on a miss."""
+        path = self._path(ticker, fingerprint, indicator_str)
+        try:
+            values = np.load(path, mmap_mode='r')
+            os.utime(path) # Mark as recently used for eviction
+        except (OSError, ValueError):
+            return None # Missing, evicted meanwhile, or unreadable: recompute it
+        return values
+
+    def put(self, ticker, fingerprint, indicator_str, values):
+        """Stores an array atomically. Losing a race to another worker writing the same entry is harmless."""
+        path = self._path(ticker, fingerprint, indicator_str)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}-{uuid.uuid4().hex[:8]}.tmp")
+        try:
+            with open(tmp_path, 'wb') as f:
+                np.save(f, np.asarray(values, dtype=np.float64))
+            os.replace(tmp_path, path)
+        except OSError:
+            tmp_path.unlink(missing_ok=True)
+
+    def size_bytes(self):
+        return sum(size for _, _, size in self._entries())
+
+    def _entries(self):
+        """(mtime, path, size) of every entry currently on disk."""
+        entries = []
+        for path in self.cache_dir.glob(f"*/*{self.SUFFIX}"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, path, stat.st_size))
+        return entries
+
+    def evict(self):
+        """
+        Deletes least recently used entries until the cache fits in `max_bytes`.
+        Returns the number of entries removed. Meant to be called once per run by
+        the parent process, not by workers.
+        """
+        entries = self._entries()
+        total = sum(size for _, _, size in entries)
+        removed = 0
+        for _, path, size in sorted(entries, key=lambda e: e[0]):
+            if total <= self.max_bytes:
+                break
+            try:
+                # Workers that already mapped the file keep their view on POSIX
+                path.unlink()
+            except OSError:
+                continue # Already gone, or still open on Windows
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self):
+        for _, path, _ in self._entries():
+            path.unlink(missing_ok=True)
@@ -0,0 +1,115 @@
+# In: foundry_reflex/utils/job_ledger.py
+
+import json
+from datetime import datetime
+from pathlib import Path
+
+import duckdb
+
+PENDING, DONE, FAILED = "pending", "done", "failed"
+
+
+class JobLedger:
+    """
+    A durable record of every engine run and the state of each of its jobs.
+
+    A run's jobs are written as 'pending' before any work starts. The engine
+    marks them 'done' once their results are on disk, or 'failed' with the error,
+    so an interrupted run can be resumed with exactly the unfinished jobs.
+    Connections are short-lived, like everywhere else we touch DuckDB.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as con:
+            con.execute("""
+                CREATE TABLE IF NOT EXISTS engine_runs (
+                    run_id VARCHAR PRIMARY KEY, created_at TIMESTAMP, status VARCHAR, spec VARCHAR
+                );""")
+            con.execute("""
+                CREATE TABLE IF NOT EXISTS engine_jobs (
+                    run_id VARCHAR, symbol VARCHAR, strategy_name VARCHAR, state VARCHAR,
+                    error VARCHAR, updated_at TIMESTAMP, PRIMARY KEY (run_id, symbol, strategy_name)
+                );""")
+
+    def _connect(self):
+        return duckdb.connect(database=str(self.db_path), read_only=False)
+
+    def start_run(self, run_id, spec, jobs):
+        """Registers a new run and all of its (symbol, strategy_name) jobs as pending."""
+        now = datetime.now()
+        with self._connect() as con:
+            con.execute("INSERT INTO engine_runs VALUES (?, ?, 'running', ?)", [run_id, now, json.dumps(spec)])
+            con.executemany(
+                "INSERT INTO engine_jobs VALUES (?, ?, ?, ?, NULL, ?)",
+                [[run_id, symbol, strategy_name, PENDING, now] for symbol, strategy_name in jobs],
+            )
+
+    def mark_done(self, run_id, jobs):
+        self._set_state(run_id, jobs, DONE)
+
+    def mark_failed(self, run_id, failures):
+        """Records failed jobs with their error. `failures` is a list of (symbol, strategy_name, error)."""
+        if not failures:
+            return
+        now = datetime.now()
+        with self._connect() as con:
+            con.executemany(
+                "UPDATE engine_jobs SET state = ?, error = ?, updated_at = ? WHERE run_id = ? AND symbol = ? AND strategy_name = ?",
+                [[FAILED, error, now, run_id, symbol, strategy_name] for symbol, strategy_name, error in failures],
+            )
+
+    def _set_state(self, run_id, jobs, state):
+        if not jobs:
+            return
+        now = datetime.now()
+        with self._connect() as con:
+            con.executemany(
+                "UPDATE engine_jobs SET state = ?, error = NULL, updated_at = ? WHERE run_id = ? AND symbol = ? AND strategy_name = ?",
+                [[state, now, run_id, symbol, strategy_name] for symbol, strategy_name in jobs],
+            )
+
+    def finish_run(self, run_id):
+        with self._connect() as con:
+            con.execute("UPDATE engine_runs SET status = 'complete' WHERE run_id = ?", [run_id])
+
+    def find_run(self, run_id=None):
+        """
+        Returns {'run_id', 'status', 'spec'} for `run_id`, or for the latest
+        unfinished run when no id is given. Returns None if there is nothing to resume.
+        """
+        with self._connect() as con:
+            if run_id:
+                row = con.execute("SELECT run_id, status, spec FROM engine_runs WHERE run_id = ?", [run_id]).fetchone()
+            else:
+                row = con.execute(
+                    "SELECT run_id, status, spec FROM engine_runs WHERE status = 'running' ORDER BY created_at DESC LIMIT 1"
+                ).fetchone()
+        if row is None:
+            return None
+        return {"run_id": row[0], "status": row[1], "spec": json.loads(row[2])}
+
+    def running_runs(self):
+        """The ids of every run not marked complete, i.e. running or interrupted."""
+        with self._connect() as con:
+            rows = con.execute("SELECT run_id FROM engine_runs WHERE status = 'running' ORDER BY created_at").fetchall()
+        return [row[0] for row in rows]
+
+    def unfinished_jobs(self, run_id, retry_failed=False):
+        """The run's (symbol, strategy_name) jobs still pending (plus failed ones, if asked)."""
+        states = [PENDING, FAILED] if retry_failed else [PENDING]
+        with self._connect() as con:
+            rows = con.execute(
+                "SELECT symbol, strategy_name FROM engine_jobs WHERE run_id = ? AND list_contains(?, state) ORDER BY symbol, strategy_name",
+                [run_id, states],
+            ).fetchall()
+        return [tuple(row) for row in rows]
+
+    def summary(self, run_id):
+        """Returns {state: job count} for a run."""
+        with self._connect() as con:
+            rows = con.execute(
+                "SELECT state, COUNT(*) FROM engine_jobs WHERE run_id = ? GROUP BY state", [run_id]
+            ).fetchall()
+        return dict(rows)
@@ -1,37 +1,145 @@
 # In: foundry_reflex/utils/live_data_fetcher.py
 
+import functools
+from datetime import datetime, timedelta
+
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import requests
 from fyers_apiv3 import fyersModel
-from datetime import datetime, timedelta
 
-def get_live_intraday_data(symbol: str, client_id: str, access_token: str, timeframe_resolution: str, days_back: int) -> pd.DataFrame:
-    """ Fetches live intraday data from the Fyers API. """
-    
-    if not client_id or not access_token:
-        print("Fyers API credentials not provided.")
-        return pd.DataFrame()
+from .fyers_dataprovider import FYERS_RATE_LIMITER, RetryableFetchError, parse_history_response, retry_queue
+from .logger_setup import get_logger
+
+logger = get_logger("live_data_fetcher", "logs/pipeline.log")
+
+TIMEZONE = "Asia/Kolkata"
+
+# Long format: one row per (ticker, timeframe, candle), like the intraday_bars table.
+INTRADAY_COLUMNS = ['Ticker', 'Timeframe', 'Timestamp', 'Open', 'High', 'Low', 'Close', 'Volume']
+
+# Errors worth retrying: throttling and server errors, and the network errors the SDK lets through
+TRANSIENT_ERRORS = (RetryableFetchError, requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+
+# Fyers serves at most this many days of candles per history request.
+MAX_INTRADAY_DAYS = 100
+MAX_DAILY_DAYS = 366
+
+
+@functools.lru_cache(maxsize=4)
+def get_fyers_client(client_id: str, access_token: str) -> fyersModel.FyersModel:
+    """One FyersModel per credential pair, shared by every request instead of one per call."""
+    return fyersModel.FyersModel(client_id=client_id, token=access_token, log_path="")
+
+
+def _date_ranges(days_back: int, resolution: str):
+    """(range_from, range_to) date strings covering the last `days_back` days in request-sized chunks."""
+    chunk_days = MAX_DAILY_DAYS if str(resolution).upper() in ("D", "1D") else MAX_INTRADAY_DAYS
+    ranges = []
+    range_to = datetime.now()
+    earliest = range_to - timedelta(days=days_back)
+    while range_to >= earliest:
+        range_from = max(earliest, range_to - timedelta(days=chunk_days - 1))
+        ranges.append((range_from.strftime("%Y-%m-%d"), range_to.strftime("%Y-%m-%d")))
+        range_to = range_from - timedelta(days=1)
+    return ranges
+
 
-    fyers = fyersModel.FyersModel(client_id=client_id, token=access_token, log_path="")
-    
-    date_to = datetime.now().strftime("%Y-%m-%d")
-    date_from = (datetime.now() - timedelta(days=days_back)).strftime("%Y-%m-%d")
-    
+def _fetch_candles(fyers, symbol, resolution, date_from, date_to):
+    """
+    One rate-limited history request. Returns a (candles, 6) float array, or None.
+    Throttling and transient errors are raised for the retry queue to re-queue; any
+    other error is logged once, as retrying would only delay it.
+    """
     data = {
-        "symbol": symbol, "resolution": timeframe_resolution, "date_format": "1",
+        "symbol": symbol, "resolution": resolution, "date_format": "1",
         "range_from": date_from, "range_to": date_to, "cont_flag": "1"
     }
-
+    FYERS_RATE_LIMITER.wait_for_token()
     try:
         response = fyers.history(data=data)
-        if response.get("s") == "ok" and response.get('candles'):
-            df = pd.DataFrame(response['candles'], columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='s')
-            df.set_index('timestamp', inplace=True)
-            df.index = df.index.tz_localize('UTC').tz_convert('Asia/Kolkata')
-            return df
-        else:
-            print(f"Could not fetch intraday data for {symbol}. Response: {response.get('message', 'Unknown error')}")
-            return pd.DataFrame()
-    except Exception as e:
-        print(f"API Error fetching intraday data for {symbol}: {e}")
-        return pd.DataFrame()
\ No newline at end of file
+        candles = parse_history_response(200, response)
+    except TRANSIENT_ERRORS:
+        raise
+    except Exception as e: # Auth failures, bad responses, bugs
+        logger.error(f"API Error fetching {resolution} data for {symbol}: {e}")
+        return None
+    if candles is None:
+        logger.warning(f"Could not fetch {resolution} data for {symbol}. Response: {response.get('message', 'Unknown error')}")
+        return None
+    return np.asarray(candles, dtype=np.float64) if candles else None
+
+
+def _describe_job(job):
+    symbol, timeframe, date_from, date_to = job
+    return f"{timeframe} data for {symbol} ({date_from}..{date_to})"
+
+
+def get_intraday_batch(symbols, timeframes, client_id: str, access_token: str, days_back: int,
+                       max_workers: int = 5, as_arrow: bool = False):
+    """
+    Fetches intraday candles for many symbols and timeframes in one call.
+
+    Every request goes through one shared Fyers client and the shared FYERS_RATE_LIMITER,
+    from a small thread pool; failed requests are retried through the shared retry_queue. The candles are stacked into a single array and turned
+    into one frame, rather than one DataFrame per request.
+
+    Args:
+        symbols (list): Fyers symbols, e.g. ['NSE:RELIANCE-EQ'].
+        timeframes (list): Fyers resolutions, e.g. ['1', '5', '15', '60', 'D'].
+        days_back (int): Calendar days of history, split into request-sized date ranges.
+        max_workers (int): Concurrent requests (the rate limiter still caps requests per second).
+        as_arrow (bool): Return a pyarrow.Table instead of a DataFrame.
+
+    Returns:
+        INTRADAY_COLUMNS sorted by (Ticker, Timeframe, Timestamp), with Timestamp in IST.
+        Symbols or timeframes that failed are logged and left out.
+    """
+    empty = pd.DataFrame(columns=INTRADAY_COLUMNS)
+    if not client_id or not access_token:
+        logger.error("Fyers API credentials not provided.")
+        return pa.Table.from_pandas(empty, preserve_index=False) if as_arrow else empty
+
+    fyers = get_fyers_client(client_id, access_token)
+    jobs = [
+        (symbol, str(timeframe), date_from, date_to)
+        for symbol in symbols for timeframe in timeframes
+        for date_from, date_to in _date_ranges(days_back, timeframe)
+    ]
+    # A request backing off after a transient error waits in the queue, not in a worker
+    tasks = {job: functools.partial(_fetch_candles, fyers, *job) for job in jobs}
+    fetched = dict(retry_queue(tasks, max_workers, transient=TRANSIENT_ERRORS, describe=_describe_job))
+    results = [fetched[job] for job in jobs]
+
+    blocks = [(job, candles) for job, candles in zip(jobs, results) if candles is not None and len(candles)]
+    logger.info(f"Fetched {sum(len(c) for _, c in blocks)} candles in {len(jobs)} requests "
+                f"({len(jobs) - len(blocks)} empty or failed) for {len(symbols)} symbols x {len(timeframes)} timeframes.")
+    if not blocks:
+        return pa.Table.from_pandas(empty, preserve_index=False) if as_arrow else empty
+
+    candles = np.concatenate([c for _, c in blocks])
+    lengths = [len(c) for _, c in blocks]
+    frame = pd.DataFrame({
+        'Ticker': np.repeat(np.array([job[0] for job, _ in blocks], dtype=object), lengths),
+        'Timeframe': np.repeat(np.array([job[1] for job, _ in blocks], dtype=object), lengths),
+        'Timestamp': pd.to_datetime(candles[:, 0].astype(np.int64), unit='s', utc=True).tz_convert(TIMEZONE),
+        'Open': candles[:, 1],
+        'High': candles[:, 2],
+        'Low': candles[:, 3],
+        'Close': candles[:, 4],
+        'Volume': candles[:, 5].astype(np.int64),
+    })
+    # Adjacent date ranges can both return the candles of their boundary day
+    frame = frame.drop_duplicates(subset=['Ticker', 'Timeframe', 'Timestamp'])
+    frame = frame.sort_values(['Ticker', 'Timeframe', 'Timestamp'], ignore_index=True)
+    return pa.Table.from_pandas(frame, preserve_index=False) if as_arrow else frame
+
+
+def get_live_intraday_data(symbol: str, client_id: str, access_token: str, timeframe_resolution: str, days_back: int) -> pd.DataFrame:
+    """ Fetches live intraday data from the Fyers API. """
+    frame = get_intraday_batch([symbol], [timeframe_resolution], client_id, access_token, days_back)
+    if frame.empty:
+        return pd.DataFrame()
+    # Single-symbol shape: lowercase columns indexed by timestamp
+    return frame.drop(columns=['Ticker', 'Timeframe']).rename(columns=str.lower).set_index('timestamp')
@@ -0,0 +1,73 @@
+# In: foundry_reflex/utils/market_data_ingest.py
+
+import time
+
+import duckdb
+import pyarrow as pa
+
+from .logger_setup import get_logger
+
+logger = get_logger("market_data_ingest", "logs/pipeline.log")
+
+# Rows queued before they are written in one insert (about 70 symbols of a 3-year backfill)
+INGEST_BATCH_ROWS = 50_000
+
+
+class MarketDataWriter:
+    """
+    Streams fetched bars into the market_data table over one connection.
+
+    Each symbol's bars arrive as a pyarrow.Table (see fetch_all_data's `sink`) and are
+    queued until INGEST_BATCH_ROWS rows are waiting. The batch is then written with a
+    single INSERT OR REPLACE, DuckDB scanning the Arrow buffers directly. Only one
+    batch is held at a time, and everything written stays written if the run fails later.
+
+        with MarketDataWriter(conn) as writer:
+            fetch_all_data(..., sink=writer.write)
+    """
+
+    def __init__(self, conn, batch_rows=INGEST_BATCH_ROWS):
+        self.conn = conn
+        self.batch_rows = batch_rows
+        self._pending = []
+        self._pending_rows = 0
+        self.rows_written = 0
+        self.symbols_written = 0
+
+    def write(self, table: pa.Table):
+        """Queues one symbol's bars; writes the batch once it is full."""
+        if table is None or table.num_rows == 0:
+            return
+        self._pending.append(table)
+        self._pending_rows += table.num_rows
+        if self._pending_rows >= self.batch_rows:
+            self.flush()
+
+    def flush(self):
+        """Writes the queued bars in one transaction. Returns the number of rows written."""
+        if not self._pending:
+            return 0
+        start_time = time.time()
+        batch = pa.concat_tables(self._pending)
+        # New bars are inserted; a re-fetched last bar replaces the (possibly mid-session) stored one
+        self.conn.execute("INSERT OR REPLACE INTO market_data BY NAME SELECT * FROM batch;")
+        self.rows_written += batch.num_rows
+        self.symbols_written += len(self._pending)
+        logger.info(f"Wrote {batch.num_rows} bars of {len(self._pending)} symbols in {time.time() - start_time:.2f}s "
+                    f"({self.rows_written} bars of {self.symbols_written} symbols so far).")
+        self._pending.clear()
+        self._pending_rows = 0
+        return batch.num_rows
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # The last batch is written even if the fetch failed: whatever arrived is kept
+        try:
+            self.flush()
+        except duckdb.Error as e:
+            logger.error(f"Failed to write the last {self._pending_rows} bars: {e}")
+            if exc_type is None:
+                raise
+        return False
@@ -0,0 +1,155 @@
+# In: foundry_reflex/utils/market_data_store.py
+
+import hashlib
+import json
+from pathlib import Path
+
+import duckdb
+import numpy as np
+import pandas as pd
+
+# Column order of the 2-D value matrix, matching what backtesting.py expects.
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+def data_fingerprint(dates, values):
+    """
+    Fingerprints one ticker's bars as '<rows>-<last date>-<checksum>'.
+
+    Args:
+        dates (np.ndarray): datetime64[ns] bar dates, ascending.
+        values (np.ndarray): float64 (rows, 5) matrix in OHLCV_COLUMNS order.
+    """
+    dates = np.ascontiguousarray(dates, dtype='datetime64[ns]')
+    values = np.ascontiguousarray(values, dtype=np.float64)
+    if not len(dates):
+        return "0"
+    checksum = hashlib.blake2b(dates.tobytes(), digest_size=8)
+    checksum.update(values.tobytes())
+    last_date = np.datetime_as_string(dates[-1], unit='D').replace('-', '')
+    return f"{len(dates)}-{last_date}-{checksum.hexdigest()}"
+
+
+class MarketDataStore:
+    """
+    A read-only, memory-mapped snapshot of a universe's OHLCV data.
+
+    The parent process builds the store once with a single columnar scan of
+    `market_data`. Pool workers attach to the same files and slice out one
+    symbol at a time, so no worker ever opens DuckDB or copies the arrays.
+    """
+    INDEX_FILE = "index.json"
+    DATES_FILE = "dates.npy"
+    VALUES_FILE = "ohlcv.npy"
+
+    def __init__(self, store_dir, dates, values, index, fingerprints):
+        self.store_dir = Path(store_dir) if store_dir is not None else None # None: in memory only
+        self.dates = dates      # datetime64[ns], shape (rows,)
+        self.values = values    # float64, shape (rows, len(OHLCV_COLUMNS))
+        self.index = index      # {ticker: [start_row, stop_row]}
+        self.fingerprints = fingerprints  # {ticker: data_fingerprint()}
+
+    @classmethod
+    def load(cls, db_path, symbols, trailing_bars=None):
+        """
+        Reads every requested symbol in one query into an in-memory store (no files).
+
+        Rows are sorted by (Ticker, Date), so each ticker occupies one
+        contiguous block of the value matrix. With `trailing_bars`, only each
+        ticker's latest that many bars are read.
+        """
+        query = (
+            f"SELECT Ticker, Date, {', '.join(OHLCV_COLUMNS)} FROM market_data "
+            "WHERE list_contains(?, Ticker)"
+        )
+        params = [sorted(set(symbols))]
+        if trailing_bars is not None:
+            query += " QUALIFY ROW_NUMBER() OVER (PARTITION BY Ticker ORDER BY Date DESC) <= ?"
+            params.append(int(trailing_bars))
+
+        con = duckdb.connect(database=str(db_path), read_only=True)
+        try:
+            columns = con.execute(query + " ORDER BY Ticker, Date", params).fetchnumpy()
+        finally:
+            con.close()
+
+        tickers = np.asarray(columns['Ticker'], dtype=object)
+        dates = np.asarray(columns['Date']).astype('datetime64[ns]')
+        values = np.empty((len(tickers), len(OHLCV_COLUMNS)), dtype=np.float64)
+        for i, col in enumerate(OHLCV_COLUMNS):
+            # NULLs come back as masked arrays; store them as NaN
+            values[:, i] = np.ma.filled(np.ma.asarray(columns[col], dtype=np.float64), np.nan)
+
+        # Ticker boundaries are wherever the sorted Ticker column changes value
+        index = {}
+        if len(tickers):
+            starts = np.r_[0, np.flatnonzero(tickers[1:] != tickers[:-1]) + 1]
+            stops = np.r_[starts[1:], len(tickers)]
+            index = {tickers[s]: [int(s), int(e)] for s, e in zip(starts, stops)}
+        fingerprints = {t: data_fingerprint(dates[s:e], values[s:e]) for t, (s, e) in index.items()}
+
+        return cls(None, dates, values, index, fingerprints)
+
+    @classmethod
+    def build(cls, db_path, symbols, store_dir):
+        """Reads every requested symbol in one query (see load()) and writes the store files."""
+        store = cls.load(db_path, symbols)
+        store.store_dir = Path(store_dir)
+        store.store_dir.mkdir(parents=True, exist_ok=True)
+
+        np.save(store.store_dir / cls.DATES_FILE, store.dates)
+        np.save(store.store_dir / cls.VALUES_FILE, store.values)
+        with open(store.store_dir / cls.INDEX_FILE, 'w') as f:
+            json.dump({"index": store.index, "fingerprints": store.fingerprints}, f)
+
+        return store
+
+    @classmethod
+    def attach(cls, store_dir):
+        """Opens an existing store as read-only memory maps (no data is copied)."""
+        store_dir = Path(store_dir)
+        with open(store_dir / cls.INDEX_FILE, 'r') as f:
+            meta = json.load(f)
+        dates = np.load(store_dir / cls.DATES_FILE, mmap_mode='r')
+        values = np.load(store_dir / cls.VALUES_FILE, mmap_mode='r')
+        return cls(store_dir, dates, values, meta["index"], meta["fingerprints"])
+
+    @property
+    def symbols(self):
+        return list(self.index.keys())
+
+    def __contains__(self, symbol):
+        return symbol in self.index
+
+    def bar_count(self, symbol):
+        """Number of bars stored for the symbol (0 if it has none)."""
+        start, stop = self.index.get(symbol, (0, 0))
+        return stop - start
+
+    def fingerprint(self, symbol):
+        """The symbol's data fingerprint, or None if the store has no bars for it."""
+        return self.fingerprints.get(symbol)
+
+    def frame(self, symbol):
+        """
+        Returns the symbol's OHLCV as a DataFrame indexed by Date.
+        The columns are views onto the shared memory map.
+        """
+        bounds = self.index.get(symbol)
+        if bounds is None:
+            return pd.DataFrame()
+        start, stop = bounds
+        return pd.DataFrame(
+            self.values[start:stop],
+            index=pd.DatetimeIndex(self.dates[start:stop], name='Date'),
+            columns=OHLCV_COLUMNS,
+            copy=False,
+        )
+
+    def arrays(self, symbol):
+        """
+        Returns the symbol's OHLCV as {column: float array} views, without building a
+        DataFrame (cheaper when only the values are needed). Empty if it has no bars.
+        """
+        start, stop = self.index.get(symbol, (0, 0))
+        return {col: self.values[start:stop, i] for i, col in enumerate(OHLCV_COLUMNS)}
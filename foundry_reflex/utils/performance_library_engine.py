@@ -4,10 +4,19 @@ import sys
 from pathlib import Path
 sys.path.append(str(Path(__file__).resolve().parent.parent.parent))
 
+import cProfile
+import hashlib
+import json
 import logging
 import multiprocessing
 import os
+import pstats
+import random
+import tempfile
 import time
+import uuid
+from collections import namedtuple
+from contextlib import contextmanager
 from pathlib import Path
 
 import duckdb
@@ -16,6 +25,11 @@ import yaml
 from backtesting import Backtest
 from tqdm import tqdm
 from .logger_setup import get_logger
+from .data_io import load_universes
+from .indicator_cache import IndicatorCache
+from .job_ledger import DONE, FAILED, JobLedger
+from .market_data_store import OHLCV_COLUMNS, MarketDataStore, data_fingerprint
+from .performance_library_store import WALK_FORWARD_KEY_COLUMNS, LibraryWriter, PerformanceLibraryStore, new_run_id
 logger = get_logger("engine", "logs/engine.log")
 
 
@@ -26,6 +40,8 @@ sys.path.append(str(project_root))
 
 # This allows us to dynamically import the strategy class from a file
 from importlib import import_module
+from strategies.configurable_strategy import ConfigurableStrategy, compute_indicator, extract_indicator_strings
+from strategies.vectorized_backtest import UnsupportedRuleError, run_vectorized_backtest
 
 # Configure logging for clear, structured output
 # This will log to both a file and the console
@@ -55,84 +71,427 @@ def load_strategy_class(strategy_file, strategy_class_name):
         logging.error(f"Could not load strategy '{strategy_class_name}' from '{strategy_file}.py'. Error: {e}")
         return None
 
-# --- Core Backtesting Function (for parallel execution) ---
+def load_universe_symbols(universe_name):
+    """Returns the symbols of a named universe from the universes file, so they needn't travel as argv."""
+    universes = load_universes(Path(PATHS.get("stock_universes", "data/universes.yaml")))
+    if universe_name not in universes:
+        raise KeyError(f"Unknown stock universe '{universe_name}'")
+    return universes[universe_name] or []
 
-def _execute_single_backtest(args):
+def compute_preset_hash(strategy_preset):
+    """Hashes a preset's normalized JSON (sorted keys, no whitespace), so any rule edit changes it."""
+    normalized = json.dumps(strategy_preset, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()[:16]
+
+try:
+    import resource
+except ImportError: # Not available on Windows; peak memory is then left empty
+    resource = None
+
+# What a worker returns instead of a KPI dict when a job fails, so the error can be recorded.
+JobFailure = namedtuple('JobFailure', ['symbol', 'strategy_name', 'error'])
+
+# --- Job Metrics ---
+
+# Per-job timing rows recorded by this worker, handed back (and cleared) with each task bundle.
+_JOB_METRICS = []
+
+def _peak_rss_mb():
+    """This process's peak resident memory so far, in MB (None where unsupported)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux but in bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+# --- Shared Market Data (one store per engine run) ---
+
+# The store this worker is attached to; None means "query DuckDB directly".
+_WORKER_STORE = None
+
+def _attach_store(store_dir):
     """
-    Executes a single backtest job. Designed to be run in a separate process.
-    Includes robust error isolation.
+    Attaches the worker to a run's shared market data store, if not already attached.
+    Every job names its run's store, so a long-lived pool can serve many runs.
     """
-    symbol, strategy_preset = args
-    db_path = PATHS.get("market_data_db")
-    
+    global _WORKER_STORE
+    if store_dir is None:
+        _WORKER_STORE = None
+    elif _WORKER_STORE is None or _WORKER_STORE.store_dir != Path(store_dir):
+        _WORKER_STORE = MarketDataStore.attach(store_dir)
+
+# --- Persistent Indicator Cache ---
+
+# This worker's handle on the on-disk indicator cache; created on first use.
+_INDICATOR_CACHE = None
+
+def _indicator_cache():
+    """The shared on-disk indicator cache from config.yaml, or None if `paths.indicator_cache` is unset."""
+    global _INDICATOR_CACHE
+    cache_dir = PATHS.get("indicator_cache")
+    if not cache_dir:
+        return None
+    if _INDICATOR_CACHE is None or _INDICATOR_CACHE.cache_dir != Path(cache_dir):
+        max_mb = (CONFIG.get("indicator_cache") or {}).get("max_mb", 1024)
+        _INDICATOR_CACHE = IndicatorCache(cache_dir, max_bytes=int(max_mb * 1024 * 1024))
+    return _INDICATOR_CACHE
+
+def _symbol_fingerprint(symbol, data):
+    """The data fingerprint of a loaded symbol frame, taken from the store when attached."""
+    if _WORKER_STORE is not None:
+        return _WORKER_STORE.fingerprint(symbol)
+    return data_fingerprint(data.index.to_numpy(), data[OHLCV_COLUMNS].to_numpy(dtype=float))
+
+def _load_symbol_data(symbol):
+    """
+    Returns a symbol's OHLCV frame, indexed by Date and sorted ascending.
+    Uses the shared store when attached, falling back to a DuckDB query.
+    """
+    if _WORKER_STORE is not None:
+        # The store holds every symbol of the run; a miss means no data at all
+        return _WORKER_STORE.frame(symbol)
+
+    con = duckdb.connect(database=PATHS.get("market_data_db"), read_only=True)
     try:
-        # 1. Load Data for the specific symbol
-        con = duckdb.connect(database=db_path, read_only=True)
-        # Important: Ensure data is sorted by date for backtesting.py
-        data = con.execute(f"SELECT * FROM market_data WHERE Ticker = '{symbol}' ORDER BY date").fetchdf()
+        data = con.execute(
+            "SELECT Date, Open, High, Low, Close, Volume FROM market_data WHERE Ticker = ? ORDER BY Date",
+            [symbol]
+        ).fetchdf()
+    finally:
         con.close()
+    data['Date'] = pd.to_datetime(data['Date'])
+    return data.set_index('Date')
+
+# --- Core Backtesting Functions (for parallel execution) ---
+
+def _extract_kpis(symbol, strategy_preset, stats_series):
+    """
+    Extracts Key Performance Indicators (KPIs) from a backtesting.py stats Series.
+
+    Uses the .get() method to provide a default value (0 or NaN) if a key
+    does not exist. This is crucial for stats that are only calculated
+    when trades occur, like SQN.
+    """
+    return {
+        'symbol': symbol,
+        'strategy_name': strategy_preset["strategy_name"],
+        
+        # Core Performance Metrics
+        'start_date': stats_series.get('Start'),
+        'end_date': stats_series.get('End'),
+        'duration_days': (stats_series.get('End') - stats_series.get('Start')).days if 'Start' in stats_series and 'End' in stats_series else 0,
+        'return_pct': stats_series.get('Return [%]', 0.0),
+        'buy_hold_return_pct': stats_series.get('Buy & Hold Return [%]', 0.0),
+        'equity_final': stats_series.get('Equity Final [$]', 0.0),
+        'max_drawdown_pct': stats_series.get('Max. Drawdown [%]', 0.0),
+
+        # Risk-Adjusted Ratios
+        'sharpe_ratio': stats_series.get('Sharpe Ratio', 0.0),
+        'sortino_ratio': stats_series.get('Sortino Ratio', 0.0),
+        'calmar_ratio': stats_series.get('Calmar Ratio', 0.0),
+        
+        # Trade-Specific Metrics
+        'total_trades': stats_series.get('# Trades', 0),
+        'win_rate_pct': stats_series.get('Win Rate [%]', 0.0),
+        'profit_factor': stats_series.get('Profit Factor', 0.0),
+        'expectancy_pct': stats_series.get('Expectancy [%]', 0.0),
+        'avg_trade_pct': stats_series.get('Avg. Trade [%]', 0.0),
+        'sqn': stats_series.get('System Quality Number', 0.0), # CRITICAL FIX HERE
+    }
+
+def _preset_operands(symbol, strategy_presets):
+    """
+    Extracts each preset's operands on its own, so a preset whose rules can't be parsed
+    fails alone instead of taking the shared indicator pass down with it.
+    Returns (the union of the parsable presets' operands, {strategy_name: JobFailure}).
+    """
+    indicator_strings, failures = set(), {}
+    for preset in strategy_presets:
+        try:
+            indicator_strings |= extract_indicator_strings(preset.get("parameters", {}).get("rules"))
+        except Exception as e:
+            logging.error(f"FAIL: Invalid rules in '{preset['strategy_name']}' for '{symbol}'. Reason: {e!r}", exc_info=False)
+            failures[preset['strategy_name']] = JobFailure(symbol, preset['strategy_name'], f"Invalid rules: {e!r}")
+    return indicator_strings, failures
+
+def _precompute_indicators(data, indicator_strings, cache=None, symbol=None, fingerprint=None):
+    """
+    Computes every distinct operand used across a symbol's presets exactly once.
+    Returns {indicator_str: array}; indicators that fail are left out and handled by the strategy.
+    If an existing `cache` for the same data is given, only its missing indicators are computed.
+    Given the symbol and its data fingerprint, indicators are first looked up in (and then
+    saved to) the on-disk indicator cache, so unchanged data is never recomputed.
+    """
+    disk_cache = _indicator_cache() if symbol and fingerprint else None
+    cache = {} if cache is None else cache
+    memo = {} # Subexpressions shared by several operands are computed once
+    for indicator_str in indicator_strings - set(cache):
+        values = disk_cache.get(symbol, fingerprint, indicator_str) if disk_cache else None
+        if values is None:
+            values = compute_indicator(indicator_str, data, memo)
+            if values is not None and disk_cache:
+                disk_cache.put(symbol, fingerprint, indicator_str, values)
+        if values is not None:
+            cache[indicator_str] = values
+    return cache
+
+def _run_vectorized(data, strategy_class, parameters, indicator_cache):
+    """
+    Runs a preset through the vectorized fast path when it can express it.
+    Returns backtesting.py-style stats, or None to fall back to the event-driven Backtest.
+    """
+    # Only the plain rule interpreter is compiled; subclasses may override next()
+    if strategy_class is not ConfigurableStrategy or set(parameters) != {"rules"}:
+        return None
+
+    rules = parameters["rules"]
+    indicators = {k: indicator_cache[k] for k in extract_indicator_strings(rules) if k in indicator_cache}
+    try:
+        return run_vectorized_backtest(data, rules, indicators, cash=100_000, commission=.002)
+    except UnsupportedRuleError as e:
+        logger.debug(f"Falling back to event-driven backtest: {e}")
+        return None
+
+def _backtest_preset(data, strategy_preset, indicator_cache, execution):
+    """
+    Backtests one preset on a prepared frame: vectorized fast path first, event-driven otherwise.
+    Returns (stats, path) where path is 'vectorized' or 'event', or (None, None) if the
+    strategy class can't be loaded.
+    """
+    strategy_class = load_strategy_class(strategy_preset["strategy_file"], strategy_preset["strategy_class"])
+    if strategy_class is None:
+        return None, None # Error already logged
+
+    parameters = dict(strategy_preset.get("parameters", {}))
+    if execution == 'vectorized':
+        stats = _run_vectorized(data, strategy_class, parameters, indicator_cache)
+        if stats is not None:
+            return stats, 'vectorized'
+
+    if hasattr(strategy_class, "indicator_cache"):
+        parameters["indicator_cache"] = indicator_cache
+    bt = Backtest(data, strategy_class, cash=100_000, commission=.002, finalize_trades=True)
+    return bt.run(**parameters), 'event'
+
+def _execute_symbol_batch(args):
+    """
+    Executes every preset for one symbol. Designed to be run in a separate process.
+
+    The symbol's frame is prepared once and each distinct indicator is computed
+    once, then shared by all presets. Errors are isolated per preset, including rules
+    that can't be parsed, and the returned list holds one KPI dict (or a JobFailure)
+    per preset. Each finished job also records its phase timings in _JOB_METRICS.
+    """
+    symbol, strategy_presets, execution, store_dir = args
+    _attach_store(store_dir)
+    indicator_strings, invalid = _preset_operands(symbol, strategy_presets)
+
+    def fail_all(error):
+        return [JobFailure(symbol, preset['strategy_name'], error) for preset in strategy_presets]
 
+    try:
+        # 1. Load Data for the specific symbol (a slice of the shared store)
+        load_start = time.perf_counter()
+        data = _load_symbol_data(symbol)
         if data.empty:
             logging.warning(f"SKIPPING: No market data found for symbol '{symbol}'.")
-            return None
-
-        # Rename columns to what backtesting.py expects
-        data = data.rename(columns={
-            'date': 'Date',
-            'open': 'Open',
-            'high': 'High',
-            'low': 'Low',
-            'close': 'Close',
-            'volume': 'Volume'
-        })
-        data.set_index('Date', inplace=True)
-
-        # 2. Load and Prepare Strategy
-        strategy_class = load_strategy_class(strategy_preset["strategy_file"], strategy_preset["strategy_class"])
-        if strategy_class is None:
-            return None # Error already logged
-
-        # 3. Run the Backtest
-        bt = Backtest(data, strategy_class, cash=100_000, commission=.002, finalize_trades=True)
-        stats = bt.run(**strategy_preset.get("parameters", {}))
-
-        # 4. Extract Key Performance Indicators (KPIs) - FINAL, TRULY ROBUST METHOD
-        # Use the .get() method to provide a default value (0 or NaN) if a key
-        # does not exist. This is crucial for stats that are only calculated
-        # when trades occur, like SQN.
-        stats_series = stats # The result is a Pandas Series
-        kpis = {
-            'symbol': symbol,
-            'strategy_name': strategy_preset["strategy_name"],
-            
-            # Core Performance Metrics
-            'start_date': stats_series.get('Start'),
-            'end_date': stats_series.get('End'),
-            'duration_days': (stats_series.get('End') - stats_series.get('Start')).days if 'Start' in stats_series and 'End' in stats_series else 0,
-            'return_pct': stats_series.get('Return [%]', 0.0),
-            'buy_hold_return_pct': stats_series.get('Buy & Hold Return [%]', 0.0),
-            'equity_final': stats_series.get('Equity Final [$]', 0.0),
-            'max_drawdown_pct': stats_series.get('Max. Drawdown [%]', 0.0),
-
-            # Risk-Adjusted Ratios
-            'sharpe_ratio': stats_series.get('Sharpe Ratio', 0.0),
-            'sortino_ratio': stats_series.get('Sortino Ratio', 0.0),
-            'calmar_ratio': stats_series.get('Calmar Ratio', 0.0),
-            
-            # Trade-Specific Metrics
-            'total_trades': stats_series.get('# Trades', 0),
-            'win_rate_pct': stats_series.get('Win Rate [%]', 0.0),
-            'profit_factor': stats_series.get('Profit Factor', 0.0),
-            'expectancy_pct': stats_series.get('Expectancy [%]', 0.0),
-            'avg_trade_pct': stats_series.get('Avg. Trade [%]', 0.0),
-            'sqn': stats_series.get('System Quality Number', 0.0), # CRITICAL FIX HERE
-        }
-        return kpis
+            return fail_all("No market data")
 
+        # 2. One indicator pass for the whole preset set
+        indicators_start = time.perf_counter()
+        fingerprint = _symbol_fingerprint(symbol, data)
+        indicator_cache = _precompute_indicators(data, indicator_strings, symbol=symbol, fingerprint=fingerprint)
+        indicators_end = time.perf_counter()
     except Exception as e:
-        # This is the critical Error Isolation block
-        logging.error(f"FAIL: Backtest for '{symbol}' with '{strategy_preset['strategy_name']}' failed. Reason: {e}", exc_info=False)
-        return None
+        logging.error(f"FAIL: Could not prepare data for '{symbol}'. Reason: {e}", exc_info=False)
+        return fail_all(f"Could not prepare data: {e}")
+
+    # The shared load and indicator pass are split evenly across the batch's jobs
+    load_share = (indicators_start - load_start) / len(strategy_presets)
+    indicators_share = (indicators_end - indicators_start) / len(strategy_presets)
+
+    results = []
+    for strategy_preset in strategy_presets:
+        if strategy_preset['strategy_name'] in invalid:
+            results.append(invalid[strategy_preset['strategy_name']])
+            continue
+        try:
+            # 3. Run the Backtest
+            backtest_start = time.perf_counter()
+            stats, path = _backtest_preset(data, strategy_preset, indicator_cache, execution)
+            if stats is None:
+                results.append(JobFailure(symbol, strategy_preset['strategy_name'], "Could not load strategy class"))
+                continue
+
+            # 4. Extract Key Performance Indicators (KPIs), keyed for incremental updates
+            kpis_start = time.perf_counter()
+            kpis = _extract_kpis(symbol, strategy_preset, stats)
+            kpis['preset_hash'] = compute_preset_hash(strategy_preset)
+            kpis['data_fingerprint'] = fingerprint
+            results.append(kpis)
+
+            _JOB_METRICS.append({
+                'symbol': symbol,
+                'strategy_name': strategy_preset['strategy_name'],
+                'bars': len(data),
+                'execution_path': path,
+                'load_s': load_share,
+                'indicators_s': indicators_share,
+                'backtest_s': kpis_start - backtest_start, # Includes backtesting.py's own stats
+                'kpis_s': time.perf_counter() - kpis_start,
+                'worker_pid': os.getpid(),
+                'worker_peak_rss_mb': _peak_rss_mb(),
+            })
+
+        except Exception as e:
+            # This is the critical Error Isolation block
+            logging.error(f"FAIL: Backtest for '{symbol}' with '{strategy_preset['strategy_name']}' failed. Reason: {e}", exc_info=False)
+            results.append(JobFailure(symbol, strategy_preset['strategy_name'], str(e)))
+
+    return results
+
+def _execute_single_backtest(args):
+    """
+    Executes a single (symbol, preset) backtest job. Returns its KPI dict, or a JobFailure.
+    """
+    symbol, strategy_preset, execution, store_dir = args
+    return _execute_symbol_batch((symbol, [strategy_preset], execution, store_dir))[0]
+
+# --- Walk-Forward Windows ---
+
+# {(symbol, fingerprint): indicator_cache} for the symbol a worker saw last. Window jobs
+# are dispatched symbol-major, so a worker usually computes a symbol's indicators once.
+_WINDOW_INDICATORS = {}
+
+def walk_forward_windows(n_bars, train_bars, test_bars, step_bars):
+    """Returns (train_start, test_start, test_stop) bar offsets of every window that fits in `n_bars`."""
+    last_start = n_bars - train_bars - test_bars
+    return [(start, start + train_bars, start + train_bars + test_bars) for start in range(0, last_start + 1, step_bars)]
+
+def _window_indicators(symbol, data, fingerprint, indicator_strings):
+    """Full-history indicators for a symbol, reused across the window jobs a worker receives."""
+    key = (symbol, fingerprint)
+    if key not in _WINDOW_INDICATORS:
+        _WINDOW_INDICATORS.clear()
+        _WINDOW_INDICATORS[key] = {}
+    return _precompute_indicators(data, indicator_strings, cache=_WINDOW_INDICATORS[key], symbol=symbol, fingerprint=fingerprint)
+
+def _execute_window(args):
+    """
+    Backtests every preset on one walk-forward window of a symbol: once on the train
+    segment and once on the following test segment, each starting with fresh cash.
+
+    Segments are slices of the shared store frame, and indicators are computed over the
+    full history and sliced too, so a segment has no warm-up gap of its own.
+    Returns one KPI dict per (preset, segment), or a JobFailure per failed preset.
+    """
+    symbol, strategy_presets, window, bounds, execution, store_dir = args
+    _attach_store(store_dir)
+    train_start, test_start, test_stop = bounds
+    segments = {'train': (train_start, test_start), 'test': (test_start, test_stop)}
+    indicator_strings, invalid = _preset_operands(symbol, strategy_presets)
+
+    try:
+        data = _load_symbol_data(symbol)
+        fingerprint = _symbol_fingerprint(symbol, data)
+        indicator_cache = _window_indicators(symbol, data, fingerprint, indicator_strings)
+    except Exception as e:
+        logging.error(f"FAIL: Could not prepare data for '{symbol}'. Reason: {e}", exc_info=False)
+        return [JobFailure(symbol, preset['strategy_name'], f"Could not prepare data: {e}") for preset in strategy_presets]
+
+    results = []
+    for strategy_preset in strategy_presets:
+        if strategy_preset['strategy_name'] in invalid:
+            results.append(invalid[strategy_preset['strategy_name']])
+            continue
+        try:
+            window_rows = [] # Kept only if both segments succeed, so no train row is left without its test row
+            for segment, (start, stop) in segments.items():
+                segment_indicators = {k: v[start:stop] for k, v in indicator_cache.items()}
+                stats, _ = _backtest_preset(data.iloc[start:stop], strategy_preset, segment_indicators, execution)
+                if stats is None:
+                    raise RuntimeError("Could not load strategy class")
+
+                kpis = _extract_kpis(symbol, strategy_preset, stats)
+                kpis.update({'window': window, 'segment': segment,
+                             'preset_hash': compute_preset_hash(strategy_preset), 'data_fingerprint': fingerprint})
+                window_rows.append(kpis)
+            results.extend(window_rows)
+        except Exception as e:
+            logging.error(f"FAIL: Window {window} for '{symbol}' with '{strategy_preset['strategy_name']}' failed. Reason: {e}", exc_info=False)
+            results.append(JobFailure(symbol, strategy_preset['strategy_name'], f"Window {window}: {e}"))
+    return results
+
+# --- Job Scheduling ---
+
+def _count_conditions(rules):
+    def count(group):
+        return sum(1 if item.get('type') == 'condition' else count(item) if item.get('type') == 'group' else 0
+                   for item in group.get('conditions', []))
+    if not isinstance(rules, dict):
+        return 0
+    return sum(count(group) for rule_type in ['entry', 'exit'] for group in rules.get(rule_type, []))
+
+def rule_complexity(strategy_preset):
+    """
+    A rough per-bar cost weight for a preset: 1 + its condition count + its distinct indicators.
+    Rules that can't be parsed weigh 1; the preset's jobs then fail on their own in the workers.
+    """
+    try:
+        rules = strategy_preset.get("parameters", {}).get("rules")
+        return 1 + _count_conditions(rules) + len(extract_indicator_strings(rules))
+    except Exception as e:
+        logging.debug(f"Can't estimate the cost of '{strategy_preset.get('strategy_name')}': {e}")
+        return 1
+
+def schedule_bundles(costs, n_workers, bundles_per_worker=4):
+    """
+    Orders tasks longest-first and groups them into bundles of task indices.
+
+    Each bundle targets (cost not yet bundled) / (n_workers * bundles_per_worker), so the
+    expensive tasks at the front go out alone while the cheap tail is packed into a few
+    bundles early on and into single tasks at the very end, where they fill idle workers.
+    """
+    order = sorted(range(len(costs)), key=lambda i: costs[i], reverse=True)
+    remaining = float(sum(costs))
+    target = remaining / (n_workers * bundles_per_worker)
+
+    bundles, current, current_cost = [], [], 0.0
+    for i in order:
+        current.append(i)
+        current_cost += costs[i]
+        if current_cost >= target:
+            bundles.append(current)
+            remaining -= current_cost
+            current, current_cost = [], 0.0
+            target = remaining / (n_workers * bundles_per_worker)
+    if current:
+        bundles.append(current)
+    return bundles
+
+def _run_task_bundle(bundle):
+    """
+    Runs a bundle of (function, args) tasks in one worker round trip, under cProfile if a
+    profile directory is given. Returns (pid, busy seconds, results, job metrics).
+    """
+    tasks, profile_dir = bundle
+    profiler = cProfile.Profile() if profile_dir else None
+
+    start = time.perf_counter()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        results = [func(args) for func, args in tasks]
+    finally:
+        if profiler is not None:
+            profiler.disable()
+    busy_seconds = time.perf_counter() - start
+
+    if profiler is not None:
+        profiler.dump_stats(Path(profile_dir) / f"bundle-{os.getpid()}-{uuid.uuid4().hex[:8]}.prof")
+    metrics = list(_JOB_METRICS)
+    _JOB_METRICS.clear()
+    return os.getpid(), busy_seconds, results, metrics
 
 # --- Main Performance Engine Class ---
 
@@ -140,10 +499,32 @@ class PerformanceEngine:
     """
     Manages the creation and updating of the performance library.
     """
-    def __init__(self, stock_universe, strategy_presets_files):
+    def __init__(self, stock_universe, strategy_presets_files, pool=None, profile_jobs=0):
+        """
+        Args:
+            stock_universe (list): Symbols to backtest.
+            strategy_presets_files (list): Preset file names (without .json).
+            pool (multiprocessing.Pool): An existing worker pool to run jobs on (e.g. the
+                engine service's warm pool). By default each run starts its own.
+            profile_jobs (int): Run about this many sampled tasks under cProfile and write
+                one merged report to logs/profiles/. 0 disables profiling.
+        """
         self.stock_universe = stock_universe
+        self.pool = pool
+        self.profile_jobs = profile_jobs
         self.strategy_presets = self._load_strategy_presets(strategy_presets_files)
         self.library_path = Path(PATHS.get("performance_library"))
+        self.library = PerformanceLibraryStore(self.library_path)
+        self.ledger = JobLedger(PATHS.get("engine_ledger", "data/engine_ledger.duckdb"))
+        self.walk_forward_library = PerformanceLibraryStore(
+            Path(PATHS.get("walk_forward_library", "data/walk_forward_library.parquet")),
+            key_columns=WALK_FORWARD_KEY_COLUMNS,
+        )
+        # Per-job phase timings, one row per job and run (nothing is superseded)
+        self.metrics = PerformanceLibraryStore(
+            Path(PATHS.get("engine_metrics", "data/engine_metrics.parquet")),
+            key_columns=['run_id', 'symbol', 'strategy_name'],
+        )
 
     def _load_strategy_presets(self, preset_files):
         """Loads strategy configurations from JSON files."""
@@ -163,77 +544,354 @@ class PerformanceEngine:
         """Generates all possible (symbol, strategy) job combinations."""
         return [(symbol, preset) for symbol in self.stock_universe for preset in self.strategy_presets.values()]
 
-    def run(self, mode='update'):
+    @staticmethod
+    def _get_stale_jobs(all_jobs, existing_library, store):
+        """
+        Returns the jobs whose library row is missing or out of date.
+
+        A row is current only if it was produced from the same preset JSON (preset_hash)
+        and the same market data (data_fingerprint) as the job would use now. Rows
+        written before these columns existed never match, so they are re-run once.
+        """
+        keyed = existing_library.reindex(columns=['symbol', 'strategy_name', 'preset_hash', 'data_fingerprint'])
+        current_keys = set(keyed.itertuples(index=False, name=None))
+
+        stale_jobs = []
+        for symbol, preset in all_jobs:
+            key = (symbol, preset['strategy_name'], compute_preset_hash(preset), store.fingerprint(symbol))
+            if key not in current_keys:
+                stale_jobs.append((symbol, preset))
+        return stale_jobs
+
+    @staticmethod
+    def _group_jobs_by_symbol(jobs):
+        """Groups (symbol, preset) jobs into symbol-major (symbol, [presets]) batches, keeping job order."""
+        batches = {}
+        for symbol, preset in jobs:
+            batches.setdefault(symbol, []).append(preset)
+        return list(batches.items())
+
+    def run(self, mode='update', job_mode='symbol', execution='vectorized'):
         """
         Main entry point to run the engine.
         
         Args:
-            mode (str): 'update' to run only missing jobs, 'full' to rebuild entire library.
+            mode (str): 'update' to run only missing or stale jobs (preset JSON or market
+                data changed since the row was written), 'full' to rebuild entire library.
+            job_mode (str): 'symbol' to send each worker one symbol with all of its presets
+                (one data load and indicator pass per symbol), 'single' for one job per preset.
+            execution (str): 'vectorized' to compile rule presets into signal arrays (falling
+                back to backtesting.py for anything it can't express), 'event' to always
+                run the bar-by-bar backtesting.py loop.
         """
         logging.info(f"--- Performance Engine Started (Mode: {mode.upper()}) ---")
         
         all_jobs = self._get_job_list()
-        jobs_to_run = []
-
-        # 1. Intelligent Delta Update Logic
-        existing_library = None
-        if mode == 'update' and self.library_path.exists():
-            logging.info(f"Loading existing library from: {self.library_path}")
-            existing_library = pd.read_parquet(self.library_path)
-            
-            # Create a unique identifier for existing jobs
-            existing_jobs_set = set(zip(existing_library['symbol'], existing_library['strategy_name']))
-            
-            # Determine which jobs are missing
-            for symbol, preset in all_jobs:
-                if (symbol, preset['strategy_name']) not in existing_jobs_set:
-                    jobs_to_run.append((symbol, preset))
-            
-            if not jobs_to_run:
-                logging.info("Performance library is already up-to-date. No new jobs to run.")
-                return
-        else:
-            jobs_to_run = all_jobs
-            if mode == 'full':
-                logging.info("Full rebuild requested. All existing results will be replaced.")
+        start_time = time.time()
 
-        logging.info(f"Found {len(jobs_to_run)} new jobs to run out of {len(all_jobs)} total possible combinations.")
+        # Read the whole universe once; workers attach to the memory-mapped copy.
+        # The store also fingerprints each ticker's data for the update check below.
+        with tempfile.TemporaryDirectory(prefix="foundry_market_store_") as store_dir:
+            store = MarketDataStore.build(PATHS.get("market_data_db"), sorted(set(self.stock_universe)), store_dir)
+            logger.info(f"Loaded {len(store.dates)} bars for {len(store.index)} symbols into the shared store.")
+
+            # 1. Intelligent Delta Update Logic
+            if mode == 'update' and self.library.exists():
+                logging.info(f"Loading existing library keys from: {self.library_path}")
+                existing_library = self.library.read(columns=['preset_hash', 'data_fingerprint'])
+                jobs_to_run = self._get_stale_jobs(all_jobs, existing_library, store)
+
+                if not jobs_to_run:
+                    logging.info("Performance library is already up-to-date. No new jobs to run.")
+                    return
+            else:
+                jobs_to_run = all_jobs
+                if mode == 'full':
+                    logging.info("Full rebuild requested. All existing results will be replaced.")
+
+            logging.info(f"Found {len(jobs_to_run)} new or stale jobs to run out of {len(all_jobs)} total possible combinations.")
+
+            # 2. Checkpoint the job list before any work starts, so the run can be resumed
+            run_id = new_run_id()
+            spec = {'stocks': list(self.stock_universe), 'strategies': list(self.strategy_presets),
+                    'mode': mode, 'job_mode': job_mode, 'execution': execution}
+            self.ledger.start_run(run_id, spec, [(symbol, preset['strategy_name']) for symbol, preset in jobs_to_run])
+            logger.info(f"Started engine run {run_id}.")
+
+            # 3. Parallel Processing, streaming each finished result into the library
+            self._run_jobs(run_id, jobs_to_run, store, job_mode, execution)
+
+        # 4. Finalize the library
+        self._finalize_run(run_id, mode, len(jobs_to_run), start_time)
+
+    @classmethod
+    def resume(cls, run_id=None, retry_failed=False, pool=None):
+        """
+        Resumes an interrupted run from the job ledger, re-running only its unfinished jobs.
 
-        # 2. Parallel Processing
-        start_time = time.time()
-        results = []
-        # Use slightly less than all cores to keep system responsive
-        cpu_count = max(1, multiprocessing.cpu_count() - 1) 
-        
-        with multiprocessing.Pool(processes=cpu_count) as pool:
-            # Use tqdm for a live progress bar in the console/log
-            results = list(tqdm(pool.imap(_execute_single_backtest, jobs_to_run), total=len(jobs_to_run), desc="Running Backtests"))
+        Args:
+            run_id (str): The run to resume; defaults to the latest unfinished run.
+            retry_failed (bool): Also re-run jobs that failed, instead of only pending ones.
+            pool (multiprocessing.Pool): Optional worker pool, as in __init__.
+        """
+        ledger = JobLedger(PATHS.get("engine_ledger", "data/engine_ledger.duckdb"))
+        run = ledger.find_run(run_id)
+        if run is None:
+            logging.info("No unfinished engine run to resume.")
+            return
+        spec = run['spec']
+        logging.info(f"--- Resuming engine run {run['run_id']} (Mode: {spec['mode'].upper()}) ---")
 
-        # 3. Process and Save Results
-        # Filter out failed jobs (which return None)
-        successful_results = [res for res in results if res is not None]
-        
-        logging.info(f"Successfully completed {len(successful_results)} out of {len(jobs_to_run)} jobs.")
+        engine = cls(stock_universe=spec['stocks'], strategy_presets_files=spec['strategies'], pool=pool)
+        engine._resume_run(run['run_id'], spec, retry_failed)
 
-        if not successful_results:
+    def _resume_run(self, run_id, spec, retry_failed):
+        start_time = time.time()
+        presets_by_name = {preset['strategy_name']: preset for preset in self.strategy_presets.values()}
+
+        jobs_to_run, missing = [], []
+        for symbol, strategy_name in self.ledger.unfinished_jobs(run_id, retry_failed):
+            if strategy_name in presets_by_name:
+                jobs_to_run.append((symbol, presets_by_name[strategy_name]))
+            else:
+                missing.append((symbol, strategy_name, "Strategy preset is no longer available"))
+        self.ledger.mark_failed(run_id, missing)
+        logging.info(f"Found {len(jobs_to_run)} unfinished jobs to run.")
+
+        if jobs_to_run:
+            with tempfile.TemporaryDirectory(prefix="foundry_market_store_") as store_dir:
+                symbols = sorted({symbol for symbol, _ in jobs_to_run})
+                store = MarketDataStore.build(PATHS.get("market_data_db"), symbols, store_dir)
+                self._run_jobs(run_id, jobs_to_run, store, spec['job_mode'], spec['execution'])
+
+        self._finalize_run(run_id, spec['mode'], len(jobs_to_run), start_time)
+
+    def _run_jobs(self, run_id, jobs_to_run, store, job_mode, execution):
+        """
+        Runs the jobs on a worker pool and appends the results to the library under `run_id`.
+        Jobs are marked done in the ledger only once their part file is written.
+        """
+        def checkpoint(rows):
+            self.ledger.mark_done(run_id, [(row['symbol'], row['strategy_name']) for row in rows])
+
+        phase_totals = {}
+        def record_metrics(rows):
+            for row in rows:
+                metrics_writer.add(row)
+                for phase in ['load_s', 'indicators_s', 'backtest_s', 'kpis_s']:
+                    phase_totals[phase] = phase_totals.get(phase, 0.0) + row[phase]
+
+        with self._worker_pool() as pool, \
+                LibraryWriter(self.library, run_id=run_id, on_flush=checkpoint) as writer, \
+                LibraryWriter(self.metrics, run_id=run_id, flush_rows=1000) as metrics_writer:
+            for result in self._iter_results(pool, jobs_to_run, store, job_mode, execution, record_metrics):
+                if isinstance(result, JobFailure):
+                    # Recorded with its error; a resume does not retry it unless asked to
+                    self.ledger.mark_failed(run_id, [result])
+                else:
+                    writer.add(result)
+
+        logging.info(f"Successfully completed {writer.rows_written} out of {len(jobs_to_run)} jobs.")
+        if phase_totals:
+            logger.info("Time per phase (summed over jobs): " + ", ".join(f"{k[:-2]} {v:.2f}s" for k, v in phase_totals.items()))
+
+    def _finalize_run(self, run_id, mode, jobs_run, start_time):
+        """Marks the run complete and, for a full rebuild, drops the rows of every other run."""
+        self.ledger.finish_run(run_id)
+        self._trim_indicator_cache()
+        summary = self.ledger.summary(run_id)
+        logging.info(f"Run {run_id}: {summary.get(DONE, 0)} jobs done, {summary.get(FAILED, 0)} failed.")
+
+        if not summary.get(DONE):
             logging.warning("No new results were generated.")
             return
 
-        new_results_df = pd.DataFrame(successful_results)
-
-        # 4. Combine and Save
-        if mode == 'update' and existing_library is not None:
-            final_library_df = pd.concat([existing_library, new_results_df], ignore_index=True)
+        if mode == 'full':
+            # Only now that the rebuild is on disk are the previous runs dropped
+            self.library.remove_runs_except(run_id)
+        # Compaction drops superseded rows, which an interrupted run may still need once resumed
+        unfinished = self.ledger.running_runs()
+        if unfinished:
+            logging.info(f"Not compacting the library while {len(unfinished)} run(s) are unfinished: {', '.join(unfinished)}")
         else:
-            final_library_df = new_results_df
-        
-        self.library_path.parent.mkdir(exist_ok=True)
-        final_library_df.to_parquet(self.library_path)
+            self.library.compact_if_needed()
 
         end_time = time.time()
         logging.info(f"Performance library saved to {self.library_path}")
-        logging.info(f"--- Engine run finished in {end_time - start_time:.2f} seconds. ---")
+        logging.info(f"--- Engine run finished in {end_time - start_time:.2f} seconds ({jobs_run} jobs). ---")
+
+    def run_walk_forward(self, train_bars, test_bars, step_bars=None, execution='vectorized'):
+        """
+        Runs every preset over rolling train/test windows and stores per-window KPIs
+        in the walk-forward library (one row per window and segment).
+
+        Args:
+            train_bars (int): Bars in each window's train (in-sample) segment.
+            test_bars (int): Bars in the test (out-of-sample) segment that follows it.
+            step_bars (int): Bars between window starts; defaults to `test_bars`, so the
+                test segments tile the history without overlapping.
+            execution (str): 'vectorized' or 'event', as in run().
+        """
+        step_bars = step_bars or test_bars
+        if min(train_bars, test_bars, step_bars) < 1:
+            raise ValueError("train_bars, test_bars and step_bars must be positive")
 
+        logging.info(f"--- Walk-Forward Run Started (train={train_bars}, test={test_bars}, step={step_bars}) ---")
+        start_time = time.time()
+        presets = list(self.strategy_presets.values())
+
+        with tempfile.TemporaryDirectory(prefix="foundry_market_store_") as store_dir:
+            store = MarketDataStore.build(PATHS.get("market_data_db"), sorted(set(self.stock_universe)), store_dir)
+
+            # 1. One job per (symbol, window), symbol-major so workers can reuse a symbol's indicators
+            window_tasks = []
+            for symbol in self.stock_universe:
+                if symbol not in store:
+                    logging.warning(f"SKIPPING: No market data found for symbol '{symbol}'.")
+                    continue
+                start, stop = store.index[symbol]
+                windows = walk_forward_windows(stop - start, train_bars, test_bars, step_bars)
+                if not windows:
+                    logging.warning(f"SKIPPING: '{symbol}' has fewer than {train_bars + test_bars} bars.")
+                window_tasks += [(_execute_window, (symbol, presets, window, bounds, execution, store_dir))
+                                 for window, bounds in enumerate(windows)]
+            logging.info(f"Found {len(window_tasks)} windows across {len(self.stock_universe)} symbols.")
+
+            # 2. Windows run in parallel; every worker slices the same memory-mapped data
+            window_config = {'train_bars': train_bars, 'test_bars': test_bars, 'step_bars': step_bars}
+            window_cost = (train_bars + test_bars) * sum(rule_complexity(preset) for preset in presets)
+            with self._worker_pool() as pool, \
+                    LibraryWriter(self.walk_forward_library) as writer, \
+                    tqdm(total=len(window_tasks), desc="Running Windows") as progress:
+                for window_results in self._run_scheduled(pool, window_tasks, [window_cost] * len(window_tasks)):
+                    progress.update(1)
+                    for result in window_results:
+                        if not isinstance(result, JobFailure):
+                            writer.add({**result, **window_config})
+        self._trim_indicator_cache()
+
+        if not writer.rows_written:
+            logging.warning("No walk-forward results were generated.")
+            return
+        self.walk_forward_library.compact_if_needed()
+        logging.info(f"Saved {writer.rows_written} window results to {self.walk_forward_library.path}")
+        logging.info(f"--- Walk-forward run finished in {time.time() - start_time:.2f} seconds. ---")
+
+    def _trim_indicator_cache(self):
+        """Evicts least recently used indicators once the run's workers are done writing them."""
+        indicator_cache = _indicator_cache()
+        if indicator_cache is not None:
+            removed = indicator_cache.evict()
+            if removed:
+                logger.info(f"Evicted {removed} least recently used entries from the indicator cache.")
+
+    @contextmanager
+    def _worker_pool(self):
+        """Yields the engine's shared pool if it has one, otherwise a pool for this run only."""
+        if self.pool is not None:
+            yield self.pool
+            return
+        # Use slightly less than all cores to keep system responsive
+        cpu_count = max(1, multiprocessing.cpu_count() - 1)
+        with multiprocessing.Pool(processes=cpu_count) as pool:
+            yield pool
+
+    def _iter_results(self, pool, jobs_to_run, store, job_mode, execution, metrics_sink=None):
+        """
+        Dispatches the jobs to the pool and yields one KPI dict (or JobFailure) per job as they finish.
+        Per-job timing rows are passed to `metrics_sink(rows)` as they arrive.
+        """
+        store_dir = str(store.store_dir)
+        complexity = {preset['strategy_name']: rule_complexity(preset) for _, preset in jobs_to_run}
+
+        # Estimated cost of a job: bars x rule complexity, so the scheduler can start the longest first
+        if job_mode == 'symbol':
+            batches = self._group_jobs_by_symbol(jobs_to_run)
+            logger.info(f"Batched {len(jobs_to_run)} jobs into {len(batches)} symbol batches.")
+            tasks = [(_execute_symbol_batch, (symbol, presets, execution, store_dir)) for symbol, presets in batches]
+            costs = [store.bar_count(symbol) * sum(complexity[p['strategy_name']] for p in presets) for symbol, presets in batches]
+        else:
+            tasks = [(_execute_single_backtest, (symbol, preset, execution, store_dir)) for symbol, preset in jobs_to_run]
+            costs = [store.bar_count(symbol) * complexity[preset['strategy_name']] for symbol, preset in jobs_to_run]
+
+        # Use tqdm for a live progress bar in the console/log
+        with tqdm(total=len(jobs_to_run), desc="Running Backtests") as progress:
+            for result in self._run_scheduled(pool, tasks, costs, metrics_sink):
+                if job_mode == 'symbol':
+                    progress.update(len(result))
+                    yield from result
+                else:
+                    progress.update(1)
+                    yield result
+
+    def _run_scheduled(self, pool, tasks, costs, metrics_sink=None):
+        """
+        Runs (function, args) tasks on the pool, longest first and in cost-sized bundles
+        (see schedule_bundles), yielding each task's result as its bundle completes.
+        Logs how busy each worker was over the run's wall time at the end.
+        """
+        n_workers = getattr(pool, '_processes', None) or multiprocessing.cpu_count()
+        bundles = schedule_bundles(costs, n_workers)
+        logger.info(f"Scheduled {len(tasks)} tasks longest-first in {len(bundles)} bundles over {n_workers} workers.")
+
+        with tempfile.TemporaryDirectory(prefix="foundry_profile_") as profile_dir:
+            profiled = self._sample_bundles(bundles, self.profile_jobs)
+            bundle_args = [([tasks[i] for i in bundle], profile_dir if b in profiled else None)
+                           for b, bundle in enumerate(bundles)]
+
+            busy = {}
+            start = time.perf_counter()
+            for pid, busy_seconds, results, metrics in pool.imap_unordered(_run_task_bundle, bundle_args):
+                busy[pid] = busy.get(pid, 0.0) + busy_seconds
+                if metrics and metrics_sink is not None:
+                    metrics_sink(metrics)
+                yield from results
+            self._log_utilization(busy, time.perf_counter() - start, n_workers)
+
+            if profiled:
+                self._write_profile_report(profile_dir)
+
+    @staticmethod
+    def _sample_bundles(bundles, n_tasks):
+        """Picks a reproducible random set of bundle indices covering about `n_tasks` tasks."""
+        if n_tasks <= 0:
+            return set()
+        order = list(range(len(bundles)))
+        random.Random(0).shuffle(order)
+        sampled, covered = set(), 0
+        for b in order:
+            if covered >= n_tasks:
+                break
+            sampled.add(b)
+            covered += len(bundles[b])
+        return sampled
+
+    @staticmethod
+    def _write_profile_report(profile_dir):
+        """Merges the sampled bundles' cProfile dumps into one .prof file and a text report."""
+        dumps = sorted(Path(profile_dir).glob("*.prof"))
+        if not dumps:
+            return
+        report_dir = Path(PATHS.get("log_file", "logs/engine.log")).parent / "profiles"
+        report_dir.mkdir(parents=True, exist_ok=True)
+        report_path = report_dir / f"engine-{new_run_id()}"
+
+        merged = pstats.Stats(*[str(d) for d in dumps])
+        merged.dump_stats(str(report_path.with_suffix(".prof")))
+        with open(report_path.with_suffix(".txt"), 'w') as f:
+            merged.stream = f
+            f.write(f"Merged cProfile report of {len(dumps)} sampled task bundles\n\n")
+            merged.sort_stats('cumulative').print_stats(40)
+            merged.sort_stats('tottime').print_stats(20)
+        logger.info(f"Profile of the sampled jobs written to {report_path.with_suffix('.txt')}")
+
+    @staticmethod
+    def _log_utilization(busy, wall_seconds, n_workers):
+        if not busy or wall_seconds <= 0:
+            return
+        overall = sum(busy.values()) / (wall_seconds * n_workers)
+        per_worker = ", ".join(f"pid {pid}: {seconds:.2f}s ({seconds / wall_seconds:.0%})" for pid, seconds in sorted(busy.items()))
+        logger.info(f"Worker utilization over {wall_seconds:.2f}s wall: {overall:.0%} overall | busy per worker: {per_worker}")
 
 if __name__ == '__main__':
     """
@@ -247,30 +905,83 @@ if __name__ == '__main__':
     parser.add_argument(
         '--stocks',
         nargs='+',  # This means it accepts one or more stock symbols
-        required=True,
         help="List of stock symbols to run backtests on (e.g., NSE:RELIANCE-EQ NSE:TCS-EQ)"
     )
+    parser.add_argument(
+        '--universe',
+        help="Name of a stock universe in the universes file to run instead of --stocks."
+    )
     parser.add_argument(
         '--strategies',
         nargs='+',
-        required=True,
         help="List of strategy preset filenames (without .json extension)"
     )
+    parser.add_argument(
+        '--resume',
+        nargs='?',
+        const='latest',
+        metavar='RUN_ID',
+        help="Resume an interrupted run (the latest one if no RUN_ID is given), re-running only its unfinished jobs."
+    )
+    parser.add_argument(
+        '--retry-failed',
+        action='store_true',
+        help="With --resume, also re-run the jobs that failed."
+    )
+    parser.add_argument(
+        '--profile',
+        type=int,
+        nargs='?',
+        const=20,
+        default=0,
+        metavar='N',
+        help="Profile a sample of about N jobs (default 20) with cProfile and write a merged report to logs/profiles/."
+    )
+    parser.add_argument(
+        '--walk-forward',
+        action='store_true',
+        help="Run rolling train/test windows (see --train-bars/--test-bars/--step-bars) into the walk-forward library."
+    )
+    parser.add_argument('--train-bars', type=int, default=504, help="Walk-forward train segment length in bars (default: 504).")
+    parser.add_argument('--test-bars', type=int, default=126, help="Walk-forward test segment length in bars (default: 126).")
+    parser.add_argument('--step-bars', type=int, default=None, help="Bars between walk-forward windows (default: --test-bars).")
     parser.add_argument(
         '--mode',
         choices=['update', 'full'],
         default='update',
         help="Run mode: 'update' (default) or 'full' for a complete rebuild."
     )
+    parser.add_argument(
+        '--job-mode',
+        choices=['symbol', 'single'],
+        default='symbol',
+        help="'symbol' (default) batches all presets of a symbol into one job; 'single' runs one job per preset."
+    )
+    parser.add_argument(
+        '--execution',
+        choices=['vectorized', 'event'],
+        default='vectorized',
+        help="'vectorized' (default) uses the compiled fast path for rule presets; 'event' always runs the bar-by-bar backtest."
+    )
     
     args = parser.parse_args()
 
     logger.info("--- Running Performance Engine via Command Line ---")
-    
-    # INITIALIZE AND RUN THE ENGINE with arguments from the command line
-    engine = PerformanceEngine(
-        stock_universe=args.stocks,
-        strategy_presets_files=args.strategies
-    )
-    
-    engine.run(mode=args.mode)
\ No newline at end of file
+
+    if args.resume:
+        PerformanceEngine.resume(run_id=None if args.resume == 'latest' else args.resume, retry_failed=args.retry_failed)
+    else:
+        if not (args.stocks or args.universe) or not args.strategies:
+            parser.error("--stocks (or --universe) and --strategies are required unless --resume is given")
+
+        # INITIALIZE AND RUN THE ENGINE with arguments from the command line
+        engine = PerformanceEngine(
+            stock_universe=args.stocks or load_universe_symbols(args.universe),
+            strategy_presets_files=args.strategies,
+            profile_jobs=args.profile
+        )
+
+        if args.walk_forward:
+            engine.run_walk_forward(args.train_bars, args.test_bars, args.step_bars, execution=args.execution)
+        else:
+            engine.run(mode=args.mode, job_mode=args.job_mode, execution=args.execution)
\ No newline at end of file
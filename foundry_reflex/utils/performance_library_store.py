@@ -0,0 +1,179 @@
+# In: foundry_reflex/utils/performance_library_store.py
+
+import os
+import time
+import uuid
+from pathlib import Path
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+
+# Walk-forward rows are per window and segment, and per window configuration.
+WALK_FORWARD_KEY_COLUMNS = ['symbol', 'strategy_name', 'train_bars', 'test_bars', 'step_bars', 'window', 'segment']
+
+
+def new_run_id():
+    """A sortable, unique id for one engine run (UTC timestamp + random suffix)."""
+    return f"{time.strftime('%Y%m%dT%H%M%S', time.gmtime())}-{uuid.uuid4().hex[:6]}"
+
+
+class PerformanceLibraryStore:
+    """
+    The performance library as an append-only, partitioned parquet dataset.
+
+    `path` is a directory of `part-<run_id>-<seq>.parquet` files. Every engine run
+    appends its results in small batches as they complete, so write cost follows
+    the size of the delta and finished results survive a crash. Readers see one
+    row per key: the one written by the latest run.
+    """
+    KEY_COLUMNS = ['symbol', 'strategy_name']
+    PART_GLOB = "part-*.parquet"
+
+    def __init__(self, path, key_columns=None, compact_threshold=64):
+        self.path = Path(path)
+        self.key_columns = key_columns or self.KEY_COLUMNS
+        self.compact_threshold = compact_threshold
+
+    def exists(self):
+        return self.path.exists() and (self.path.is_file() or any(self.path.glob(self.PART_GLOB)))
+
+    def _migrate_legacy_file(self):
+        """Turns a single-file library (the old format) into the first part of the dataset."""
+        if not self.path.is_file():
+            return
+        staging = self.path.with_name(self.path.name + ".migrating")
+        os.replace(self.path, staging)
+        self.path.mkdir(parents=True)
+        # '00000000' sorts before any real run id, so every newer row supersedes it
+        os.replace(staging, self.path / "part-00000000T000000-legacy-00000.parquet")
+
+    def parts(self):
+        if self.path.is_file():
+            return [self.path] # Not migrated yet: the legacy file is the only part
+        if not self.path.is_dir():
+            return []
+        return sorted(self.path.glob(self.PART_GLOB))
+
+    def append(self, rows, run_id, seq):
+        """
+        Writes one batch of result dicts as a new part file and returns its path.
+        """
+        self._migrate_legacy_file()
+        self.path.mkdir(parents=True, exist_ok=True)
+        batch_df = pd.DataFrame(rows)
+        batch_df['run_id'] = run_id
+        part_path = self.path / f"part-{run_id}-{seq:05d}.parquet"
+        self._write_part(batch_df, part_path)
+        return part_path
+
+    @staticmethod
+    def _write_part(df, part_path):
+        """Writes a part under a temporary name and renames it, so readers never see half a part."""
+        tmp_path = part_path.with_name(part_path.name + ".tmp")
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, part_path)
+
+    def read(self, columns=None):
+        """Returns the current library: the latest row for every key, oldest run first."""
+        parts = self.parts()
+        if not parts:
+            return pd.DataFrame()
+
+        if columns is not None:
+            columns = list(dict.fromkeys([*columns, *self.key_columns, 'run_id']))
+        # Parts are read one by one so that older parts missing newer columns still load
+        frames = [pd.read_parquet(p, columns=self._available_columns(p, columns)) for p in parts]
+        library = pd.concat(frames, ignore_index=True)
+        if 'run_id' in library.columns:
+            library = library.sort_values('run_id', kind='stable', na_position='first')
+        return library.drop_duplicates(subset=self.key_columns, keep='last').reset_index(drop=True)
+
+    @staticmethod
+    def _available_columns(part_path, columns):
+        if columns is None:
+            return None
+        present = set(pq.read_schema(part_path).names)
+        return [c for c in columns if c in present]
+
+    def remove_runs_except(self, run_id):
+        """
+        Deletes every row not written by `run_id` (used after a successful full rebuild).
+        Rows are matched on their run_id column, not on part names: a compacted part holds
+        rows of many runs, so a part mixing runs is rewritten with only `run_id`'s rows.
+        """
+        self._migrate_legacy_file()
+        for part in self.parts():
+            if part.name.startswith(f"part-{run_id}-"):
+                continue # Appended by the run itself: only its own rows
+            if 'run_id' not in pq.read_schema(part).names:
+                part.unlink() # Legacy rows predate every run
+                continue
+            run_ids = pd.read_parquet(part, columns=['run_id'])['run_id']
+            keep = (run_ids == run_id).to_numpy()
+            if not keep.any():
+                part.unlink()
+            elif not keep.all():
+                part_df = pd.read_parquet(part)
+                self._write_part(part_df[keep].reset_index(drop=True), part)
+
+    def compact(self):
+        """Rewrites the dataset as a single part holding only the current rows."""
+        self._migrate_legacy_file()
+        parts = self.parts()
+        if len(parts) <= 1:
+            return
+        library = self.read()
+        run_id = new_run_id()
+        # Keep each row's original run_id; the compacted part name only needs to sort last
+        self._write_part(library, self.path / f"part-{run_id}-compacted.parquet")
+        for part in parts:
+            part.unlink()
+
+    def compact_if_needed(self):
+        if len(self.parts()) > self.compact_threshold:
+            self.compact()
+
+
+class LibraryWriter:
+    """
+    Buffers one run's results and appends them to the library every `flush_rows` rows.
+
+    `on_flush(rows)` is called after each part is safely on disk, e.g. to checkpoint
+    those jobs. Re-opening a writer for an existing run_id (a resumed run)
+    continues its part numbering.
+    """
+
+    def __init__(self, store, run_id=None, flush_rows=200, on_flush=None):
+        self.store = store
+        self.run_id = run_id or new_run_id()
+        self.flush_rows = flush_rows
+        self.on_flush = on_flush
+        self._buffer = []
+        self._seq = sum(1 for p in store.parts() if p.name.startswith(f"part-{self.run_id}-"))
+        self.rows_written = 0
+
+    def add(self, row):
+        self._buffer.append(row)
+        if len(self._buffer) >= self.flush_rows:
+            self.flush()
+
+    def flush(self):
+        """Writes buffered rows (if any) as one part. Returns the number of rows written."""
+        if not self._buffer:
+            return 0
+        self.store.append(self._buffer, self.run_id, self._seq)
+        rows, self._buffer = self._buffer, []
+        self._seq += 1
+        self.rows_written += len(rows)
+        if self.on_flush is not None:
+            self.on_flush(rows)
+        return len(rows)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # Flush on errors too: whatever finished before a crash is kept
+        self.flush()
+        return False
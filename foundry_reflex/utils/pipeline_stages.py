@@ -0,0 +1,215 @@
+# In: foundry_reflex/utils/pipeline_stages.py
+
+import hashlib
+import json
+import os
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Optional
+
+import pandas as pd
+
+from .logger_setup import get_logger
+
+logger = get_logger("pipeline_stages", "logs/pipeline.log")
+
+# Part of every input hash: bump it when a stage's logic changes, so old artifacts are never reused.
+ARTIFACT_VERSION = 1
+
+
+@dataclass
+class Stage:
+    """
+    One step of a pipeline DAG.
+
+    `run(inputs)` gets the outputs of `deps` ({name: output}) and returns this stage's
+    output: a DataFrame (stored as Parquet) or a JSON-serialisable value.
+    `fingerprint(inputs)` describes everything else the stage reads (settings, the
+    state of the tables it queries...) as a JSON-serialisable value. If the fingerprint
+    and the dependencies' outputs are unchanged since the stored artifact was made, the
+    artifact is loaded instead of running the stage. Without a fingerprint the stage
+    always runs.
+    """
+    name: str
+    run: Callable[[dict], object]
+    deps: tuple = ()
+    fingerprint: Optional[Callable[[dict], object]] = None
+
+
+def _digest(raw: bytes) -> str:
+    return hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+
+def output_hash(output) -> str:
+    """A content hash of a stage output, independent of how it is stored."""
+    if isinstance(output, pd.DataFrame):
+        columns = json.dumps([str(c) for c in output.columns]).encode()
+        return _digest(columns + pd.util.hash_pandas_object(output, index=True).values.tobytes())
+    return _digest(json.dumps(output, sort_keys=True, default=str).encode())
+
+
+@dataclass
+class StageArtifacts:
+    """
+    Stage outputs on disk: `<stage>.parquet` or `<stage>.json`, plus a `<stage>.manifest.json`
+    with the input hash it was made from and its output hash. Files are written under a
+    temporary name and renamed, the manifest last, so a crash never leaves a stage looking done.
+    """
+    artifact_dir: Path
+
+    def __post_init__(self):
+        self.artifact_dir = Path(self.artifact_dir)
+
+    def _atomic_write(self, path, write):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}-{uuid.uuid4().hex[:8]}.tmp")
+        try:
+            write(tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+    def manifest(self, name):
+        path = self.artifact_dir / f"{name}.manifest.json"
+        try:
+            return json.loads(path.read_text())
+        except (OSError, ValueError):
+            return None
+
+    def load(self, name):
+        """The stored output of a stage and its manifest, or (None, None) if there is no usable artifact."""
+        manifest = self.manifest(name)
+        if manifest is None:
+            return None, None
+        path = self.artifact_dir / manifest["file"]
+        try:
+            if manifest["format"] == "parquet":
+                return pd.read_parquet(path), manifest
+            return json.loads(path.read_text()), manifest
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable artifact of stage '{name}': {e}")
+            return None, None
+
+    def save(self, name, output, input_hash):
+        if isinstance(output, pd.DataFrame):
+            file, fmt = f"{name}.parquet", "parquet"
+            self._atomic_write(self.artifact_dir / file, lambda p: output.to_parquet(p, index=False))
+        else:
+            file, fmt = f"{name}.json", "json"
+            self._atomic_write(self.artifact_dir / file, lambda p: p.write_text(json.dumps(output, default=str, indent=2)))
+        manifest = {
+            "stage": name, "file": file, "format": fmt, "input_hash": input_hash,
+            "output_hash": output_hash(output), "created_at": time.strftime('%Y-%m-%dT%H:%M:%S'),
+        }
+        self._atomic_write(self.artifact_dir / f"{name}.manifest.json", lambda p: p.write_text(json.dumps(manifest, indent=2)))
+        return manifest
+
+
+def downstream(stages, from_stage):
+    """The names of `from_stage` and every stage that depends on it, directly or not."""
+    names = {from_stage}
+    for stage in stages: # Stages are declared in dependency order
+        if names.intersection(stage.deps):
+            names.add(stage.name)
+    return names
+
+
+def upstream(stages, from_stage):
+    """The names of every stage `from_stage` depends on, directly or not."""
+    by_name = {stage.name: stage for stage in stages}
+    names, todo = set(), list(by_name[from_stage].deps)
+    while todo:
+        name = todo.pop()
+        if name not in names:
+            names.add(name)
+            todo.extend(by_name[name].deps)
+    return names
+
+
+def run_stages(stages, artifacts: StageArtifacts, from_stage=None, max_workers=4):
+    """
+    Runs a stage DAG, each stage as soon as its dependencies are done, so independent
+    stages run concurrently in a thread pool.
+
+    A stage whose input hash matches its stored artifact is skipped and the artifact
+    loaded. With `from_stage`, that stage and everything downstream of it are re-run
+    regardless, and the stages it depends on are loaded from their artifacts without
+    being checked (they run only if they have none); other stages are checked as usual.
+
+    Args:
+        stages (list): Stage objects, declared in dependency order.
+        artifacts (StageArtifacts): Where outputs are stored.
+        from_stage (str): Re-run from this stage, e.g. to redo the analysis without refetching.
+
+    Returns:
+        dict: {stage name: output}. A failing stage's exception is raised once the stages
+            already running have finished; their artifacts are kept.
+    """
+    by_name = {stage.name: stage for stage in stages}
+    if from_stage is not None and from_stage not in by_name:
+        raise ValueError(f"Unknown stage '{from_stage}'. Stages: {', '.join(by_name)}")
+    forced = downstream(stages, from_stage) if from_stage is not None else set()
+    trusted = upstream(stages, from_stage) if from_stage is not None else set()
+
+    outputs, output_hashes = {}, {}
+
+    def execute(stage):
+        inputs = {dep: outputs[dep] for dep in stage.deps}
+        if stage.name in trusted:
+            output, manifest = artifacts.load(stage.name)
+            if manifest is not None:
+                logger.info(f"Stage '{stage.name}': using the stored artifact from {manifest['created_at']} (upstream of '{from_stage}').")
+                return output, manifest["output_hash"]
+
+        input_hash = None
+        if stage.fingerprint is not None:
+            key = {
+                "version": ARTIFACT_VERSION, "stage": stage.name,
+                "fingerprint": stage.fingerprint(inputs),
+                "deps": {dep: output_hashes[dep] for dep in stage.deps},
+            }
+            input_hash = _digest(json.dumps(key, sort_keys=True, default=str).encode())
+            if stage.name not in forced:
+                stored = artifacts.manifest(stage.name)
+                if stored is not None and stored.get("input_hash") == input_hash:
+                    output, manifest = artifacts.load(stage.name)
+                    if manifest is not None:
+                        logger.info(f"Stage '{stage.name}': inputs unchanged, skipped (artifact from {manifest['created_at']}).")
+                        return output, manifest["output_hash"]
+
+        start_time = time.time()
+        logger.info(f"Stage '{stage.name}': running...")
+        output = stage.run(inputs)
+        manifest = artifacts.save(stage.name, output, input_hash)
+        logger.info(f"Stage '{stage.name}': done in {time.time() - start_time:.2f}s.")
+        return output, manifest["output_hash"]
+
+    pending = list(stages)
+    running = {}
+    failure = None
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while pending or running:
+            if failure is None:
+                ready = [stage for stage in pending if all(dep in outputs for dep in stage.deps)]
+                for stage in ready:
+                    pending.remove(stage)
+                    running[executor.submit(execute, stage)] = stage
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage = running.pop(future)
+                try:
+                    outputs[stage.name], output_hashes[stage.name] = future.result()
+                except Exception as e:
+                    logger.error(f"Stage '{stage.name}' failed: {e}")
+                    failure = failure or e
+
+    if failure is not None:
+        raise failure
+    if pending:
+        raise RuntimeError(f"Stages with unmet dependencies: {', '.join(stage.name for stage in pending)}")
+    return outputs
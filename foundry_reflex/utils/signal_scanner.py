@@ -0,0 +1,196 @@
+# In: foundry_reflex/utils/signal_scanner.py
+
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parent.parent.parent))
+
+import time
+
+import numpy as np
+import pandas as pd
+import yaml
+
+from .data_io import get_strategy_presets, load_strategy_preset, load_universes
+from .logger_setup import get_logger
+from .market_data_store import OHLCV_COLUMNS, MarketDataStore
+from strategies.configurable_strategy import AVAILABLE_INDICATORS, compute_indicator, extract_indicator_strings
+from strategies.expressions import ExpressionError, lookback, parse_expression
+from strategies.vectorized_backtest import UnsupportedRuleError, compile_rule_signals
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+
+logger = get_logger("scanner", str(PROJECT_ROOT / "logs/scanner.log"))
+
+# One row per (symbol, preset): whether the preset's entry / exit rules fire on the symbol's latest bar.
+SCAN_COLUMNS = ['symbol', 'strategy_name', 'date', 'close', 'entry', 'exit', 'bars']
+
+
+def _scannable_presets(strategy_presets):
+    """
+    Keeps the rule-based ConfigurableStrategy presets (the only ones whose signals are
+    fully described by their JSON). Each kept preset's rules are compiled once here,
+    so malformed rules and unsupported operators are reported once, not per symbol.
+    """
+    scannable = []
+    for preset in strategy_presets:
+        name = preset.get("strategy_name", "?")
+        rules = preset.get("parameters", {}).get("rules")
+        if preset.get("strategy_class") != "ConfigurableStrategy" or not isinstance(rules, dict):
+            logger.warning(f"Skipping preset '{name}': only rule-based ConfigurableStrategy presets can be scanned.")
+            continue
+        try:
+            compile_rule_signals(rules, {}, 0, strict=False)
+        except UnsupportedRuleError as e:
+            logger.warning(f"Skipping preset '{name}': {e}")
+            continue
+        scannable.append(preset)
+    return scannable
+
+
+def _scan_operands(strategy_presets):
+    """
+    The distinct operands of the presets, and the trailing window that reproduces
+    their latest two values (the previous bar is needed for crossovers). The window
+    is None if some operand's indicator doesn't declare a lookback, in which case
+    full histories are read.
+    """
+    operands, window = set(), 1
+    for preset in strategy_presets:
+        for indicator_str in extract_indicator_strings(preset["parameters"]["rules"]):
+            try:
+                node = parse_expression(indicator_str)
+            except ExpressionError as e:
+                # Left out: the conditions using it are false, as in a backtest
+                logger.warning(f"Skipping invalid indicator format: '{indicator_str}' ({e})")
+                continue
+            operands.add(indicator_str)
+            bars = lookback(node, AVAILABLE_INDICATORS)
+            window = None if window is None or bars is None else max(window, bars)
+    return operands, (window + 1 if window is not None else None)
+
+
+def scan_signals(db_path, symbols, strategy_presets):
+    """
+    Evaluates every preset's entry and exit rules on every symbol's latest bar.
+
+    All symbols' trailing windows are read in one query, each symbol's operands are
+    computed once for all presets (with shared subexpressions), and each preset's rules
+    are compiled once over the last two bars of every symbol. No backtest is run.
+
+    Args:
+        db_path: The market data DuckDB file.
+        symbols (list): Tickers to scan.
+        strategy_presets (list): Preset dicts, as loaded from the presets directory.
+
+    Returns:
+        pd.DataFrame: SCAN_COLUMNS, one row per (symbol, preset) with data. `entry` and
+            `exit` tell whether the rules fire on the latest bar, so an order would be
+            placed at the next open; `bars` is how many bars the indicators were computed on.
+    """
+    start_time = time.time()
+    presets = _scannable_presets(strategy_presets)
+    operands, window = _scan_operands(presets)
+    if not presets or not symbols:
+        return pd.DataFrame(columns=SCAN_COLUMNS)
+
+    store = MarketDataStore.load(db_path, symbols, trailing_bars=window)
+    logger.info(
+        f"Scanning {len(store.symbols)}/{len(set(symbols))} symbols with data x {len(presets)} presets "
+        f"({'full history' if window is None else f'last {window} bars'})."
+    )
+
+    # Each operand's latest two values as a (2, symbols) matrix. A symbol whose operand
+    # failed, or with a single bar, gets NaN, which no comparison or crossover fires on.
+    symbols = store.symbols
+    latest = {indicator_str: np.full((2, len(symbols)), np.nan) for indicator_str in operands}
+    for column, symbol in enumerate(symbols):
+        data = store.arrays(symbol)
+        memo = {} # Shared by all the symbol's operands
+        for indicator_str in operands:
+            values = compute_indicator(indicator_str, data, memo)
+            if values is not None:
+                tail = values[-2:]
+                latest[indicator_str][2 - len(tail):, column] = tail
+
+    # Every preset's rules are compiled once, for all symbols together
+    last_rows = np.array([store.index[symbol][1] - 1 for symbol in symbols], dtype=np.int64)
+    scans = []
+    for preset in presets:
+        entry, exit_ = compile_rule_signals(
+            preset["parameters"]["rules"], latest, (2, len(symbols)), strict=False, quiet=True
+        )
+        scans.append(pd.DataFrame({
+            'symbol': symbols,
+            'strategy_name': preset["strategy_name"],
+            'date': store.dates[last_rows],
+            'close': store.values[last_rows, OHLCV_COLUMNS.index('Close')],
+            'entry': entry[-1],
+            'exit': exit_[-1],
+            'bars': [store.bar_count(symbol) for symbol in symbols],
+        }))
+
+    results = pd.concat(scans, ignore_index=True).sort_values('symbol', kind='stable', ignore_index=True)
+    logger.info(f"Scanned {len(results)} symbol/preset pairs in {time.time() - start_time:.2f}s.")
+    return results
+
+
+def load_scan_presets(presets_dir, preset_names=None):
+    """Loads the named presets (default: every preset in the directory), skipping unreadable ones."""
+    presets_dir = Path(presets_dir)
+    presets = []
+    for name in preset_names or get_strategy_presets(presets_dir):
+        try:
+            preset = load_strategy_preset(presets_dir, name)
+        except ValueError as e: # Malformed JSON
+            logger.error(f"Failed to load strategy preset '{name}.json'. Error: {e}")
+            continue
+        if preset is None:
+            logger.error(f"Strategy preset '{name}.json' not found in {presets_dir}.")
+            continue
+        preset.setdefault("strategy_name", name)
+        presets.append(preset)
+    return presets
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Scan a universe for strategy presets whose rules fire on the latest bar.")
+    parser.add_argument('--stocks', nargs='+', help="Stock symbols to scan (e.g., NSE:RELIANCE-EQ NSE:TCS-EQ).")
+    parser.add_argument('--universe', help="Name of a stock universe in the universes file to scan instead of --stocks.")
+    parser.add_argument(
+        '--strategies',
+        nargs='+',
+        help="Strategy preset filenames (without .json extension). Default: every preset."
+    )
+    parser.add_argument('--all', action='store_true', help="Print every pair, not only those with a signal.")
+    parser.add_argument('--output', help="Also write the full scan to this CSV file.")
+    args = parser.parse_args()
+
+    with open(PROJECT_ROOT / "config.yaml", "r") as f:
+        paths = (yaml.safe_load(f) or {}).get("paths", {})
+
+    if args.universe:
+        universes = load_universes(PROJECT_ROOT / paths.get("stock_universes", "data/universes.yaml"))
+        if args.universe not in universes:
+            parser.error(f"Unknown stock universe '{args.universe}'")
+        symbols = universes[args.universe] or []
+    elif args.stocks:
+        symbols = args.stocks
+    else:
+        parser.error("--stocks or --universe is required")
+
+    results = scan_signals(
+        PROJECT_ROOT / paths.get("market_data_db", "data/market_data.duckdb"),
+        symbols,
+        load_scan_presets(PROJECT_ROOT / paths.get("strategy_presets", "strategies"), args.strategies),
+    )
+    if args.output:
+        results.to_csv(args.output, index=False)
+
+    shown = results if args.all else results[results['entry'] | results['exit']]
+    if shown.empty:
+        print("No entry or exit signals on the latest bar.")
+    else:
+        with pd.option_context('display.max_rows', None, 'display.width', 200):
+            print(shown.to_string(index=False))
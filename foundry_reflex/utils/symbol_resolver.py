@@ -1,49 +1,166 @@
 # In: foundry_reflex/foundry_reflex/utils/symbol_resolver.py
 
+import bisect
+import os
+import time
+from io import BytesIO
+from pathlib import Path
+
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import requests
 from utils.logger_setup import get_logger
 
 
 logger = get_logger("symbol_resolver", "logs/pipeline.log")
 FYERS_SYMBOLS_URL = "https://public.fyers.in/sym_details/NSE_CM.csv"
-def get_symbol_master():
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+SYMBOL_MASTER_CACHE = PROJECT_ROOT / "data/symbol_master.parquet"
+SYMBOL_MASTER_TTL_HOURS = 24
+
+# --- Symbol master cache ---
+# The master is kept as Parquet (only the four columns used) with the download's ETag and
+# Last-Modified in the file metadata. The file's mtime is when it was last confirmed current.
+
+def _read_cached_master(cache_path):
+    table = pq.read_table(cache_path)
+    metadata = table.schema.metadata or {}
+    validators = {key: metadata[key.encode()].decode() for key in ("etag", "last_modified") if key.encode() in metadata}
+    return table.to_pandas(), validators
+
+def _write_cached_master(cache_path, symbol_master, validators):
+    table = pa.Table.from_pandas(symbol_master, preserve_index=False)
+    table = table.replace_schema_metadata({
+        **(table.schema.metadata or {}), **{key.encode(): value.encode() for key, value in validators.items() if value}
+    })
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache_path.with_suffix(".tmp")
+    pq.write_table(table, tmp_path, compression="zstd")
+    os.replace(tmp_path, cache_path) # Readers never see a half-written cache
+
+def _download_master(validators):
+    """Conditional GET of the master. Returns (DataFrame, validators), with DataFrame None if it is unchanged."""
+    headers = {}
+    if validators.get("etag"): headers["If-None-Match"] = validators["etag"]
+    if validators.get("last_modified"): headers["If-Modified-Since"] = validators["last_modified"]
+    response = requests.get(FYERS_SYMBOLS_URL, headers=headers, timeout=60)
+    if response.status_code == 304:
+        return None, validators
+    response.raise_for_status()
+    df = pd.read_csv(BytesIO(response.content), header=None, usecols=[1, 2, 9, 13], names=['Description', 'InstrumentType', 'FyersTicker', 'ShortName'])
+    return df, {"etag": response.headers.get("ETag", ""), "last_modified": response.headers.get("Last-Modified", "")}
+
+def get_symbol_master(cache_path=SYMBOL_MASTER_CACHE, ttl_hours=SYMBOL_MASTER_TTL_HOURS, force_refresh=False):
+    """
+    The Fyers symbol master, from the local cache while it is younger than `ttl_hours`.
+
+    An expired cache is revalidated with a conditional request, so an unchanged master
+    is not downloaded again. If Fyers can't be reached, a cached copy is used however old.
+    """
+    cache_path = Path(cache_path)
+    cached, validators = None, {}
+    if cache_path.exists():
+        try:
+            cached, validators = _read_cached_master(cache_path)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable symbol master cache {cache_path}: {e}")
+    if cached is not None and not force_refresh:
+        age_hours = (time.time() - cache_path.stat().st_mtime) / 3600
+        if age_hours < ttl_hours:
+            logger.info(f"Using cached Fyers symbol master ({len(cached)} symbols, {age_hours:.1f}h old).")
+            return cached
+
     try:
-        df = pd.read_csv(FYERS_SYMBOLS_URL, header=None, usecols=[1, 2, 9, 13], names=['Description', 'InstrumentType', 'FyersTicker', 'ShortName'])
-        logger.info("Successfully downloaded and prepared the Fyers symbol master.")
-        return df
+        df, validators = _download_master(validators if cached is not None else {})
     except Exception as e:
+        if cached is not None:
+            logger.warning(f"Failed to refresh symbol master, using the cached copy. Error: {e}")
+            return cached
         logger.error(f"CRITICAL: Failed to download symbol master. Error: {e}")
         return pd.DataFrame()
 
-def resolve_symbols(tickers_to_find: list, symbol_master: pd.DataFrame) -> dict: # Changed return type
+    if df is None:
+        os.utime(cache_path) # Still current: restart the TTL
+        logger.info("Fyers symbol master unchanged since the last download; cache renewed.")
+        return cached
+    try:
+        _write_cached_master(cache_path, df, validators)
+    except Exception as e:
+        logger.warning(f"Failed to cache symbol master at {cache_path}: {e}")
+    logger.info("Successfully downloaded and prepared the Fyers symbol master.")
+    return df
+
+# --- Resolution ---
+
+class SymbolIndex:
+    """
+    Lookup tables over a symbol master, built once: a hash index from short name to
+    Fyers ticker, and every description (upper case) in one newline-joined string for
+    substring lookups.
+    """
+    def __init__(self, symbol_master: pd.DataFrame):
+        tickers = symbol_master['FyersTicker'].to_numpy(dtype=object)
+        short_names = symbol_master['ShortName'].to_numpy(dtype=object)
+        first = ~symbol_master['ShortName'].duplicated().to_numpy()
+        self.by_short_name = dict(zip(short_names[first], tickers[first])) # The first row wins, as in a scan
+
+        self.tickers = tickers
+        self.descriptions = symbol_master['Description'].fillna("").astype(str).str.upper().str.strip().tolist()
+        self.text = "\n".join(self.descriptions)
+        self.starts = [] # Offset of each row's description in self.text
+        offset = 0
+        for description in self.descriptions:
+            self.starts.append(offset)
+            offset += len(description) + 1
+
+    def find_description(self, text: str):
+        """
+        The Fyers ticker whose description contains `text` (upper case) anywhere, preferring
+        the shortest description, then the first row. None if there is none.
+        """
+        if not text or "\n" in text: return None
+        matches = []
+        pos = self.text.find(text)
+        while pos != -1: # One C-level scan of the joined text, jumping to the next row after each hit
+            row = bisect.bisect_right(self.starts, pos) - 1
+            matches.append(row)
+            if row + 1 == len(self.starts): break
+            pos = self.text.find(text, self.starts[row + 1])
+        if not matches: return None
+        return self.tickers[min(matches, key=lambda row: len(self.descriptions[row]))]
+
+def resolve_symbols(tickers_to_find: list, symbol_master) -> dict: # Changed return type
     """
     Resolves a list of simple names to a dictionary mapping original_name -> fyers_ticker.
+
+    Args:
+        symbol_master: The master DataFrame, or a SymbolIndex built from it (reusable across calls).
     """
-    if symbol_master.empty: return {}
+    if isinstance(symbol_master, pd.DataFrame):
+        if symbol_master.empty: return {}
+        symbol_master = SymbolIndex(symbol_master)
     # WHAT: We now create a dictionary to store our mappings.
     # WHY:  A dictionary is more explicit and prevents the "lost in translation" error.
-    resolved_map = {} 
-    symbol_master['CleanDescription'] = symbol_master['Description'].str.upper().str.strip()
+    resolved_map = {}
 
     for ticker in tickers_to_find:
         ticker_upper = ticker.upper().strip()
-        
+
         if "NIFTY" in ticker_upper or "INDIA VIX" in ticker_upper:
-            index_match = symbol_master[symbol_master['CleanDescription'].str.contains(ticker_upper, na=False)]
-            if not index_match.empty:
-                best_match = index_match.loc[index_match['CleanDescription'].str.len().idxmin()]
-                resolved = best_match['FyersTicker']
-                logger.info(f"Resolved '{ticker}' -> '{resolved}' (Index ETF Match)")
+            resolved = symbol_master.find_description(ticker_upper)
+            if resolved is not None:
+                logger.debug(f"Resolved '{ticker}' -> '{resolved}' (Index ETF Match)")
                 resolved_map[ticker] = resolved # Store as key-value pair
                 continue
-        
-        exact_short_match = symbol_master[symbol_master['ShortName'] == ticker_upper]
-        if not exact_short_match.empty:
-            resolved = exact_short_match.iloc[0]['FyersTicker']
-            logger.info(f"Resolved '{ticker}' -> '{resolved}' (Exact Short Name Match)")
+
+        resolved = symbol_master.by_short_name.get(ticker_upper)
+        if resolved is not None:
+            logger.debug(f"Resolved '{ticker}' -> '{resolved}' (Exact Short Name Match)")
             resolved_map[ticker] = resolved # Store as key-value pair
             continue
-            
+
         logger.warning(f"Could not resolve symbol: '{ticker}'. It will be skipped.")
-            
-    return resolved_map # Return the entire dictionary
\ No newline at end of file
+
+    logger.info(f"Resolved {len(resolved_map)}/{len(tickers_to_find)} symbols.")
+    return resolved_map # Return the entire dictionary.
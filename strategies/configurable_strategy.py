@@ -3,27 +3,49 @@
 import logging
 import re
 from backtesting import Strategy
-from backtesting.lib import crossover
+import numpy as np
 import pandas as pd
 
+from .expressions import COLUMNS, ExpressionError, evaluate, parse_expression
+from .vectorized_backtest import compile_rule_signals
+
+from . import indicators as ind
+
 # You can expand this dictionary with more indicators as you create them.
 # The key is the string name, the value is the function to call.
 # This makes the interpreter easily extensible.
 AVAILABLE_INDICATORS = {}
 
-def register_indicator(name):
-    """A decorator to register new indicator functions."""
+# Recursive (exponentially smoothed) indicators never fully forget their seed. After
+# this many smoothing periods its weight is below 1e-6, so a trailing window that long
+# reproduces the full-history value.
+SETTLE_PERIODS = 14
+
+def register_indicator(name, inputs=('Close',), lookback=None):
+    """
+    A decorator to register new indicator functions.
+
+    Args:
+        name (str): The name used in rule strings, e.g. 'ATR' for 'ATR(14)'.
+        inputs (tuple): The OHLCV columns passed to the function, in order, before
+            the rule string's parameters. Defaults to the close price only.
+        lookback (callable): Given the rule string's parameters, how many trailing bars
+            the indicator needs for its latest value. Without it, the signal scanner
+            reads a symbol's full history.
+    """
     def decorator(f):
+        f.inputs = tuple(inputs)
+        f.lookback = lookback
         AVAILABLE_INDICATORS[name.upper()] = f
         return f
     return decorator
 
 # --- Define and Register Your Indicator Functions Here ---
-@register_indicator("SMA")
+@register_indicator("SMA", lookback=lambda n: n)
 def SMA(series, n):
     return pd.Series(series).rolling(n).mean()
 
-@register_indicator("RSI")
+@register_indicator("RSI", lookback=lambda n: n + 1)
 def RSI(series, n):
     delta = pd.Series(series).diff()
     gain = (delta.where(delta > 0, 0)).rolling(window=n).mean()
@@ -31,6 +53,147 @@ def RSI(series, n):
     rs = gain / loss
     return 100 - (100 / (1 + rs))
 
+# The indicators below are single-pass kernels from strategies/indicators.py.
+# Multi-line indicators (MACD, Bollinger, ADX, Donchian) register one name per line.
+@register_indicator("EMA", lookback=lambda n: SETTLE_PERIODS * n)
+def EMA(series, n):
+    return ind.ema(series, n)
+
+@register_indicator("WRSI", lookback=lambda n: SETTLE_PERIODS * n + 1)
+def WRSI(series, n):
+    """Wilder-smoothed RSI; 'RSI' keeps its simple-average definition."""
+    return ind.wilder_rsi(series, n)
+
+@register_indicator("ATR", inputs=('High', 'Low', 'Close'), lookback=lambda n: SETTLE_PERIODS * n + 1)
+def ATR(high, low, close, n):
+    return ind.atr(high, low, close, n)
+
+@register_indicator("MACD", lookback=lambda fast=12, slow=26, signal=9: SETTLE_PERIODS * slow)
+def MACD(series, fast=12, slow=26, signal=9):
+    return ind.macd(series, fast, slow, signal)[0]
+
+@register_indicator("MACD_SIGNAL", lookback=lambda fast=12, slow=26, signal=9: SETTLE_PERIODS * (slow + signal))
+def MACD_SIGNAL(series, fast=12, slow=26, signal=9):
+    return ind.macd(series, fast, slow, signal)[1]
+
+@register_indicator("MACD_HIST", lookback=lambda fast=12, slow=26, signal=9: SETTLE_PERIODS * (slow + signal))
+def MACD_HIST(series, fast=12, slow=26, signal=9):
+    return ind.macd(series, fast, slow, signal)[2]
+
+@register_indicator("BB_LOWER", lookback=lambda n=20, k=2.0: n)
+def BB_LOWER(series, n=20, k=2.0):
+    return ind.bollinger(series, n, k)[0]
+
+@register_indicator("BB_UPPER", lookback=lambda n=20, k=2.0: n)
+def BB_UPPER(series, n=20, k=2.0):
+    return ind.bollinger(series, n, k)[2]
+
+@register_indicator("ADX", inputs=('High', 'Low', 'Close'), lookback=lambda n=14: 2 * SETTLE_PERIODS * n + 1)
+def ADX(high, low, close, n=14):
+    return ind.adx(high, low, close, n)[0]
+
+@register_indicator("PLUS_DI", inputs=('High', 'Low', 'Close'), lookback=lambda n=14: SETTLE_PERIODS * n + 1)
+def PLUS_DI(high, low, close, n=14):
+    return ind.adx(high, low, close, n)[1]
+
+@register_indicator("MINUS_DI", inputs=('High', 'Low', 'Close'), lookback=lambda n=14: SETTLE_PERIODS * n + 1)
+def MINUS_DI(high, low, close, n=14):
+    return ind.adx(high, low, close, n)[2]
+
+@register_indicator("DC_LOWER", inputs=('High', 'Low'), lookback=lambda n=20: n)
+def DC_LOWER(high, low, n=20):
+    return ind.donchian(high, low, n)[0]
+
+@register_indicator("DC_UPPER", inputs=('High', 'Low'), lookback=lambda n=20: n)
+def DC_UPPER(high, low, n=20):
+    return ind.donchian(high, low, n)[1]
+
+@register_indicator("VWAP", inputs=('High', 'Low', 'Close', 'Volume'), lookback=lambda n=20: n)
+def VWAP(high, low, close, volume, n=20):
+    return ind.vwap(high, low, close, volume, n)
+
+# --- Rule Helpers (shared with the performance engine) ---
+
+def extract_indicator_strings(rules):
+    """Returns the set of unique indicator strings used by a rules dict's entry and exit groups."""
+    indicator_set = set()
+    if not isinstance(rules, dict):
+        return indicator_set
+    for rule_type in ['entry', 'exit']:
+        for group in rules.get(rule_type, []):
+            _extract_indicators_from_group(group, indicator_set)
+    return indicator_set
+
+def _extract_indicators_from_group(group, indicator_set):
+    """Recursively find all indicator strings in a rule group."""
+    for item in group.get('conditions', []):
+        if item.get('type') == 'condition':
+            if not item['left'].lower().startswith('value:'):
+                indicator_set.add(item['left'])
+            if not item['right'].lower().startswith('value:'):
+                indicator_set.add(item['right'])
+        elif item.get('type') == 'group':
+            _extract_indicators_from_group(item, indicator_set)
+
+def split_indicator(indicator_str, available=None):
+    """
+    Splits an indicator string (e.g., 'SMA(50)') into (NAME, params).
+    Returns None, after logging why, if the string can't be used. `available`
+    is the registry the name must be in (default: AVAILABLE_INDICATORS).
+    """
+    available = AVAILABLE_INDICATORS if available is None else available
+
+    # Regex to parse NAME(param1, param2, ...)
+    match = re.match(r'(\w+)\((.*?)\)', indicator_str)
+    if not match:
+        logging.warning(f"Skipping invalid indicator format: '{indicator_str}'")
+        return None
+
+    name, params_str = match.groups()
+    name = name.upper()
+
+    if name not in available:
+        logging.warning(f"Skipping unknown indicator: '{name}'")
+        return None
+
+    try:
+        # Convert comma-separated params to numbers (int or float)
+        params = [float(p.strip()) if '.' in p else int(p.strip()) for p in params_str.split(',') if p.strip()]
+    except ValueError:
+        logging.error(f"Invalid parameter in '{indicator_str}'. Could not convert to number. Skipping.")
+        return None
+
+    return name, params
+
+def compute_indicator(indicator_str, data, memo=None):
+    """
+    Calculates an operand over a symbol's bars. Returns a float array, or None on failure.
+
+    Args:
+        indicator_str (str): An indicator like 'SMA(50)', or an expression over indicators
+            and OHLCV columns like 'SMA(High, 20) - ATR(14) * 2' (see strategies/expressions.py).
+        data: An OHLCV DataFrame (or {column: array}); a bare array is taken as the close price.
+        memo (dict): Optional {subexpression: array} shared across calls for the same data,
+            so subexpressions common to several operands are computed once.
+    """
+    if not hasattr(data, 'keys'):
+        data = {'Close': data}
+    try:
+        node = parse_expression(indicator_str)
+    except ExpressionError as e:
+        logging.warning(f"Skipping invalid indicator format: '{indicator_str}' ({e})")
+        return None
+    try:
+        values = np.asarray(evaluate(node, data, AVAILABLE_INDICATORS, memo), dtype=float)
+        # A constant expression (e.g. '2 * 3') is spread over every bar
+        return values if values.ndim else np.full(len(data['Close']), float(values))
+    except ExpressionError as e:
+        logging.warning(f"Skipping indicator '{indicator_str}': {e}")
+        return None
+    except Exception as e:
+        logging.error(f"Error calculating indicator '{indicator_str}': {e}")
+        return None
+
 # --- The Main Interpreter Class ---
 
 class ConfigurableStrategy(Strategy):
@@ -39,150 +202,82 @@ class ConfigurableStrategy(Strategy):
     This class is designed to execute strategies created in a UI and saved as JSON.
     """
     rules = {} # The backtesting engine will inject the rules from the JSON here
+    # Optional {indicator_str: array} computed once per symbol by the engine and
+    # shared by every preset run against that symbol.
+    indicator_cache = None
 
     def init(self):
         """
-        Pre-calculates all necessary indicators based on the provided rules.
+        Pre-calculates all necessary indicators based on the provided rules, then
+        compiles the rule tree into an evaluation plan: one boolean array per rule
+        type (entry/exit) saying whether the rules hold on each bar.
         This is the setup phase and includes extensive error handling.
         """
-        self.indicators = {}
+        self.indicators = {} # {indicator_str: name of the Strategy attribute holding it}
+        self._expression_memo = {}
+        self._entry_signal = self._exit_signal = None
         if not self.rules or not isinstance(self.rules, dict):
             logging.error("Strategy rules are missing or not in the correct format. Stopping.")
-            # In backtesting.py, returning from init stops the strategy.
+            # With no evaluation plan, next() never trades.
             return
 
         # Find all unique indicator strings from both entry and exit rules
-        all_indicator_strings = set()
-        for rule_type in ['entry', 'exit']:
-            groups = self.rules.get(rule_type, [])
-            for group in groups:
-                self._extract_indicators_from_group(group, all_indicator_strings)
+        all_indicator_strings = extract_indicator_strings(self.rules)
         
         # Calculate each unique indicator once and store it
         for indicator_str in all_indicator_strings:
             self._calculate_indicator(indicator_str)
 
+        for indicator_str in sorted(all_indicator_strings - set(self.indicators)):
+            logging.warning(f"Could not find pre-calculated indicator for '{indicator_str}'; its conditions never hold.")
+
+        # Constants are parsed, operands bound to their arrays and operators (crossovers
+        # included) applied here once, over the whole history. Bar i of each signal only
+        # depends on indicator values up to bar i, so reading it in next() adds no lookahead.
+        indicator_values = {s: np.asarray(getattr(self, attr), dtype=float) for s, attr in self.indicators.items()}
+        self._entry_signal, self._exit_signal = compile_rule_signals(
+            self.rules, indicator_values, len(self.data), strict=False
+        )
+
     def next(self):
         """
-        On each candle, evaluates the entry and exit rules recursively.
+        On each candle, looks up the precompiled entry or exit signal for the current bar.
         """
+        if self._entry_signal is None:
+            return
+        bar = len(self.data) - 1
+
         # Check entry rules if we don't have a position
         if not self.position:
-            entry_signal = all(self._evaluate_group(group) for group in self.rules.get('entry', []))
-            if entry_signal:
+            if self._entry_signal[bar]:
                 self.buy()
 
         # Check exit rules if we do have a position
-        else:
-            exit_signal = all(self._evaluate_group(group) for group in self.rules.get('exit', []))
-            if exit_signal:
-                self.position.close()
+        elif self._exit_signal[bar]:
+            self.position.close()
 
     # --- Helper methods for parsing and evaluation ---
 
-    def _extract_indicators_from_group(self, group, indicator_set):
-        """Recursively find all indicator strings in a rule group."""
-        for item in group.get('conditions', []):
-            if item.get('type') == 'condition':
-                if not item['left'].lower().startswith('value:'):
-                    indicator_set.add(item['left'])
-                if not item['right'].lower().startswith('value:'):
-                    indicator_set.add(item['right'])
-            elif item.get('type') == 'group':
-                self._extract_indicators_from_group(item, indicator_set)
-
     def _calculate_indicator(self, indicator_str):
-        """Parses an indicator string (e.g., 'SMA(50)'), calculates it, and stores it."""
-        # Regex to parse NAME(param1, param2, ...)
-        match = re.match(r'(\w+)\((.*?)\)', indicator_str)
-        if not match:
-            logging.warning(f"Skipping invalid indicator format: '{indicator_str}'")
-            return
-
-        name, params_str = match.groups()
-        name = name.upper()
-
-        if name not in AVAILABLE_INDICATORS:
-            logging.warning(f"Skipping unknown indicator: '{name}'")
-            return
-
-        try:
-            # Convert comma-separated params to numbers (int or float)
-            params = [float(p.strip()) if '.' in p else int(p.strip()) for p in params_str.split(',') if p.strip()]
-        except ValueError:
-            logging.error(f"Invalid parameter in '{indicator_str}'. Could not convert to number. Skipping.")
-            return
-            
-        indicator_func = AVAILABLE_INDICATORS[name]
-        try:
-            # Use self.I() to calculate and align the indicator with the data
-            self.indicators[indicator_str] = self.I(indicator_func, self.data.Close, *params)
-        except Exception as e:
-            logging.error(f"Error calculating indicator '{indicator_str}': {e}")
-
-
-    def _evaluate_group(self, group):
-        """Recursively evaluates a rule group, returning True or False."""
-        results = []
-        for item in group.get('conditions', []):
-            if item.get('type') == 'condition':
-                results.append(self._evaluate_condition(item))
-            elif item.get('type') == 'group':
-                results.append(self._evaluate_group(item))
-        
-        if not results:
-            return True # An empty group is considered true
-
-        op = group.get('logical_op', 'AND').upper()
-        if op == 'AND':
-            return all(results)
-        elif op == 'OR':
-            return any(results)
-        return False
-
-    def _evaluate_condition(self, cond):
-        """Evaluates a single condition (e.g., SMA(50) > SMA(200)), returning True or False."""
-        op = cond.get('operator')
-        
-        # Get the current value for the left and right operands
-        left_val = self._get_operand_value(cond['left'])
-        right_val = self._get_operand_value(cond['right'])
-
-        # If any operand failed to be resolved, the condition is false
-        if left_val is None or right_val is None:
-            return False
-
-        # --- Operator Logic: Easily extensible ---
-        if op == 'Crosses Above':
-            # Crossover requires the series, not just the current value
-            left_series = self._get_operand_value(cond['left'], series=True)
-            right_series = self._get_operand_value(cond['right'], series=True)
-            if left_series is None or right_series is None: return False
-            return crossover(left_series, right_series)
-        
-        if op == 'Is Greater Than':
-            return left_val > right_val
-        if op == 'Is Less Than':
-            return left_val < right_val
-        
-        # Add other operators like 'Equals', 'Is Between', etc. here
-        
-        logging.warning(f"Unsupported operator: '{op}'")
-        return False
-
-    def _get_operand_value(self, operand_str, series=False):
-        """Gets the current value (or full series) for an operand string."""
-        operand_str_lower = operand_str.lower()
-        if operand_str_lower.startswith('value:'):
-            try:
-                # Extract the number after 'value:'
-                return float(operand_str.split(':')[1])
-            except (ValueError, IndexError):
-                logging.error(f"Invalid static value format: '{operand_str}'")
-                return None
+        """Calculates an operand (e.g., 'SMA(50)') and stores it, reusing the engine's cache if given."""
+        if self.indicator_cache and indicator_str in self.indicator_cache:
+            values = self.indicator_cache[indicator_str]
         else:
-            indicator = self.indicators.get(operand_str)
-            if indicator is None:
-                logging.warning(f"Could not find pre-calculated indicator for '{operand_str}'")
-                return None
-            return indicator if series else indicator[-1]
\ No newline at end of file
+            # Subexpressions shared between operands are computed once, via the memo
+            bars = {column: self.data[column] for column in COLUMNS if column in self.data.df.columns}
+            values = compute_indicator(indicator_str, bars, self._expression_memo)
+            if values is None:
+                return # Error already logged
+        # Use self.I() to align the indicator with the data
+        self._store_indicator(indicator_str, self.I(lambda: values, name=indicator_str))
+
+    def _store_indicator(self, indicator_str, indicator):
+        """
+        Keeps an indicator as a Strategy attribute and maps its string to that attribute.
+        backtesting.py only re-slices attribute indicators to the current bar before each
+        next() call (and uses them for warm-up); an array kept only in a dict would
+        always expose the final bar of the whole history.
+        """
+        attr = f"_indicator_{len(self.indicators)}"
+        setattr(self, attr, indicator)
+        self.indicators[indicator_str] = attr
@@ -0,0 +1,228 @@
+# In: strategies/expressions.py
+
+"""
+Operand expressions for the rule interpreter.
+
+An operand such as 'SMA(High, 20) - ATR(14) * 2' or 'RSI(Volume, 14)' is parsed
+into a tree of hashable tuples:
+
+    ('num', 2)                          a number
+    ('col', 'High')                     an OHLCV column
+    ('neg', x)                          unary minus
+    ('add' | 'sub' | 'mul' | 'div', a, b)
+    ('call', 'SMA', (series...), (params...))
+
+Equal subtrees compare (and hash) equal, so evaluating every operand of a rule set
+against one memo dict computes each distinct subexpression once. A call's leading
+non-numeric arguments are its input series; without them an indicator reads its
+registered default columns, so plain 'SMA(50)' means what it always has.
+
+This module only knows the syntax; the indicator registry is passed in by the caller.
+"""
+
+import functools
+import re
+
+import numpy as np
+
+COLUMNS = ('Open', 'High', 'Low', 'Close', 'Volume')
+_COLUMN_NAMES = {c.upper(): c for c in COLUMNS}
+
+_TOKEN = re.compile(r'\s*(?:(\d+\.\d*|\.\d+|\d+)|([A-Za-z_]\w*)|(.))')
+
+_BINARY = {'+': 'add', '-': 'sub', '*': 'mul', '/': 'div'}
+
+
+class ExpressionError(ValueError):
+    """Raised for an operand that can't be parsed or evaluated."""
+
+
+def _tokenize(text):
+    tokens = []
+    for number, name, symbol in _TOKEN.findall(text):
+        if number:
+            tokens.append(('num', float(number) if '.' in number else int(number)))
+        elif name:
+            tokens.append(('name', name))
+        elif symbol.strip():
+            tokens.append(('op', symbol))
+    return tokens
+
+
+class _Parser:
+    """Recursive descent: expr := term (+|- term)*, term := unary (*|/ unary)*."""
+
+    def __init__(self, text):
+        self.text = text
+        self.tokens = _tokenize(text)
+        self.pos = 0
+
+    def _peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else (None, None)
+
+    def _take(self, op=None):
+        token = self._peek()
+        if token[0] is None or (op is not None and token != ('op', op)):
+            expected = f"'{op}'" if op else "more input"
+            raise ExpressionError(f"Expected {expected} in '{self.text}'")
+        self.pos += 1
+        return token
+
+    def parse(self):
+        if not self.tokens:
+            raise ExpressionError("Empty expression")
+        node = self._expr()
+        if self.pos != len(self.tokens):
+            raise ExpressionError(f"Unexpected '{self._peek()[1]}' in '{self.text}'")
+        return node
+
+    def _expr(self):
+        node = self._term()
+        while self._peek() in (('op', '+'), ('op', '-')):
+            node = (_BINARY[self._take()[1]], node, self._term())
+        return node
+
+    def _term(self):
+        node = self._unary()
+        while self._peek() in (('op', '*'), ('op', '/')):
+            node = (_BINARY[self._take()[1]], node, self._unary())
+        return node
+
+    def _unary(self):
+        if self._peek() == ('op', '-'):
+            self._take()
+            operand = self._unary()
+            # Fold '-5' into a number, so it can be an indicator parameter
+            return ('num', -operand[1]) if operand[0] == 'num' else ('neg', operand)
+        return self._atom()
+
+    def _atom(self):
+        kind, value = self._take()
+        if kind == 'num':
+            return ('num', value)
+        if kind == 'op':
+            if value != '(':
+                raise ExpressionError(f"Unexpected '{value}' in '{self.text}'")
+            node = self._expr()
+            self._take(')')
+            return node
+
+        if self._peek() == ('op', '('):
+            self._take()
+            args = []
+            if self._peek() != ('op', ')'):
+                args.append(self._expr())
+                while self._peek() == ('op', ','):
+                    self._take()
+                    args.append(self._expr())
+            self._take(')')
+            return self._call(value.upper(), args)
+
+        column = _COLUMN_NAMES.get(value.upper())
+        if column is None:
+            raise ExpressionError(f"Unknown column '{value}' in '{self.text}' (expected one of {', '.join(COLUMNS)})")
+        return ('col', column)
+
+    def _call(self, name, args):
+        split = next((i for i, arg in enumerate(args) if arg[0] == 'num'), len(args))
+        series, params = args[:split], args[split:]
+        if any(arg[0] != 'num' for arg in params):
+            raise ExpressionError(f"Input series must come before numeric parameters in {name}() in '{self.text}'")
+        return ('call', name, tuple(series), tuple(arg[1] for arg in params))
+
+
+@functools.lru_cache(maxsize=4096)
+def parse_expression(text):
+    """Parses an operand string into its expression tree. Raises ExpressionError."""
+    if not isinstance(text, str):
+        raise ExpressionError(f"Operand must be a string, got {text!r}")
+    return _Parser(text).parse()
+
+
+def canonical_call(node, func_inputs):
+    """
+    A 'call' node with its input series spelled out: its explicit series, or its
+    indicator's default columns.
+    """
+    _, name, series, params = node
+    if not series:
+        return ('call', name, tuple(('col', column) for column in func_inputs), params)
+    if len(series) != len(func_inputs):
+        raise ExpressionError(f"{name}() takes {len(func_inputs)} input series ({', '.join(func_inputs)}), got {len(series)}")
+    return node
+
+
+def _as_series(value, n_bars):
+    """A constant input series (e.g. '(2 * 3)') is spread over every bar."""
+    return value if np.ndim(value) else np.full(n_bars, value)
+
+
+def evaluate(node, data, functions, memo=None):
+    """
+    Evaluates an expression tree over a symbol's bars.
+
+    Args:
+        node (tuple): A tree from parse_expression().
+        data: An OHLCV DataFrame or {column: array}.
+        functions (dict): {NAME: indicator function}, each with an `inputs` tuple.
+        memo (dict): {node: value}, shared across calls to reuse common subexpressions.
+
+    Returns a float array, or a float for a constant expression.
+    """
+    memo = {} if memo is None else memo
+    if node in memo:
+        return memo[node]
+
+    kind = node[0]
+    if kind == 'num':
+        value = float(node[1])
+    elif kind == 'col':
+        value = np.asarray(data[node[1]], dtype=float)
+    elif kind == 'neg':
+        value = -evaluate(node[1], data, functions, memo)
+    elif kind == 'call':
+        name = node[1]
+        if name not in functions:
+            raise ExpressionError(f"Unknown indicator: '{name}'")
+        func = functions[name]
+        # 'SMA(20)' and 'SMA(Close, 20)' are the same call once the default inputs are filled in
+        explicit = canonical_call(node, func.inputs)
+        if explicit != node:
+            value = evaluate(explicit, data, functions, memo)
+        else:
+            inputs = [_as_series(evaluate(arg, data, functions, memo), len(data['Close'])) for arg in node[2]]
+            value = np.asarray(func(*inputs, *node[3]), dtype=float)
+    else:
+        left = evaluate(node[1], data, functions, memo)
+        right = evaluate(node[2], data, functions, memo)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            value = {'add': np.add, 'sub': np.subtract, 'mul': np.multiply, 'div': np.true_divide}[kind](left, right)
+
+    memo[node] = value
+    return value
+
+
+def lookback(node, functions):
+    """
+    How many trailing bars an expression needs for its latest value to match a
+    full-history evaluation, from each indicator's `lookback` (see register_indicator).
+    Returns None if some indicator in the tree doesn't declare one.
+    """
+    kind = node[0]
+    if kind in ('num', 'col'):
+        return 1
+    if kind == 'call':
+        func = functions.get(node[1])
+        if func is None or getattr(func, 'lookback', None) is None:
+            return None
+        try:
+            own = int(func.lookback(*node[3]))
+        except TypeError:
+            return None # Wrong parameter count: evaluate() reports it
+        needs = [lookback(arg, functions) for arg in canonical_call(node, func.inputs)[2]]
+        if None in needs:
+            return None
+        # The indicator's window starts where its inputs' first valid bar is
+        return own + max(needs, default=1) - 1
+    needs = [lookback(child, functions) for child in node[1:]]
+    return None if None in needs else max(needs)
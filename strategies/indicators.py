@@ -0,0 +1,179 @@
+# In: strategies/indicators.py
+
+"""
+Single-pass indicator kernels for the rule interpreter.
+
+Every function takes float arrays and returns a float array of the same length,
+NaN until the indicator has enough history. Recursive indicators (EMA and Wilder
+smoothing) are explicit loops compiled with numba when it is installed, and run
+as plain Python otherwise; rolling-window indicators use pandas' C rolling
+kernels. All of them are O(n) in the number of bars.
+
+The functions here are pure; configurable_strategy registers them as rule
+indicators through register_indicator.
+"""
+
+import math
+
+import numpy as np
+import pandas as pd
+
+try:
+    from numba import njit
+except ImportError: # numba is optional; the kernels then run as plain Python
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda f: f
+
+
+def _as_float(values):
+    return np.ascontiguousarray(values, dtype=np.float64)
+
+
+# --- Compiled Kernels ---
+
+@njit(cache=True)
+def _smooth(values, n, alpha):
+    """
+    Exponential smoothing seeded with the simple average of the first `n` valid values.
+    NaN inputs (leading or missing bars) produce NaN and leave the running value untouched.
+    """
+    out = np.full(values.shape[0], np.nan)
+    total = 0.0
+    seen = 0
+    current = np.nan
+    for i in range(values.shape[0]):
+        x = values[i]
+        if math.isnan(x):
+            continue
+        if seen < n:
+            total += x
+            seen += 1
+            if seen == n:
+                current = total / n
+                out[i] = current
+        else:
+            current = current + alpha * (x - current)
+            out[i] = current
+    return out
+
+
+@njit(cache=True)
+def _wilder_rsi(close, n):
+    out = np.full(close.shape[0], np.nan)
+    gain_total = 0.0
+    loss_total = 0.0
+    avg_gain = 0.0
+    avg_loss = 0.0
+    seen = 0
+    previous = np.nan
+    for i in range(close.shape[0]):
+        x = close[i]
+        if math.isnan(x):
+            continue
+        if math.isnan(previous):
+            previous = x
+            continue
+        change = x - previous
+        previous = x
+        gain = change if change > 0 else 0.0
+        loss = -change if change < 0 else 0.0
+        if seen < n:
+            gain_total += gain
+            loss_total += loss
+            seen += 1
+            if seen < n:
+                continue
+            avg_gain = gain_total / n
+            avg_loss = loss_total / n
+        else:
+            avg_gain = (avg_gain * (n - 1) + gain) / n
+            avg_loss = (avg_loss * (n - 1) + loss) / n
+        if avg_loss == 0.0:
+            out[i] = 100.0 if avg_gain > 0.0 else 50.0
+        else:
+            out[i] = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    return out
+
+
+@njit(cache=True)
+def _directional_movement(high, low, close):
+    """True range, +DM and -DM per bar (the first bar has no previous close and is NaN)."""
+    size = close.shape[0]
+    tr = np.full(size, np.nan)
+    plus_dm = np.full(size, np.nan)
+    minus_dm = np.full(size, np.nan)
+    for i in range(1, size):
+        up = high[i] - high[i - 1]
+        down = low[i - 1] - low[i]
+        plus_dm[i] = up if (up > down and up > 0.0) else 0.0
+        minus_dm[i] = down if (down > up and down > 0.0) else 0.0
+        tr[i] = max(high[i] - low[i], abs(high[i] - close[i - 1]), abs(low[i] - close[i - 1]))
+    return tr, plus_dm, minus_dm
+
+
+# --- Indicators ---
+
+def ema(close, n):
+    """Exponential moving average (alpha = 2 / (n + 1)), seeded with an n-bar SMA."""
+    return _smooth(_as_float(close), int(n), 2.0 / (n + 1))
+
+
+def wilder_rsi(close, n):
+    """Wilder's RSI: average gain and loss smoothed with alpha = 1 / n after an n-bar seed."""
+    return _wilder_rsi(_as_float(close), int(n))
+
+
+def true_range(high, low, close):
+    return _directional_movement(_as_float(high), _as_float(low), _as_float(close))[0]
+
+
+def atr(high, low, close, n):
+    """Average true range with Wilder smoothing."""
+    return _smooth(true_range(high, low, close), int(n), 1.0 / n)
+
+
+def macd(close, fast=12, slow=26, signal=9):
+    """Returns (macd line, signal line, histogram)."""
+    close = _as_float(close)
+    line = _smooth(close, int(fast), 2.0 / (fast + 1)) - _smooth(close, int(slow), 2.0 / (slow + 1))
+    signal_line = _smooth(line, int(signal), 2.0 / (signal + 1))
+    return line, signal_line, line - signal_line
+
+
+def bollinger(close, n=20, k=2.0):
+    """Returns (lower, middle, upper) bands: n-bar SMA -/+ k population standard deviations."""
+    rolling = pd.Series(_as_float(close)).rolling(int(n))
+    middle = rolling.mean().to_numpy()
+    width = k * rolling.std(ddof=0).to_numpy()
+    return middle - width, middle, middle + width
+
+
+def adx(high, low, close, n=14):
+    """Returns (ADX, +DI, -DI), all with Wilder smoothing."""
+    n = int(n)
+    tr, plus_dm, minus_dm = _directional_movement(_as_float(high), _as_float(low), _as_float(close))
+    smoothed_tr = _smooth(tr, n, 1.0 / n)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        plus_di = 100.0 * _smooth(plus_dm, n, 1.0 / n) / smoothed_tr
+        minus_di = 100.0 * _smooth(minus_dm, n, 1.0 / n) / smoothed_tr
+        di_sum = plus_di + minus_di
+        dx = np.where(di_sum > 0, 100.0 * np.abs(plus_di - minus_di) / di_sum, 0.0)
+    dx[np.isnan(di_sum)] = np.nan
+    return _smooth(dx, n, 1.0 / n), plus_di, minus_di
+
+
+def donchian(high, low, n=20):
+    """Returns (lower, upper): the lowest low and highest high of the last n bars."""
+    upper = pd.Series(_as_float(high)).rolling(int(n)).max().to_numpy()
+    lower = pd.Series(_as_float(low)).rolling(int(n)).min().to_numpy()
+    return lower, upper
+
+
+def vwap(high, low, close, volume, n=20):
+    """Rolling n-bar volume-weighted average of the typical price (high + low + close) / 3."""
+    volume = pd.Series(_as_float(volume))
+    typical = (_as_float(high) + _as_float(low) + _as_float(close)) / 3.0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return ((typical * volume).rolling(int(n)).sum() / volume.rolling(int(n)).sum()).to_numpy()
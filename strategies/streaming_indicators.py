@@ -0,0 +1,627 @@
+# In: strategies/streaming_indicators.py
+
+"""
+Incremental counterparts of the rule indicators, for evaluating presets on live bars.
+
+Each indicator keeps only a compact rolling state and updates in constant time per
+bar, producing the same values as its batch version in configurable_strategy
+(recursive indicators exactly, rolling-window ones up to floating-point rounding).
+update(..., final=False) previews a still-forming bar, e.g. on every tick,
+without advancing the state; the bar's last update is then sent with final=True.
+StreamingExpression does the same for whole operand expressions.
+"""
+
+import logging
+import math
+import operator
+from collections import deque
+
+import numpy as np
+
+from .configurable_strategy import extract_indicator_strings, split_indicator
+from .expressions import ExpressionError, canonical_call, parse_expression
+from .vectorized_backtest import UnsupportedRuleError, compile_rule_signals
+
+NAN = float('nan')
+
+
+def _divide(numerator, denominator):
+    """Float division with NumPy semantics (x/0 is +-inf, 0/0 is NaN), as the batch versions divide."""
+    try:
+        return numerator / denominator
+    except ZeroDivisionError:
+        if numerator == 0 or math.isnan(numerator):
+            return NAN
+        return math.copysign(math.inf, numerator) * math.copysign(1.0, denominator)
+
+
+# --- Rolling State ---
+
+class _Ring:
+    """The last `n` values of a series."""
+
+    def __init__(self, n):
+        self.n = n
+        self.count = 0 # Values appended so far
+        self._values = [NAN] * n
+        self._pos = 0
+
+    def outgoing(self):
+        """The value that leaves the window when the next one is appended (None while filling)."""
+        return self._values[self._pos] if self.count >= self.n else None
+
+    def append(self, x):
+        self._values[self._pos] = x
+        self._pos = (self._pos + 1) % self.n
+        self.count += 1
+
+    def values(self):
+        return self._values if self.count >= self.n else self._values[:self.count]
+
+
+class _RollingSum:
+    """
+    Sum of the last `n` values, NaN while the window is short or holds a NaN (like
+    pandas' rolling(n).sum()). Re-summed from the window every `n` bars to bound drift.
+    """
+
+    def __init__(self, n):
+        self.n = n
+        self._ring = _Ring(n)
+        self._total = 0.0
+        self._nans = 0
+        self._nonzero = 0 # An all-zero window sums to exactly 0
+        self._since_resum = 0
+
+    def _next(self, x):
+        out = self._ring.outgoing()
+        x_nan = math.isnan(x)
+        out_nan = out is not None and math.isnan(out)
+        total = self._total + (0.0 if x_nan else x) - (0.0 if out is None or out_nan else out)
+        nans = self._nans + x_nan - out_nan
+        nonzero = self._nonzero + (not x_nan and x != 0.0) - (out is not None and not out_nan and out != 0.0)
+        return total, nans, nonzero
+
+    def _value(self, total, nans, nonzero, count):
+        if count < self.n or nans:
+            return NAN
+        return total if nonzero else 0.0
+
+    def peek(self, x):
+        total, nans, nonzero = self._next(x)
+        return self._value(total, nans, nonzero, self._ring.count + 1)
+
+    def push(self, x):
+        self._total, self._nans, self._nonzero = self._next(x)
+        self._ring.append(x)
+        value = self._value(self._total, self._nans, self._nonzero, self._ring.count)
+        self._since_resum += 1
+        if self._since_resum >= self.n:
+            # Only later bars see the re-summed total, so a preview and the final update agree
+            self._total = math.fsum(v for v in self._ring.values() if not math.isnan(v))
+            self._since_resum = 0
+        return value
+
+
+class _RollingMoments:
+    """
+    Mean and population standard deviation of the last `n` values (sliding Welford
+    update). Like pandas, a window of identical values has a standard deviation of exactly 0.
+    """
+
+    def __init__(self, n):
+        self.n = n
+        self._ring = _Ring(n)
+        self._nobs = 0 # Non-NaN values in the window
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._last = NAN
+        self._same_run = 0 # How many non-NaN values in a row equal the last one
+
+    def _run_after(self, x):
+        if math.isnan(x):
+            return self._last, self._same_run
+        return x, (self._same_run + 1 if x == self._last else 1)
+
+    def _next(self, x):
+        nobs, mean, m2 = self._nobs, self._mean, self._m2
+        out = self._ring.outgoing()
+        if out is not None and not math.isnan(out):
+            nobs -= 1
+            if nobs:
+                delta = out - mean
+                mean -= delta / nobs
+                m2 -= delta * (out - mean)
+            else:
+                mean = m2 = 0.0
+        if not math.isnan(x):
+            nobs += 1
+            delta = x - mean
+            mean += delta / nobs
+            m2 += delta * (x - mean)
+        return nobs, mean, m2
+
+    def _value(self, nobs, mean, m2, same_run):
+        if nobs < self.n:
+            return NAN, NAN
+        if same_run >= nobs:
+            return mean, 0.0
+        return mean, math.sqrt(max(m2, 0.0) / nobs)
+
+    def peek(self, x):
+        return self._value(*self._next(x), self._run_after(x)[1])
+
+    def push(self, x):
+        self._nobs, self._mean, self._m2 = self._next(x)
+        self._last, self._same_run = self._run_after(x)
+        self._ring.append(x)
+        return self._value(self._nobs, self._mean, self._m2, self._same_run)
+
+
+class _RollingExtreme:
+    """Highest (or lowest) of the last `n` values via a monotonic deque; NaN if the window holds a NaN."""
+
+    def __init__(self, n, highest=True):
+        self.n = n
+        self.sign = 1.0 if highest else -1.0
+        self._ring = _Ring(n)
+        self._nans = 0
+        self._deque = deque() # (bar index, sign * value), values decreasing
+
+    def _window_best(self, x, first_index):
+        """Best of the committed values from `first_index` on, together with `x`."""
+        best = -math.inf if math.isnan(x) else self.sign * x
+        for index, value in self._deque:
+            if index >= first_index:
+                best = max(best, value)
+                break # Later entries are smaller
+        return best
+
+    def _value(self, best, nans, count):
+        if count < self.n or nans:
+            return NAN
+        return self.sign * best
+
+    def peek(self, x):
+        out = self._ring.outgoing()
+        nans = self._nans + math.isnan(x) - (out is not None and math.isnan(out))
+        best = self._window_best(x, self._ring.count - self.n + 1)
+        return self._value(best, nans, self._ring.count + 1)
+
+    def push(self, x):
+        out = self._ring.outgoing()
+        self._nans += math.isnan(x) - (out is not None and math.isnan(out))
+        index = self._ring.count
+        while self._deque and self._deque[0][0] <= index - self.n:
+            self._deque.popleft()
+        if not math.isnan(x):
+            value = self.sign * x
+            while self._deque and self._deque[-1][1] <= value:
+                self._deque.pop()
+            self._deque.append((index, value))
+        self._ring.append(x)
+        best = self._deque[0][1] if self._deque else -math.inf
+        return self._value(best, self._nans, self._ring.count)
+
+
+class _Smoother:
+    """Streaming twin of indicators._smooth: exponential smoothing seeded with an n-value average."""
+
+    def __init__(self, n, alpha):
+        self.n = n
+        self.alpha = alpha
+        self._total = 0.0
+        self._seen = 0
+        self._current = NAN
+
+    def step(self, x, commit=True):
+        if math.isnan(x):
+            return NAN
+        total, seen, current = self._total, self._seen, self._current
+        if seen < self.n:
+            total += x
+            seen += 1
+            if seen == self.n:
+                current = total / self.n
+        else:
+            current = current + self.alpha * (x - current)
+        if commit:
+            self._total, self._seen, self._current = total, seen, current
+        return current if seen >= self.n else NAN
+
+
+# --- Indicators ---
+
+class StreamingIndicator:
+    """
+    Base class: feed one bar at a time through update().
+
+    `inputs` names the bar's columns the indicator reads, in the order update() takes them.
+    """
+    inputs = ('Close',)
+
+    def __init__(self):
+        self.value = NAN
+
+    def update(self, *values, final=True):
+        """
+        Advances the indicator by one bar and returns its value for that bar.
+        With final=False the value is only previewed and the state is left as it was.
+        """
+        value = self._step(*values, commit=final)
+        if final:
+            self.value = value
+        return value
+
+    def _step(self, *values, commit):
+        raise NotImplementedError
+
+
+class StreamingSMA(StreamingIndicator):
+    def __init__(self, n):
+        super().__init__()
+        self.n = n
+        self._sum = _RollingSum(n)
+
+    def _step(self, close, commit):
+        total = self._sum.push(close) if commit else self._sum.peek(close)
+        return total / self.n
+
+
+class StreamingRSI(StreamingIndicator):
+    """The simple-average RSI registered as 'RSI'."""
+
+    def __init__(self, n):
+        super().__init__()
+        self.n = n
+        self._gains = _RollingSum(n)
+        self._losses = _RollingSum(n)
+        self._previous = NAN
+
+    def _step(self, close, commit):
+        delta = close - self._previous
+        # Like the batch version, a missing change counts as no gain and no loss
+        gain = delta if delta > 0 else 0.0
+        loss = -delta if delta < 0 else 0.0
+        if commit:
+            gains, losses = self._gains.push(gain), self._losses.push(loss)
+            self._previous = close
+        else:
+            gains, losses = self._gains.peek(gain), self._losses.peek(loss)
+        return 100 - _divide(100, 1 + _divide(gains / self.n, losses / self.n))
+
+
+class StreamingEMA(StreamingIndicator):
+    def __init__(self, n):
+        super().__init__()
+        self._smoother = _Smoother(int(n), 2.0 / (n + 1))
+
+    def _step(self, close, commit):
+        return self._smoother.step(close, commit)
+
+
+class StreamingWilderRSI(StreamingIndicator):
+    """Streaming twin of indicators.wilder_rsi."""
+
+    def __init__(self, n):
+        super().__init__()
+        self.n = int(n)
+        self._gain_total = self._loss_total = 0.0
+        self._avg_gain = self._avg_loss = 0.0
+        self._seen = 0
+        self._previous = NAN
+
+    def _step(self, close, commit):
+        if math.isnan(close):
+            return NAN
+        if math.isnan(self._previous):
+            if commit:
+                self._previous = close
+            return NAN
+
+        change = close - self._previous
+        gain = change if change > 0 else 0.0
+        loss = -change if change < 0 else 0.0
+        gain_total, loss_total = self._gain_total, self._loss_total
+        avg_gain, avg_loss, seen = self._avg_gain, self._avg_loss, self._seen
+        if seen < self.n:
+            gain_total += gain
+            loss_total += loss
+            seen += 1
+            if seen == self.n:
+                avg_gain = gain_total / self.n
+                avg_loss = loss_total / self.n
+        else:
+            avg_gain = (avg_gain * (self.n - 1) + gain) / self.n
+            avg_loss = (avg_loss * (self.n - 1) + loss) / self.n
+        if commit:
+            self._previous = close
+            self._gain_total, self._loss_total = gain_total, loss_total
+            self._avg_gain, self._avg_loss, self._seen = avg_gain, avg_loss, seen
+
+        if seen < self.n:
+            return NAN
+        if avg_loss == 0.0:
+            return 100.0 if avg_gain > 0.0 else 50.0
+        return 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+
+
+class _DirectionalMovement:
+    """Streaming twin of indicators._directional_movement: (true range, +DM, -DM) per bar."""
+
+    def __init__(self):
+        self._previous = None # (high, low, close) of the last committed bar
+
+    def step(self, high, low, close, commit):
+        previous = self._previous
+        if commit:
+            self._previous = (high, low, close)
+        if previous is None:
+            return NAN, NAN, NAN
+        previous_high, previous_low, previous_close = previous
+        up = high - previous_high
+        down = previous_low - low
+        plus_dm = up if (up > down and up > 0.0) else 0.0
+        minus_dm = down if (down > up and down > 0.0) else 0.0
+        tr = max(high - low, abs(high - previous_close), abs(low - previous_close))
+        return tr, plus_dm, minus_dm
+
+
+class StreamingATR(StreamingIndicator):
+    inputs = ('High', 'Low', 'Close')
+
+    def __init__(self, n):
+        super().__init__()
+        self._movement = _DirectionalMovement()
+        self._smoother = _Smoother(int(n), 1.0 / n)
+
+    def _step(self, high, low, close, commit):
+        tr, _, _ = self._movement.step(high, low, close, commit)
+        return self._smoother.step(tr, commit)
+
+
+class StreamingMACD(StreamingIndicator):
+    """`output` picks the line: 0 = MACD, 1 = signal, 2 = histogram."""
+
+    def __init__(self, fast=12, slow=26, signal=9, output=0):
+        super().__init__()
+        self.output = output
+        self._fast = _Smoother(int(fast), 2.0 / (fast + 1))
+        self._slow = _Smoother(int(slow), 2.0 / (slow + 1))
+        self._signal = _Smoother(int(signal), 2.0 / (signal + 1))
+
+    def _step(self, close, commit):
+        line = self._fast.step(close, commit) - self._slow.step(close, commit)
+        signal_line = self._signal.step(line, commit)
+        return (line, signal_line, line - signal_line)[self.output]
+
+
+class StreamingBollinger(StreamingIndicator):
+    """`output` picks the band: 0 = lower, 1 = middle, 2 = upper."""
+
+    def __init__(self, n=20, k=2.0, output=0):
+        super().__init__()
+        self.k = k
+        self.output = output
+        self._moments = _RollingMoments(int(n))
+
+    def _step(self, close, commit):
+        middle, std = self._moments.push(close) if commit else self._moments.peek(close)
+        width = self.k * std
+        return (middle - width, middle, middle + width)[self.output]
+
+
+class StreamingADX(StreamingIndicator):
+    """`output` picks the line: 0 = ADX, 1 = +DI, 2 = -DI."""
+    inputs = ('High', 'Low', 'Close')
+
+    def __init__(self, n=14, output=0):
+        super().__init__()
+        n = int(n)
+        self.output = output
+        self._movement = _DirectionalMovement()
+        self._tr = _Smoother(n, 1.0 / n)
+        self._plus = _Smoother(n, 1.0 / n)
+        self._minus = _Smoother(n, 1.0 / n)
+        self._adx = _Smoother(n, 1.0 / n)
+
+    def _step(self, high, low, close, commit):
+        tr, plus_dm, minus_dm = self._movement.step(high, low, close, commit)
+        smoothed_tr = self._tr.step(tr, commit)
+        plus_di = _divide(100.0 * self._plus.step(plus_dm, commit), smoothed_tr)
+        minus_di = _divide(100.0 * self._minus.step(minus_dm, commit), smoothed_tr)
+        di_sum = plus_di + minus_di
+        if math.isnan(di_sum):
+            dx = NAN
+        else:
+            dx = _divide(100.0 * abs(plus_di - minus_di), di_sum) if di_sum > 0 else 0.0
+        adx = self._adx.step(dx, commit)
+        return (adx, plus_di, minus_di)[self.output]
+
+
+class StreamingDonchian(StreamingIndicator):
+    """`output` picks the channel: 0 = lower (lowest low), 1 = upper (highest high)."""
+    inputs = ('High', 'Low')
+
+    def __init__(self, n=20, output=0):
+        super().__init__()
+        self.output = output
+        self._extreme = _RollingExtreme(int(n), highest=output == 1)
+
+    def _step(self, high, low, commit):
+        x = high if self.output == 1 else low
+        return self._extreme.push(x) if commit else self._extreme.peek(x)
+
+
+class StreamingVWAP(StreamingIndicator):
+    inputs = ('High', 'Low', 'Close', 'Volume')
+
+    def __init__(self, n=20):
+        super().__init__()
+        self._price_volume = _RollingSum(int(n))
+        self._volume = _RollingSum(int(n))
+
+    def _step(self, high, low, close, volume, commit):
+        price_volume = (high + low + close) / 3.0 * volume
+        if commit:
+            return _divide(self._price_volume.push(price_volume), self._volume.push(volume))
+        return _divide(self._price_volume.peek(price_volume), self._volume.peek(volume))
+
+
+# Same names (and parameters) as the batch indicators in AVAILABLE_INDICATORS.
+STREAMING_INDICATORS = {
+    'SMA': StreamingSMA,
+    'RSI': StreamingRSI,
+    'EMA': StreamingEMA,
+    'WRSI': StreamingWilderRSI,
+    'ATR': StreamingATR,
+    'MACD': lambda *p: StreamingMACD(*p, output=0),
+    'MACD_SIGNAL': lambda *p: StreamingMACD(*p, output=1),
+    'MACD_HIST': lambda *p: StreamingMACD(*p, output=2),
+    'BB_LOWER': lambda *p: StreamingBollinger(*p, output=0),
+    'BB_UPPER': lambda *p: StreamingBollinger(*p, output=2),
+    'ADX': lambda *p: StreamingADX(*p, output=0),
+    'PLUS_DI': lambda *p: StreamingADX(*p, output=1),
+    'MINUS_DI': lambda *p: StreamingADX(*p, output=2),
+    'DC_LOWER': lambda *p: StreamingDonchian(*p, output=0),
+    'DC_UPPER': lambda *p: StreamingDonchian(*p, output=1),
+    'VWAP': StreamingVWAP,
+}
+
+
+def create_streaming_indicator(indicator_str):
+    """Builds the streaming indicator for a rule string like 'SMA(50)'. Returns None, after logging why, on failure."""
+    parsed = split_indicator(indicator_str, STREAMING_INDICATORS)
+    if parsed is None:
+        return None
+    name, params = parsed
+    try:
+        return STREAMING_INDICATORS[name](*params)
+    except (TypeError, ValueError, ZeroDivisionError) as e:
+        logging.error(f"Error creating streaming indicator '{indicator_str}': {e}")
+        return None
+
+
+# --- Streaming Expressions ---
+
+_ARITHMETIC = {'add': operator.add, 'sub': operator.sub, 'mul': operator.mul, 'div': _divide}
+
+
+class StreamingExpression:
+    """
+    An operand expression (see strategies/expressions.py) evaluated bar by bar.
+
+    Every indicator call in the tree gets its own streaming indicator; passing the
+    same `shared` dict to several expressions lets them share equal calls, which are
+    then stepped once per bar as long as they are updated with the same `memo`.
+    Raises ExpressionError if the operand can't be parsed or built.
+    """
+
+    def __init__(self, indicator_str, shared=None):
+        self.indicator_str = indicator_str
+        self._indicators = {} if shared is None else shared # {call node: StreamingIndicator}
+        self.node = self._build(parse_expression(indicator_str))
+        self.value = NAN
+
+    def _build(self, node):
+        """Creates the streaming indicators of every call in the tree; returns it with default inputs spelled out."""
+        kind = node[0]
+        if kind in ('num', 'col'):
+            return node
+        if kind != 'call':
+            return (kind, *(self._build(child) for child in node[1:]))
+
+        name, params = node[1], node[3]
+        if name not in STREAMING_INDICATORS:
+            raise ExpressionError(f"Unknown indicator: '{name}'")
+        try:
+            indicator = STREAMING_INDICATORS[name](*params)
+        except (TypeError, ValueError, ZeroDivisionError) as e:
+            raise ExpressionError(f"Invalid parameters for {name}(): {e}") from None
+        explicit = canonical_call(node, indicator.inputs)
+        explicit = ('call', name, tuple(self._build(child) for child in explicit[2]), params)
+        # Equal calls across the shared expressions keep the first indicator built for them
+        self._indicators.setdefault(explicit, indicator)
+        return explicit
+
+    def update(self, bar, final=True, memo=None):
+        """Advances the expression by one bar (a {column: value} mapping) and returns its value."""
+        value = self._evaluate(self.node, bar, final, {} if memo is None else memo)
+        if final:
+            self.value = value
+        return value
+
+    def _evaluate(self, node, bar, final, memo):
+        if node in memo:
+            return memo[node]
+        kind = node[0]
+        if kind == 'num':
+            value = float(node[1])
+        elif kind == 'col':
+            value = float(bar[node[1]])
+        elif kind == 'neg':
+            value = -self._evaluate(node[1], bar, final, memo)
+        elif kind == 'call':
+            inputs = [self._evaluate(child, bar, final, memo) for child in node[2]]
+            value = self._indicators[node].update(*inputs, final=final)
+        else:
+            value = _ARITHMETIC[kind](self._evaluate(node[1], bar, final, memo), self._evaluate(node[2], bar, final, memo))
+        memo[node] = value
+        return value
+
+
+# --- Streaming Rule Evaluation ---
+
+class StreamingRuleEvaluator:
+    """
+    Evaluates a ConfigurableStrategy rules dict bar by bar on streaming indicators.
+
+    Operands are streaming expressions sharing one set of indicators, so a
+    subexpression used by several conditions is updated once per bar. Each update
+    compiles the rules over just the previous and current bar with the same
+    compiler the backtests use, so entry/exit on a bar match what a backtest over
+    the full history would signal on that bar, crossovers included.
+    """
+
+    def __init__(self, rules):
+        if not rules or not isinstance(rules, dict):
+            raise UnsupportedRuleError("Rules are missing or not a dict")
+        self.rules = rules
+        self.expressions = {} # {indicator_str: StreamingExpression}
+        shared = {}
+        for indicator_str in sorted(extract_indicator_strings(rules)):
+            try:
+                self.expressions[indicator_str] = StreamingExpression(indicator_str, shared)
+            except ExpressionError as e:
+                logging.warning(f"No streaming indicator for '{indicator_str}' ({e}); its conditions never hold.")
+        self._previous = {s: NAN for s in self.expressions}
+        # Compiled once up front so rule problems are reported here rather than on every bar
+        compile_rule_signals(rules, {s: np.full(1, NAN) for s in self.expressions}, 1, strict=False)
+
+    def update(self, bar, final=True):
+        """
+        Feeds one bar ({'Open': .., 'High': .., 'Low': .., 'Close': .., 'Volume': ..}, or a
+        row of an OHLCV frame) and returns (entry, exit) for it. With final=False the bar
+        is still forming: signals are previewed without advancing any state.
+        """
+        current = self._advance(bar, final)
+        values = {s: np.array([self._previous[s], current[s]]) for s in current}
+        entry, exit_ = compile_rule_signals(self.rules, values, 2, strict=False, quiet=True)
+        if final:
+            self._previous = current
+        return bool(entry[-1]), bool(exit_[-1])
+
+    def _advance(self, bar, final):
+        memo = {} # One value per subexpression per bar
+        return {s: expression.update(bar, final, memo) for s, expression in self.expressions.items()}
+
+    def warm_up(self, data):
+        """
+        Feeds the historical bars of an OHLCV DataFrame, oldest first, and returns
+        (entry, exit) for the last one. Only the indicators advance on the earlier bars.
+        """
+        if data.empty:
+            return False, False
+        for row in data.iloc[:-1].to_dict('records'):
+            self._previous = self._advance(row, True)
+        return self.update(data.iloc[-1])
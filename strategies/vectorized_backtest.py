@@ -0,0 +1,223 @@
+# In: strategies/vectorized_backtest.py
+
+import logging
+import sys
+
+import numpy as np
+import pandas as pd
+from backtesting._stats import compute_stats
+
+# The fraction of equity backtesting.py commits on a default `self.buy()`.
+_FULL_EQUITY = 1 - sys.float_info.epsilon
+
+
+class UnsupportedRuleError(ValueError):
+    """Raised when a rules dict uses something the vectorized compiler can't express."""
+
+
+# --- Rule Compiler: rules JSON -> boolean arrays over the whole history ---
+
+def _greater_than(left, right):
+    return left > right
+
+def _less_than(left, right):
+    return left < right
+
+def _crosses_above(left, right):
+    # Same test as backtesting.lib.crossover() on bar i: left[i-1] < right[i-1] and left[i] > right[i]
+    crossed = np.zeros(left.shape, dtype=bool)
+    crossed[1:] = (left[:-1] < right[:-1]) & (left[1:] > right[1:])
+    return crossed
+
+# The operators ConfigurableStrategy supports; both execution paths evaluate rules through these.
+VECTORIZED_OPERATORS = {
+    'Crosses Above': _crosses_above,
+    'Is Greater Than': _greater_than,
+    'Is Less Than': _less_than,
+}
+
+def _operand_values(operand_str, indicators, quiet=False):
+    """Returns a float for 'value:' constants, the indicator array, or None if the indicator is missing."""
+    if not isinstance(operand_str, str):
+        raise UnsupportedRuleError(f"Operand must be a string, got {operand_str!r}")
+    if operand_str.lower().startswith('value:'):
+        try:
+            return float(operand_str.split(':')[1])
+        except (ValueError, IndexError):
+            # The event-driven path logs and treats the condition as false
+            if not quiet:
+                logging.error(f"Invalid static value format: '{operand_str}'")
+            return None
+    return indicators.get(operand_str)
+
+def _compile_condition(cond, indicators, n_bars, strict, quiet):
+    op = cond.get('operator')
+    if op not in VECTORIZED_OPERATORS:
+        if strict:
+            raise UnsupportedRuleError(f"Unsupported operator: '{op}'")
+        if not quiet:
+            logging.warning(f"Unsupported operator: '{op}'")
+        return np.zeros(n_bars, dtype=bool)
+    if 'left' not in cond or 'right' not in cond:
+        raise UnsupportedRuleError("Condition is missing an operand")
+
+    left = _operand_values(cond['left'], indicators, quiet)
+    right = _operand_values(cond['right'], indicators, quiet)
+    # If any operand failed to be resolved, the condition is false
+    if left is None or right is None:
+        return np.zeros(n_bars, dtype=bool)
+
+    # Constants become flat series, as backtesting.lib.crossover() treats them
+    shape = n_bars if isinstance(n_bars, tuple) else (n_bars,)
+    left = np.broadcast_to(np.asarray(left, dtype=float), shape)
+    right = np.broadcast_to(np.asarray(right, dtype=float), shape)
+    with np.errstate(invalid='ignore'):
+        return VECTORIZED_OPERATORS[op](left, right)
+
+def _compile_group(group, indicators, n_bars, strict, quiet):
+    results = []
+    for item in group.get('conditions', []):
+        if item.get('type') == 'condition':
+            results.append(_compile_condition(item, indicators, n_bars, strict, quiet))
+        elif item.get('type') == 'group':
+            results.append(_compile_group(item, indicators, n_bars, strict, quiet))
+
+    if not results:
+        return np.ones(n_bars, dtype=bool) # An empty group is considered true
+
+    op = group.get('logical_op', 'AND').upper()
+    if op == 'AND':
+        return np.logical_and.reduce(results)
+    elif op == 'OR':
+        return np.logical_or.reduce(results)
+    return np.zeros(n_bars, dtype=bool)
+
+def compile_rule_signals(rules, indicators, n_bars, strict=True, quiet=False):
+    """
+    Compiles a ConfigurableStrategy rules dict into (entry, exit) boolean arrays.
+
+    Element i tells whether the rule set fires on bar i, given the indicator values
+    up to and including bar i. Raises UnsupportedRuleError for anything that must be
+    left to the event-driven path; with strict=False an unsupported operator is
+    logged once and treated as a condition that never holds. quiet=True skips that
+    logging, for callers that compile the same rules over and over.
+
+    `n_bars` may also be a (bars, symbols) shape, with every indicator array of that
+    shape, to compile the rules for many symbols at once (bars run along axis 0).
+    """
+    if not rules or not isinstance(rules, dict):
+        raise UnsupportedRuleError("Rules are missing or not a dict")
+
+    signals = []
+    for rule_type in ['entry', 'exit']:
+        combined = np.ones(n_bars, dtype=bool)
+        for group in rules.get(rule_type, []):
+            combined &= _compile_group(group, indicators, n_bars, strict, quiet)
+        signals.append(combined)
+    return tuple(signals)
+
+# --- Trade Simulation ---
+
+def _warmup_bars(indicators):
+    """Bars before every indicator has a value; same rule as backtesting.py's warm-up skip."""
+    return max((int(np.isnan(values).argmin()) for values in indicators.values()), default=0)
+
+def run_vectorized_backtest(data, rules, indicators, cash=100_000, commission=.002):
+    """
+    Backtests a long-only ConfigurableStrategy rule set without the bar-by-bar loop.
+
+    Fills follow backtesting.py exactly: a signal on bar i is filled at bar i+1's
+    open, entries use the whole available cash in whole units, commission is
+    charged on both legs, and an open trade is closed at the last bar's open.
+    Only the (few) trades are iterated; equity is filled in per trade with array ops.
+
+    Args:
+        data (pd.DataFrame): OHLCV frame indexed by Date.
+        rules (dict): The preset's rules.
+        indicators (dict): {indicator_str: array} for the indicators the rules use.
+
+    Returns:
+        pd.Series: backtesting.py-style stats, or None if the run needs the
+            event-driven engine (e.g. the account ran out of money).
+    """
+    n_bars = len(data)
+    rule_indicators = {k: v for k, v in indicators.items() if v is not None}
+    entry, exit_ = compile_rule_signals(rules, rule_indicators, n_bars)
+
+    opens = data['Open'].to_numpy(dtype=float)
+    closes = data['Close'].to_numpy(dtype=float)
+    warmup = _warmup_bars(rule_indicators)
+    start = 1 + warmup # backtesting.py calls next() from this bar on
+
+    # Bars (at or after `start`) on which each signal fires, for O(log n) "next signal" lookups
+    entry_bars = np.flatnonzero(entry[start:]) + start
+    exit_bars = np.flatnonzero(exit_[start:]) + start
+
+    def next_signal(bars, from_bar):
+        pos = np.searchsorted(bars, from_bar)
+        return int(bars[pos]) if pos < len(bars) else None
+
+    equity = np.full(n_bars, float(cash))
+    trades = []
+    search_from = start
+    while True:
+        signal_bar = next_signal(entry_bars, search_from)
+        if signal_bar is None:
+            break
+
+        fill_bar = signal_bar + 1
+        # A signal on the last bar is filled by backtesting.py's final broker pass at that
+        # bar's open; the trade stays open (not in stats) but moves the final equity.
+        price_bar = min(fill_bar, n_bars - 1)
+        price = opens[price_bar]
+        adjusted_price = price + (_FULL_EQUITY * price * commission) / _FULL_EQUITY
+        size = int((cash * _FULL_EQUITY) // adjusted_price)
+        if not size:
+            # The broker cancels the order; the strategy is still flat on the fill bar
+            search_from = fill_bar
+            continue
+
+        cash_after_open = cash - size * price * commission
+        if fill_bar >= n_bars:
+            equity[-1] = cash_after_open + size * (closes[-1] - price)
+            break
+
+        exit_signal = next_signal(exit_bars, fill_bar)
+        finalized = exit_signal is None or exit_signal + 1 >= n_bars
+        exit_bar = n_bars - 1 if finalized else exit_signal + 1
+        exit_price = opens[exit_bar]
+
+        equity[fill_bar:exit_bar] = cash_after_open + size * (closes[fill_bar:exit_bar] - price)
+        exit_commission = size * exit_price * commission
+        cash = cash_after_open + size * (exit_price - price) - exit_commission
+        equity[exit_bar:] = cash
+
+        commissions = exit_commission + size * price * commission
+        trades.append({
+            'Size': size,
+            'EntryBar': fill_bar,
+            'ExitBar': exit_bar,
+            'EntryPrice': price,
+            'ExitPrice': exit_price,
+            'PnL': size * (exit_price - price) - commissions,
+            'ReturnPct': (exit_price / price - 1) - commissions / (size * price),
+            'EntryTime': data.index[fill_bar],
+            'ExitTime': data.index[exit_bar],
+        })
+
+        if finalized:
+            break
+        # Flat again when next() runs on the exit bar
+        search_from = exit_bar
+
+    if np.any(equity <= 0):
+        return None # Out-of-money handling is left to backtesting.py
+
+    trades_df = pd.DataFrame(trades, columns=['Size', 'EntryBar', 'ExitBar', 'EntryPrice', 'ExitPrice',
+                                              'PnL', 'ReturnPct', 'EntryTime', 'ExitTime'])
+    trades_df['Duration'] = trades_df['ExitTime'] - trades_df['EntryTime']
+
+    stats = compute_stats(trades=trades_df, equity=equity, ohlc_data=data, strategy_instance=None)
+    # compute_stats() needs a Strategy instance to find the warm-up bar for Buy & Hold
+    stats['Buy & Hold Return [%]'] = (closes[-1] - closes[warmup]) / closes[warmup] * 100
+    return stats